@@ -1,12 +1,14 @@
 import os
 import json
+import argparse
 import pandas as pd
 from backend.engine.data_manager import FPLDataManager
-from backend.engine.feature_factory import FeatureFactory
-from backend.engine.storage import EngineStorage
+from backend.engine.feature_factory import FeatureFactory, PlayerHistoryIndex
+from backend.engine.storage import create_storage
+from backend.engine.replay import add_replay_arguments, apply_replay_arguments
 
 def backfill(start_gw: int = 1):
-    storage = EngineStorage("/Users/chriseyebagha/Documents/Projects/Fantasy Premier League Project/backend/data")
+    storage = create_storage("/Users/chriseyebagha/Documents/Projects/Fantasy Premier League Project/backend/data")
     dm = FPLDataManager()
     bootstrap = dm.get_bootstrap_static()
     players = bootstrap['elements']
@@ -25,35 +27,35 @@ def backfill(start_gw: int = 1):
         except Exception as e:
             print(f"Error fetching GW{gw}: {e}")
     
-    all_training_records = []
+    # Fetch every player's history concurrently (failures are logged and skipped)
+    summaries = dm.get_player_summaries(p['id'] for p in players)
+    
+    records_by_gw = {}
     
     for i, p in enumerate(players):
         p_id = p['id']
         if i % 100 == 0:
             print(f"Processing player {i}/{len(players)}: {p['web_name']}...")
             
-        try:
-            summary = dm.get_player_summary(p_id)
-            history = summary.get('history', [])
-        except Exception as e:
-            print(f"Error fetching summary for {p['web_name']}: {e}")
+        if p_id not in summaries:
+            print(f"Skipping {p['web_name']}: summary unavailable")
             continue
+        # Prefix sums over the history, so each gameweek's cut-off costs O(log n) instead of a re-scan
+        history_index = PlayerHistoryIndex(summaries[p_id].get('history', []))
             
         for gw in gws_to_backfill:
             actual = gw_events.get(gw, {}).get(p_id)
             if not actual or actual.get('minutes', 0) == 0:
                 continue
-                
-            past_history = [m for m in history if m['round'] < gw]
             
             # Opponent difficulty for THAT gameweek
-            gw_entry = next((m for m in history if m['round'] == gw), None)
+            gw_entry = history_index.entry(gw)
             if not gw_entry: continue
             
             diff = gw_entry.get('difficulty', 3)
             
-            # Prepare features
-            features = FeatureFactory.prepare_features(p, past_history, diff, gw)
+            # Prepare features from the matches before this gameweek
+            features = FeatureFactory.prepare_features_at(p, history_index, gw, diff, gw)
             
             # Logic for points events:
             # 1. Defcon Points: +2 for 12+ defensive contributions
@@ -76,12 +78,18 @@ def backfill(start_gw: int = 1):
                 "actual_minutes": actual['minutes'],
                 "actual_conceded": actual['goals_conceded']
             }
-            all_training_records.append(record)
+            records_by_gw.setdefault(gw, []).append(record)
             
-    if all_training_records:
-        print(f"Saving {len(all_training_records)} new training records...")
-        storage.save_training_data(all_training_records)
+    if records_by_gw:
+        print(f"Saving {sum(len(r) for r in records_by_gw.values())} new training records...")
+        for gw, records in sorted(records_by_gw.items()):
+            storage.save_training_data(records, gameweek=gw)
         print("Backfill complete.")
 
 if __name__ == "__main__":
-    backfill()
+    parser = argparse.ArgumentParser(description='Backfill training data from past gameweeks')
+    parser.add_argument('--start-gw', type=int, default=1)
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+    apply_replay_arguments(args)
+    backfill(args.start_gw)
@@ -0,0 +1,199 @@
+"""
+Chip Strategy Module for FPL Predictor
+Expected gain of Bench Boost, Triple Captain, Free Hit and Wildcard in every remaining gameweek
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+from backend.engine.data_manager import FPLDataManager
+from backend.engine.storage import create_storage
+from backend.engine.trainer import modelTrainer
+from backend.engine.commander import EngineCommander, DEFAULT_CANDIDATE_LIMIT
+from backend.engine.snapshot import GameweekSnapshot
+from backend.engine.distributions import HAUL_THRESHOLD
+from backend.engine.replay import add_replay_arguments, apply_replay_arguments
+from backend.squad_builder import optimize_squad, TOTAL_BUDGET
+from backend.transfer_planner import (HorizonPredictions, SquadEvaluator, TransferPlanner, Squad, predict_horizon,
+                                      upcoming_gameweeks)
+
+CHIPS = ("bench_boost", "triple_captain", "free_hit", "wildcard")
+DEFAULT_SIMS = 2000
+# Reported spread of each chip's gain
+GAIN_PERCENTILES = (10, 90)
+
+
+class ChipStrategy:
+    """
+    Values every chip in every gameweek of the horizon against playing it without a chip.
+    Lineups and chip squads are picked on expected points (as a manager would before the deadline), then scored
+    on one shared sample tensor (player x gameweek x simulation), so every chip/GW comparison uses the same draws.
+    By default the draws are joint per fixture (MatchSimulator), so stacked teammates rise and fall together.
+    """
+
+    def __init__(self, predictions: HorizonPredictions, trainer: modelTrainer,
+                 n_sims: int = DEFAULT_SIMS, seed: Optional[int] = None, joint: bool = True):
+        self.predictions = predictions
+        self.joint = joint
+        self.trainer = trainer
+        self.n_sims = n_sims
+        self.seed = seed
+        self.evaluate = SquadEvaluator(predictions.points)
+        self.prices = np.array([int(round(p['price'] * 10)) for p in predictions.players])
+
+    def _optimal_squad(self, points: np.ndarray, budget_tenths: int) -> Optional[Squad]:
+        """Best 15 for a points vector within budget (Free Hit / Wildcard rebuilds)."""
+        pool = [dict(p, predicted_points=float(points[i])) for i, p in enumerate(self.predictions.players)]
+        squad = optimize_squad(pool, budget_tenths / 10.0)
+        if not squad:
+            return None
+        return tuple(sorted(self.predictions.row[p['id']] for p in squad['starting_11'] + squad['bench']))
+
+    def _lineup_index(self, squads: Sequence[Squad], cols: Sequence[int]):
+        """(starting XI, bench, captain) row arrays for one squad per column."""
+        lineups = [self.evaluate.lineup(squad, col) for squad, col in zip(squads, cols)]
+        return (np.array([l['starting_11'] for l in lineups]), np.array([l['bench'] for l in lineups]),
+                np.array([l['captain'] for l in lineups]))
+
+    def evaluate_chips(self, squads: Sequence[Squad], bank: float = 0.0) -> Dict:
+        """
+        Expected gain of each chip per gameweek, for the squad held in each gameweek (`squads[col]`).
+        Wildcard gain is measured over the rest of the horizon, holding the rebuilt squad.
+        """
+        start = time.perf_counter()
+        n_cols = len(self.predictions.gameweeks)
+        cols = np.arange(n_cols)
+        points = self.predictions.points
+
+        # 1. Chip squads from expected points: a one-week Free Hit and a rest-of-horizon Wildcard
+        budgets = [int(self.prices[list(squad)].sum()) + int(round(bank * 10)) for squad in squads]
+        remaining = points[:, ::-1].cumsum(axis=1)[:, ::-1]
+        free_hit = [self._optimal_squad(points[:, col], budgets[col]) or squads[col] for col in cols]
+        wildcard = [self._optimal_squad(remaining[:, col], budgets[col]) or squads[col] for col in cols]
+
+        # 2. One vectorized draw for every player any of those squads uses
+        needed = sorted({r for squad in list(squads) + free_hit + wildcard for r in squad})
+        samples = self.predictions.sample(self.trainer, needed, self.n_sims, self.seed, self.joint)
+        lookup = np.full(len(self.predictions.players), -1)
+        lookup[needed] = np.arange(len(needed))
+
+        def realized(squad_list: Sequence[Squad], at_cols: np.ndarray):
+            """Starting XI + captain, bench and captain points per (column, simulation)."""
+            xi, bench, captain = self._lineup_index(squad_list, at_cols)
+            col_index = at_cols[:, None]
+            captain_pts = samples[lookup[captain], at_cols]
+            return (samples[lookup[xi], col_index].sum(axis=1) + captain_pts,
+                    samples[lookup[bench], col_index].sum(axis=1), captain_pts)
+
+        base, bench, captain = realized(squads, cols)
+        free_hit_total, _, _ = realized(free_hit, cols)
+
+        # Wildcard: rebuilt squad held from its gameweek to the end of the horizon vs the planned squads
+        wildcard_gain = np.zeros((n_cols, self.n_sims))
+        for col in cols:
+            later = cols[col:]
+            total, _, _ = realized([wildcard[col]] * len(later), later)
+            wildcard_gain[col] = (total - base[col:]).sum(axis=0)
+
+        gains = {
+            "bench_boost": bench,
+            "triple_captain": captain,
+            "free_hit": free_hit_total - base,
+            "wildcard": wildcard_gain,
+        }
+        haul_prob = (captain >= HAUL_THRESHOLD).mean(axis=1)
+
+        # 3. Summaries per chip and gameweek
+        result = {"gameweeks": self.predictions.gameweeks, "chips": {}, "best": {}}
+        for chip, gain in gains.items():
+            expected = gain.mean(axis=1)
+            low, high = np.percentile(gain, GAIN_PERCENTILES, axis=1)
+            rows = []
+            for col, gw in enumerate(self.predictions.gameweeks):
+                row = {
+                    "gameweek": gw,
+                    "expected_gain": round(float(expected[col]), 2),
+                    f"p{GAIN_PERCENTILES[0]}": round(float(low[col]), 2),
+                    f"p{GAIN_PERCENTILES[1]}": round(float(high[col]), 2),
+                }
+                if chip == "triple_captain":
+                    row["captain"] = self.predictions.players[self.evaluate.lineup(squads[col], col)['captain']]['web_name']
+                    row["haul_prob"] = round(float(haul_prob[col]), 3)
+                rows.append(row)
+            result["chips"][chip] = rows
+            best = int(np.argmax(expected))
+            result["best"][chip] = {"gameweek": self.predictions.gameweeks[best], "expected_gain": rows[best]["expected_gain"]}
+
+        result["simulations"] = self.n_sims
+        result["solve_time"] = round(time.perf_counter() - start, 3)
+        return result
+
+
+def print_chip_table(result: Dict):
+    print(f"\n🎴 Expected chip gain per gameweek ({result['simulations']} simulations)")
+    print(f"  {'GW':>4} " + " ".join(f"{chip:>15}" for chip in CHIPS))
+    for col, gw in enumerate(result['gameweeks']):
+        print(f"  {gw:>4} " + " ".join(f"{result['chips'][chip][col]['expected_gain']:>15.2f}" for chip in CHIPS))
+    for chip in CHIPS:
+        best = result['best'][chip]
+        print(f"🏆 {chip}: GW{best['gameweek']} (+{best['expected_gain']:.2f})")
+    print(f"⏱️  Chip sweep finished in {result['solve_time']:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Chip timing: expected gain of each chip per gameweek')
+    parser.add_argument('--squad', help='Comma-separated ids of the current 15 players (default: the optimal squad for the next GW)')
+    parser.add_argument('--bank', type=float, default=None, help='Money in the bank, in millions')
+    parser.add_argument('--horizon', type=int, default=38, help='Gameweeks to sweep (default: rest of the season)')
+    parser.add_argument('--sims', type=int, default=DEFAULT_SIMS)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--independent', action='store_true', help='Draw players independently instead of per-fixture joint simulation')
+    parser.add_argument('--plan', action='store_true', help='Follow the transfer planner instead of holding the squad')
+    parser.add_argument('--free-transfers', type=int, default=1, help='Free transfers for --plan')
+    parser.add_argument('--full-universe', action='store_true',
+                        help=f'Consider every available player instead of the top {DEFAULT_CANDIDATE_LIMIT} pre-filter')
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+    apply_replay_arguments(args)
+
+    dm = FPLDataManager()
+    trainer = modelTrainer(create_storage())
+    commander = EngineCommander(dm, trainer, candidate_limit=None if args.full_universe else DEFAULT_CANDIDATE_LIMIT)
+    squad_ids = [int(x) for x in args.squad.split(',')] if args.squad else []
+
+    bootstrap = dm.get_bootstrap_static()
+    snapshot = GameweekSnapshot.build(dm, commander.snapshot_player_ids(bootstrap['elements']) | set(squad_ids), bootstrap=bootstrap,
+                                      storage=trainer.storage)
+    predictions = predict_horizon(commander, snapshot, args.horizon, tuple(squad_ids))
+    if not upcoming_gameweeks(snapshot, args.horizon):
+        print("No upcoming gameweeks to plan.")
+        sys.exit(0)
+
+    bank = args.bank
+    if not squad_ids:
+        pool = [dict(p, predicted_points=float(predictions.points[i, 0])) for i, p in enumerate(predictions.players)]
+        squad = optimize_squad(pool, TOTAL_BUDGET)
+        if not squad:
+            print("❌ Could not build a starting squad within budget")
+            sys.exit(1)
+        squad_ids = [p['id'] for p in squad['starting_11'] + squad['bench']]
+        bank = TOTAL_BUDGET - squad['total_cost'] if bank is None else bank
+        print(f"No --squad given; using the optimal GW{predictions.gameweeks[0]} squad ({squad['total_cost']:.1f}m)")
+
+    planner = TransferPlanner(predictions)
+    try:
+        squad = planner.squad_key(squad_ids)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    # Squad held in each gameweek: the same 15 throughout, or the transfer planner's path
+    squads: List[Squad] = [squad] * len(predictions.gameweeks)
+    if args.plan:
+        plan = planner.plan(squad_ids, bank or 0.0, args.free_transfers)
+        squads = [planner.squad_key([p['id'] for p in step['starting_11'] + step['bench']]) for step in plan['steps']]
+        print(f"🗓️  Following the transfer plan ({plan['gain']:+.2f} xP over holding)")
+
+    print_chip_table(ChipStrategy(predictions, trainer, args.sims, args.seed, joint=not args.independent).evaluate_chips(squads, bank or 0.0))
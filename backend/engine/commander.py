@@ -1,66 +1,61 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Mapping, NamedTuple, Optional, Set, Tuple
 from backend.engine.data_manager import FPLDataManager
 from backend.engine.feature_factory import FeatureFactory
+from backend.engine.snapshot import GameweekSnapshot
+from backend.engine.team_stats import DEFAULT_VULNERABILITY
+from backend.engine.fixture_index import FixtureIndex
 from backend.engine.trainer import modelTrainer
+from backend.engine.params import EngineParams
+from backend.engine.selector import StarterSelector
+from backend.engine import tracing
+
+# Default size of the form-weighted candidate pool; None scores the full player universe
+DEFAULT_CANDIDATE_LIMIT = 120
+
+class CandidateScores(NamedTuple):
+    """Model-stage output of one gameweek: the gated candidates and their raw per-fixture event predictions."""
+    valid_players: List[Dict]
+    owners: np.ndarray # valid_players index of each fixture row
+    fixture_predictions: Dict[str, np.ndarray]
+    fixture_vulnerability: np.ndarray # opponent vulnerability of each fixture row
+    leaky_threshold: float
 
 class EngineCommander:
     """The 'Brain' that orchestrates predictions and selections."""
     
-    def __init__(self, data_manager: FPLDataManager, trainer: modelTrainer):
+    def __init__(self, data_manager: FPLDataManager, trainer: modelTrainer,
+                 candidate_limit: Optional[int] = DEFAULT_CANDIDATE_LIMIT, params: Optional[EngineParams] = None):
         self.dm = data_manager
         self.trainer = trainer
+        self.candidate_limit = candidate_limit
+        # Tunable constants; shared with the trainer unless given explicitly
+        self.params = params or trainer.params
+
+    @staticmethod
+    def prefilter_candidates(players: List[Dict], limit: Optional[int] = DEFAULT_CANDIDATE_LIMIT) -> List[Dict]:
+        """Performance-based pre-filter (form-weighted) shared by the commander and squad builder; limit=None keeps everyone."""
+        return sorted(players, key=lambda x: (float(x.get('form') or 0) * 1.5) + float(x.get('points_per_game') or 0), reverse=True)[:limit]
+
+    def snapshot_player_ids(self, players: List[Dict]) -> Set[int]:
+        """Every player whose history a run needs: the pre-filtered candidates (team stats come from the stats table)."""
+        return {p['id'] for p in self.prefilter_candidates(players, self.candidate_limit) if p.get('status') in ('a', 'd')}
 
-    def _get_rolling_team_stats(self, players: List[Dict], window: int = 7) -> Tuple[Dict[int, float], float]:
+    @tracing.traced("commander.build_snapshot")
+    def build_snapshot(self, include_previous_results: bool = False) -> GameweekSnapshot:
+        """Fetches everything a pipeline run needs in one pass."""
+        bootstrap = self.dm.get_bootstrap_static()
+        player_ids = self.snapshot_player_ids(bootstrap['elements'])
+        return GameweekSnapshot.build(self.dm, player_ids, bootstrap=bootstrap,
+                                      include_previous_results=include_previous_results,
+                                      storage=self.trainer.storage)
+
+    def _get_rolling_team_stats(self, snapshot: GameweekSnapshot, window: int = 7) -> Tuple[Dict[int, float], float]:
         """Calculates blended rolling Vulnerability Score (xGC + GC) per match for each team."""
-        team_vulnerability = {}
-        
-        # Group defenders/keepers by team
-        team_groups = {}
-        for p in players:
-            t_id = p['team']
-            if t_id not in team_groups:
-                team_groups[t_id] = []
-            team_groups[t_id].append(p)
-        
-        # For each team, pick an anchor or ensemble to get the team's recent defensive stats
-        for t_id, members in team_groups.items():
-            gks = [p for p in members if p['element_type'] == 1]
-            defs = [p for p in members if p['element_type'] == 2]
-            candidates = sorted(gks + defs, key=lambda x: x.get('minutes', 0), reverse=True)[:3]
-            
-            if not candidates:
-                team_vulnerability[t_id] = 1.5 # Default approx score
-                continue
-                
-            gw_stats = {} # round -> (xgc, gc)
-            for p in candidates:
-                summary = self.dm.get_player_summary(p['id'])
-                history = summary.get('history', [])
-                for h in history:
-                    gw = h.get('round')
-                    xgc = float(h.get('expected_goals_conceded') or 0)
-                    gc = float(h.get('goals_conceded') or 0)
-                    
-                    if gw not in gw_stats:
-                        gw_stats[gw] = (xgc, gc)
-                    else:
-                        # Take max of candidates to represent the team (avoiding rotation bias)
-                        curr_xgc, curr_gc = gw_stats[gw]
-                        gw_stats[gw] = (max(curr_xgc, xgc), max(curr_gc, gc))
-            
-            recent_gws = sorted(gw_stats.keys(), reverse=True)[:window]
-            recent_xgc = [gw_stats[gw][0] for gw in recent_gws]
-            recent_gc = [gw_stats[gw][1] for gw in recent_gws]
-            
-            avg_xgc = sum(recent_xgc) / len(recent_xgc) if recent_xgc else 1.5
-            avg_gc = sum(recent_gc) / len(recent_gc) if recent_gc else 1.5
-            
-            # Blended Vulnerability Score: 50% Process (xGC) + 50% Reality (GC)
-            vulnerability_score = (avg_xgc * 0.5) + (avg_gc * 0.5)
-            team_vulnerability[t_id] = round(vulnerability_score, 2)
-            
+        # O(1) window lookups on the persisted team x gameweek table (refreshed once per run by the snapshot)
+        team_vulnerability = {t['id']: snapshot.team_stats.vulnerability(t['id'], window) for t in snapshot.teams}
+
         # Calculate 30th Percentile Threshold (Worst Defenses)
         sorted_values = sorted(team_vulnerability.values(), reverse=True)
         threshold_idx = min(5, len(sorted_values) - 1)
@@ -76,30 +71,74 @@ class EngineCommander:
             
         return team_vulnerability, leaky_threshold
 
-    def get_top_15_players(self) -> Dict[str, List[Dict]]:
+    @staticmethod
+    def batch_features(snapshot: GameweekSnapshot, valid_players: List[Dict], next_gw: int,
+                       team_vulnerability: Mapping[int, float]) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Vectorized features with one row per (player, fixture) in item['fixtures'], and the valid_players index
+        owning each row (a double gameweek player owns two rows). Attaches the first fixture's feature dict as item['features'].
+        """
+        owners = np.array([i for i, item in enumerate(valid_players) for _ in item['fixtures']], dtype=int)
+        fixtures = [f for item in valid_players for f in item['fixtures']]
+        elements_df = pd.DataFrame([valid_players[i]['p'] for i in owners])
+        feature_df = FeatureFactory.prepare_features_batch(
+            elements_df, snapshot.history_frame,
+            np.array([f.difficulty for f in fixtures]), next_gw,
+            np.array([team_vulnerability.get(f.opponent, DEFAULT_VULNERABILITY) for f in fixtures], dtype=float)
+        ).reset_index(drop=True)
+        records = feature_df.to_dict('records')
+        for row in np.unique(owners, return_index=True)[1]:
+            valid_players[owners[row]]['features'] = records[row]
+        return feature_df, owners
+
+    @staticmethod
+    def sum_by_player(values: np.ndarray, owners: np.ndarray, n_players: int) -> np.ndarray:
+        """Adds per-fixture rows up per player (double gameweeks score both matches)."""
+        totals = np.zeros(n_players)
+        np.add.at(totals, owners, np.asarray(values, dtype=float))
+        return totals
+
+    @staticmethod
+    def any_by_player(probs: np.ndarray, owners: np.ndarray, n_players: int) -> np.ndarray:
+        """P(event in at least one fixture) per player, 1 - prod(1 - p_i), for per-fixture probabilities."""
+        log_miss = np.zeros(n_players)
+        np.add.at(log_miss, owners, np.log1p(-np.clip(np.asarray(probs, dtype=float), 0.0, 1.0 - 1e-12)))
+        return 1.0 - np.exp(log_miss)
+
+    @tracing.traced("commander.get_top_15_players")
+    def get_top_15_players(self, snapshot: Optional[GameweekSnapshot] = None) -> Dict[str, List[Dict]]:
         """Returns the best 15 players separated into Starting XI and Bench."""
-        bootstrap = self.dm.get_bootstrap_static()
-        players = bootstrap['elements']
-        teams = {t['id']: t['name'] for t in bootstrap['teams']}
-        short_names = {t['id']: t['short_name'] for t in bootstrap['teams']}
+        snapshot = snapshot or self.build_snapshot()
+        scores = self.score_candidates(snapshot)
+        if not scores.valid_players:
+            return {"starters": [], "bench": []}
+
+        processed = self.rank_candidates(snapshot, scores)
+        starters, bench = self.select_squad(processed)
         
-        fixtures = self.dm.get_fixtures()
-        next_gw = self.dm.get_upcoming_gameweek(bootstrap)
-        gw_fixtures = [f for f in fixtures if f['event'] == next_gw]
+        # PERSIST: Save predictions for future feedback loop evaluation
+        # We save all 'processed' players who have features extracted
+        self.trainer.storage.save_predictions(snapshot.next_gameweek, processed)
         
-        team_diff = {}
-        # Calculate rolling team-level Vulnerability (Last 7 games)
-        team_vulnerability, leaky_threshold = self._get_rolling_team_stats(players, window=7)
+        return {"starters": starters, "bench": bench}
 
-        for f in gw_fixtures:
-            team_diff[f['team_h']] = f['team_h_difficulty']
-            team_diff[f['team_a']] = f['team_a_difficulty']
+    @tracing.traced("commander.score_candidates")
+    def score_candidates(self, snapshot: GameweekSnapshot) -> CandidateScores:
+        """
+        Model stage: availability/minutes gates, batched features and the heads' raw per-fixture event predictions.
+        Depends only on the snapshot and the models, so sweeps over post-processing params can reuse it.
+        """
+        players = snapshot.players
+        next_gw = snapshot.next_gameweek
+        gw_fixtures = snapshot.fixture_index.gameweek(next_gw)
+        
+        # Calculate rolling team-level Vulnerability (Last 7 games)
+        team_vulnerability, leaky_threshold = self._get_rolling_team_stats(snapshot, window=7)
 
-        # 1. Performance-based Pre-filter (Top 120 players to minimize API calls)
-        candidates = sorted(players, key=lambda x: (float(x.get('form') or 0) * 1.5) + float(x.get('points_per_game') or 0), reverse=True)[:120]
+        # 1. Performance-based Pre-filter (Top 120 by default; candidate_limit=None scores everyone)
+        candidates = self.prefilter_candidates(players, self.candidate_limit)
         
         valid_players = []
-        player_features = []
 
         for p in candidates:
             # A. FPL Availability Check
@@ -108,10 +147,11 @@ class EngineCommander:
             chance_ok = chance is None or chance >= 100
             
             if not status_ok: continue # Hard skip if not available at all
+            if not gw_fixtures.get(p['team']): continue # Blank gameweek: no fixture to score
+            if not snapshot.has_summary(p['id']): continue # History unavailable after retries
             
             # Smarter Minutes Tracking: Based on Option A (Hard Availability)
-            summary = self.dm.get_player_summary(p['id'])
-            history = summary.get('history', [])
+            history = snapshot.history(p['id'])
             last_2 = history[-2:] if history else []
             last_5 = history[-5:] if history else []
             
@@ -142,111 +182,95 @@ class EngineCommander:
             # Final binary gate for starting eligibility
             can_start = chance_ok and participation_ok
             
-            # Prepare features
-            diff = team_diff.get(p['team'], 3)
-            
-            # Map team ID to opponent ID
-            opponent_id = None
-            for f in gw_fixtures:
-                if f['team_h'] == p['team']:
-                    opponent_id = f['team_a']
-                    break
-                elif f['team_a'] == p['team']:
-                    opponent_id = f['team_h']
-                    break
-            
-            opp_vulnerability = team_vulnerability.get(opponent_id, 1.5) if opponent_id else 1.5
-            features = FeatureFactory.prepare_features(p, history, diff, next_gw, opp_vulnerability)
-            
-            player_features.append(features)
             valid_players.append({
                 "p": p,
-                "features": features,
-                "diff": diff,
+                "fixtures": gw_fixtures[p['team']],
                 "avg_minutes": avg_5,
-                "can_start": can_start,
-                "opp_vulnerability": opp_vulnerability
+                "can_start": can_start
             })
 
         if not valid_players:
-            return {"starters": [], "bench": []}
+            return CandidateScores([], np.zeros(0, dtype=int), {}, np.zeros(0), leaky_threshold)
+
+        # One batched feature pass over every (candidate, fixture) row
+        feature_df, owners = self.batch_features(snapshot, valid_players, next_gw, team_vulnerability)
 
         # Multi-Target Probabilistic Prediction
-        feature_df = pd.DataFrame(player_features)
         self.trainer.load_model()
-        event_predictions = self.trainer.predict(feature_df)
+        fixture_predictions = self.trainer.predict(feature_df)
+
+        fixture_vulnerability = np.array([team_vulnerability.get(f.opponent, DEFAULT_VULNERABILITY)
+                                          for item in valid_players for f in item['fixtures']])
+        return CandidateScores(valid_players, owners, fixture_predictions, fixture_vulnerability, leaky_threshold)
+
+    @tracing.traced("commander.rank_candidates")
+    def rank_candidates(self, snapshot: GameweekSnapshot, scores: CandidateScores) -> List[Dict]:
+        """Post-processing stage: xP, brave boosts and haul probabilities from the event predictions, best first."""
+        params = self.params
+        valid_players, owners, fixture_predictions = scores.valid_players, scores.owners, scores.fixture_predictions
+        teams = {t['id']: t['name'] for t in snapshot.teams}
+        short_names = {t['id']: t['short_name'] for t in snapshot.teams}
+        n_players = len(valid_players)
         
-        # Translate to Expected Points (xP) and Haul Probabilities
+        # Translate to Expected Points (xP) and Haul Probabilities, per fixture first
         positions = [item['p']['element_type'] for item in valid_players]
+        fixture_positions = [positions[i] for i in owners]
+        fixture_xp = np.asarray(self.trainer.translate_to_xp(fixture_predictions, fixture_positions), dtype=float)
         
-        xp_points = self.trainer.translate_to_xp(event_predictions, positions)
+        # Matchup: opponent_vulnerability >= leaky_threshold indicates a leaking defense
+        brave_fixture = scores.fixture_vulnerability >= scores.leaky_threshold
         
         # Calculate Vesuvius Multipliers (Booster Layer)
         # 1. Clinicality Boost: Based on seasonal haul frequency
         # 2. Vulnerability Boost: Based on opponent xGC
-        haul_multipliers = np.ones(len(valid_players))
+        haul_multipliers = np.ones(len(owners))
         for idx, item in enumerate(valid_players):
             p = item['p']
             features = item['features']
             
             # Clinicality: hauls / apps
             # We use 'hauls' from features and calculate apps from history
-            summary = self.dm.get_player_summary(p['id'])
-            history = summary.get('history', [])
+            history = snapshot.history(p['id'])
             apps = len(history) if history else 1
             haul_freq = features.get('hauls', 0) / apps
             
             # Clinicality multiplier: 1.0 (0 hauls) to 1.15 (high frequency)
-            clinicality_boost = 1.0 + (min(haul_freq, 0.4) * 0.375) # Max +15% boost
+            clinicality_boost = 1.0 + (min(haul_freq, params.clinicality_cap) * params.clinicality_slope) # Max +15% boost
             
-            # Matchup: opponent_vulnerability >= leaky_threshold indicates a leaking defense
-            opp_vuln = item['opp_vulnerability']
-            matchup_boost = 1.0
-            if opp_vuln >= leaky_threshold:
-                matchup_boost = 1.10 # +10% boost for leaking defense
-                
-            haul_multipliers[idx] = clinicality_boost * matchup_boost
-
-        haul_probs = self.trainer.calculate_haul_probability(
-            event_predictions, 
-            positions, 
+            # +10% boost for each fixture against a leaking defense
+            rows = owners == idx
+            haul_multipliers[rows] = clinicality_boost * np.where(brave_fixture[rows], params.matchup_boost, 1.0)
+
+        # A double gameweek player's haul chance covers both matches: simulate per fixture, then sum the samples
+        haul_probs = self.trainer.points_distribution(
+            fixture_predictions, 
+            fixture_positions, 
             haul_multipliers=haul_multipliers
-        )
+        ).combine(owners, n_players).haul_probability()
+
+        # Per-player totals over the gameweek's fixtures
+        event_predictions = {target: self.sum_by_player(values, owners, n_players)
+                             for target, values in fixture_predictions.items()}
+        # Clean sheet is a probability per match: a double gameweek keeps it as the chance of at least one
+        event_predictions['actual_clean_sheets'] = self.any_by_player(fixture_predictions['actual_clean_sheets'], owners, n_players)
+        xp_points = self.sum_by_player(fixture_xp, owners, n_players)
+        # BRAVE MODE: Apply a 'leak' of the matchup boost (50% intensity) to core xP of leaky-defense fixtures
+        # This ensures players targeting leaky defenses (e.g. Bournemouth) rank higher in the XI.
+        brave_points = self.sum_by_player(np.where(brave_fixture, fixture_xp * params.brave_leak, fixture_xp), owners, n_players)
+        is_brave = self.sum_by_player(brave_fixture, owners, n_players) > 0
 
         processed = []
         for i, item in enumerate(valid_players):
             p = item['p']
             features = item['features']
-            fdr = item['diff']
-            
-            # Map team ID to opponent name
-            opponent_id = None
-            is_home = False
-            for f in gw_fixtures:
-                if f['team_h'] == p['team']:
-                    opponent_id = f['team_a']
-                    is_home = True
-                    break
-                elif f['team_a'] == p['team']:
-                    opponent_id = f['team_h']
-                    is_home = False
-                    break
-            
-            opponent_name = short_names.get(opponent_id, "???")
-            venue = "(H)" if is_home else "(A)"
-            next_fix_str = f"{opponent_name} {venue}"
+            fdr = item['fixtures'][0].difficulty
+            next_fix_str = FixtureIndex.label(item['fixtures'], short_names)
 
             # Reality Score: Now fully derived from the Probabilistic xP model
-            # BRAVE MODE: Apply a 'leak' of the matchup boost (50% intensity) to core xP
-            # This ensures players targeting leaky defenses (e.g. Bournemouth) rank higher in the XI.
+            # If Matchup Boost for ceiling is +10%, the brave score applies +5% to the standard xP
             final_conservative = float(xp_points[i])
-            opp_vuln = item['opp_vulnerability']
-            is_brave_matchup = opp_vuln >= leaky_threshold
-            
-            final_score = final_conservative
-            if is_brave_matchup:
-                # If Matchup Boost for ceiling is +10%, apply +5% to the standard xP
-                final_score *= 1.05
+            is_brave_matchup = bool(is_brave[i])
+            final_score = float(brave_points[i])
             
             # Extract individual probabilities
             prob_goal = float(event_predictions['actual_goals'][i])
@@ -306,6 +330,7 @@ class EngineCommander:
                 "xA": round(float(p.get('expected_assists', 0)), 2),
                 "avg_minutes": round(item['avg_minutes'], 1),
                 "can_start": item['can_start'],
+                "n_fixtures": len(item['fixtures']),
                 "next_fixture": next_fix_str,
                 "next_fixture_difficulty": fdr,
                 "explosivity": float(features.get('explosivity', 0)),
@@ -316,103 +341,22 @@ class EngineCommander:
                 "features": features # Essential for retraining
             })
 
-        # Final Selection: 11 Starters (filtered by minutes) + 4 Bench
-        # Constraint: Max 3 players from the same team
         processed.sort(key=lambda x: x['predicted_points'], reverse=True)
-        
-        starters = []
-        remaining = processed[:]
-        team_counts = {}
-        
-        # Formation Rules (Minima)
-        counts = {1: 0, 2: 0, 3: 0, 4: 0}
-        
-        def can_add_team(team_name):
-            return team_counts.get(team_name, 0) < 3
+        return processed
 
-        # 1. Fill mandatory minimum slots
-        for p in remaining[:]:
-            if not p['can_start']: continue
-            if not can_add_team(p['team']): continue
-            
-            pos = p['position']
-            if pos == 1 and counts[1] < 1:
-                starters.append(p)
-                remaining.remove(p)
-                counts[1] += 1
-                team_counts[p['team']] = team_counts.get(p['team'], 0) + 1
-            elif pos == 2 and counts[2] < 3:
-                starters.append(p)
-                remaining.remove(p)
-                counts[2] += 1
-                team_counts[p['team']] = team_counts.get(p['team'], 0) + 1
-            elif pos == 3 and counts[3] < 2:
-                starters.append(p)
-                remaining.remove(p)
-                counts[3] += 1
-                team_counts[p['team']] = team_counts.get(p['team'], 0) + 1
-            elif pos == 4 and counts[4] < 1:
-                starters.append(p)
-                remaining.remove(p)
-                counts[4] += 1
-                team_counts[p['team']] = team_counts.get(p['team'], 0) + 1
-
-        # 2. Fill remaining starter slots (Strategic Formation: Favor Attackers)
-        max_counts = {1: 1, 2: 5, 3: 5, 4: 3}
-        
-        while len(starters) < 11 and remaining:
-            def_candidates = [p for p in remaining if p['position'] == 2 and counts[2] < max_counts[2] and p['can_start'] and can_add_team(p['team'])]
-            atk_candidates = [p for p in remaining if p['position'] in [3, 4] and counts[p['position']] < max_counts[p['position']] and p['can_start'] and can_add_team(p['team'])]
-            
-            best_def = def_candidates[0] if def_candidates else None
-            best_atk = atk_candidates[0] if atk_candidates else None
-            
-            if not best_def and not best_atk:
-                # Fallback: Look for ANY player who meets team constraint, even if minutes are low
-                valid_backups = [p for p in remaining if can_add_team(p['team'])]
-                if not valid_backups: break # Complete exhaustion
-                
-                selected_p = valid_backups[0]
-            else:
-                if best_def and not best_atk:
-                    selected_p = best_def
-                elif best_atk and not best_def:
-                    selected_p = best_atk
-                else:
-                    # Decider: 4th+ Defender must be 0.8 points better than best attacker
-                    is_defender_luxury = counts[2] >= 3
-                    if is_defender_luxury and (best_def['predicted_points'] < best_atk['predicted_points'] + 0.8):
-                        selected_p = best_atk
-                    else:
-                        selected_p = best_def if best_def['predicted_points'] > best_atk['predicted_points'] else best_atk
-
-            starters.append(selected_p)
-            remaining.remove(selected_p)
-            counts[selected_p['position']] += 1
-            team_counts[selected_p['team']] = team_counts.get(selected_p['team'], 0) + 1
-
-        # 3. Fill bench (remaining top players, applying team constraint)
-        remaining.sort(key=lambda x: x['predicted_points'], reverse=True)
-        bench = []
-        for p in remaining:
-            if len(bench) >= 4: break
-            if can_add_team(p['team']):
-                bench.append(p)
-                team_counts[p['team']] = team_counts.get(p['team'], 0) + 1
-        
-        # PERSIST: Save predictions for future feedback loop evaluation
-        # We save all 'processed' players who have features extracted
-        self.trainer.storage.save_predictions(next_gw, processed)
-        
-        return {"starters": starters, "bench": bench}
+    @tracing.traced("commander.select_squad")
+    def select_squad(self, processed: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Final Selection: 11 Starters (filtered by minutes) + 4 Bench from players ranked best first."""
+        return StarterSelector(self.params.defender_luxury_margin).select(processed)
 
+    @tracing.traced("commander.get_tier_captains")
     def get_tier_captains(self, squad: List[Dict]) -> Dict[str, Dict]:
         """Categorizes players into three distinct tiers across different teams."""
         if not squad:
             return {"obvious": {}, "joker": {}, "fun_one": {}, "weights": {}}
 
         # Explosivity Floor: A player must have >= 33 explosivity to be considered a captain
-        EXPLOSIVITY_FLOOR = 33
+        EXPLOSIVITY_FLOOR = self.params.explosivity_floor
         
         # Categorize candidates
         # Rule: Only MIDs (3) and FWDs (4) for Easy, Obvious, and Joker
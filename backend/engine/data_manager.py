@@ -1,37 +1,218 @@
 import requests
 import os
-from typing import Dict, List, Optional
+import json
+import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
 from functools import lru_cache
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from .http_cache import HTTPCache
+from .replay import archive_from_env
+from . import tracing
+
+# HTTP statuses worth retrying: throttling and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """Thread-safe per-host limiter that spaces requests at least 1/rate seconds apart."""
+
+    def __init__(self, requests_per_second: float):
+        self.min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str):
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
 
 class FPLDataManager:
     """Robust interface for the official FPL API."""
-    
+
     BASE_URL = "https://fantasy.premierleague.com/api"
-    
-    def __init__(self):
+
+    def __init__(self, base_url: Optional[str] = None, max_workers: int = 8,
+                 requests_per_second: float = 20.0, max_retries: int = 3,
+                 backoff_seconds: float = 0.5, timeout: float = 30.0,
+                 use_cache: bool = True, cache_path: Optional[str] = None):
+        self.base_url = (base_url or os.environ.get("FPL_API_URL") or self.BASE_URL).rstrip('/')
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+
+        # Size the connection pool to the worker count so threads don't queue on sockets
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Network statistics (requests, retries, failures) for throughput reporting
+        self.stats = Counter()
+        # Data-layer calls per endpoint, whether served from cache or network
+        self.calls = Counter()
+        self._stats_lock = threading.Lock()
+
+        # Record/replay archive (FPL_RECORD / FPL_REPLAY); replay mode never touches the network or cache
+        self.archive = archive_from_env()
+        self.replaying = self.archive is not None and self.archive.mode == 'r'
+
+        # Persistent response cache shared across runs (FPL_HTTP_CACHE=off disables it)
+        cache_path = cache_path or os.environ.get("FPL_HTTP_CACHE", "backend/data/http_cache.sqlite")
+        use_cache = use_cache and cache_path != "off" and not self.replaying
+        self.cache = HTTPCache(cache_path) if use_cache else None
+
+    def _count(self, key: str, n: int = 1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _get(self, path: str) -> Dict:
+        """GETs an API path from the replay archive, or via the cache/network (recording if enabled)."""
+        endpoint = path.split('/')[0]
+        with self._stats_lock:
+            self.calls[endpoint] += 1
+
+        with tracing.span(f"api.{endpoint}"):
+            if self.replaying:
+                return json.loads(self.archive.get(path))
+
+            body = self._get_body(path)
+            if self.archive is not None:
+                self.archive.put(path, body)
+            tracing.count("api.bytes", len(body))
+            return json.loads(body)
+
+    def _get_body(self, path: str) -> bytes:
+        """Raw response body through the disk cache, revalidating stale entries with ETag / Last-Modified."""
+        if self.cache is None:
+            return self._fetch(path).content
+
+        key = self._url(path)
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.is_fresh(path, entry):
+            self.cache.count("hits")
+            return entry.body
+
+        try:
+            response = self._fetch(path, headers=HTTPCache.conditional_headers(entry))
+        except requests.RequestException as e:
+            if entry is None or not self._is_outage(e):
+                raise
+            # Stale data beats no data when the API is down (a 4xx such as a removed element is a real answer)
+            print(f"⚠️ Serving stale cache for {path}: {e}")
+            self.cache.count("stale_served")
+            return entry.body
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.count("revalidated")
+            self.cache.touch(key)
+            return entry.body
+
+        self.cache.count("misses")
+        self.cache.store(key, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response.content
+
+    @staticmethod
+    def _is_outage(error: requests.RequestException) -> bool:
+        """Connection failures, timeouts and 5xx responses, as opposed to client errors."""
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        response = getattr(error, 'response', None)
+        return isinstance(error, requests.HTTPError) and response is not None and response.status_code >= 500
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _fetch(self, path: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """Network GET with per-host rate limiting and exponential-backoff retries."""
+        url = self._url(path)
+        host = urlparse(url).netloc
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait(host)
+            self._count("requests")
+            tracing.count("api.network_requests")
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    self._count("failures")
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    if response.status_code >= 400:
+                        self._count("failures")
+                    response.raise_for_status()
+                    return response
+                # Honour the server's Retry-After hint when throttled
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else self.backoff_seconds * (2 ** attempt)
+
+            self._count("retries")
+            time.sleep(delay)
 
     def get_bootstrap_static(self) -> Dict:
         """Fetches core game data (players, teams, events)."""
-        response = self.session.get(f"{self.BASE_URL}/bootstrap-static/")
-        response.raise_for_status()
-        return response.json()
+        return self._get("bootstrap-static/")
 
     def get_fixtures(self, event: Optional[int] = None) -> List[Dict]:
         """Fetches fixtures, optionally filtered by gameweek."""
-        url = f"{self.BASE_URL}/fixtures/"
+        path = "fixtures/"
         if event:
-            url += f"?event={event}"
-        response = self.session.get(url)
-        response.raise_for_status()
-        return response.json()
+            path += f"?event={event}"
+        return self._get(path)
 
     @lru_cache(maxsize=1000)
     def get_player_summary(self, player_id: int) -> Dict:
         """Fetches detailed history and upcoming fixtures for a player."""
-        response = self.session.get(f"{self.BASE_URL}/element-summary/{player_id}/")
-        response.raise_for_status()
-        return response.json()
+        return self._get(f"element-summary/{player_id}/")
+
+    @tracing.traced("api.player_summaries")
+    def get_player_summaries(self, player_ids: Iterable[int], max_workers: Optional[int] = None) -> Dict[int, Dict]:
+        """
+        Fetches many player summaries concurrently on a bounded thread pool.
+        Players whose fetch fails after retries are logged and omitted from the result.
+        """
+        ids = list(dict.fromkeys(player_ids))
+        if not ids:
+            return {}
+
+        workers = min(max_workers or self.max_workers, len(ids))
+        requests_before = self.stats["requests"]
+        start = time.perf_counter()
+
+        summaries = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # tracing.wrap nests each worker's api spans under this call
+            fetch = tracing.wrap(self.get_player_summary)
+            futures = {pool.submit(fetch, p_id): p_id for p_id in ids}
+            for future in as_completed(futures):
+                p_id = futures[future]
+                try:
+                    summaries[p_id] = future.result()
+                except Exception as e:
+                    print(f"⚠️ Summary fetch failed for player {p_id}: {e}")
+
+        elapsed = time.perf_counter() - start
+        network = self.stats["requests"] - requests_before
+        rate = len(summaries) / elapsed if elapsed > 0 else float('inf')
+        print(f"📡 Fetched {len(summaries)}/{len(ids)} player summaries in {elapsed:.2f}s "
+              f"({rate:.1f}/s, {network} requests, {workers} workers)")
+
+        return summaries
 
     def get_raw_xg_xa_data(self, player_id: int) -> List[Dict]:
         """Extracts historical xG and xA from player history."""
@@ -46,14 +227,16 @@ class FPLDataManager:
                 return event.get('id', 1)
         return 1
 
+    def get_finished_gameweeks(self, bootstrap_data: Dict) -> List[int]:
+        """Gameweeks whose matches are all played (`is_next` moves on at the deadline, before the current round ends)."""
+        return [e['id'] for e in bootstrap_data.get('events', []) if e.get('finished') or e.get('data_checked')]
+
     def get_actual_events(self, gameweek: int) -> Dict[int, Dict]:
         """Fetches detailed actual performance stats for all players in a specific gameweek using the Live API."""
         print(f"📡 Fetching live event data for GW{gameweek}...")
-        
-        response = self.session.get(f"{self.BASE_URL}/event/{gameweek}/live/")
-        response.raise_for_status()
-        data = response.json()
-        
+
+        data = self._get(f"event/{gameweek}/live/")
+
         actual_events = {}
         for item in data.get('elements', []):
             stats = item.get('stats', {})
@@ -68,7 +251,10 @@ class FPLDataManager:
                 "yellow_cards": int(stats.get('yellow_cards', 0)),
                 "red_cards": int(stats.get('red_cards', 0)),
                 "minutes": int(stats.get('minutes', 0)),
-                "defensive_contribution": int(stats.get('defensive_contribution', 0))
+                "defensive_contribution": int(stats.get('defensive_contribution', 0)),
+                "expected_goals": float(stats.get('expected_goals') or 0),
+                "expected_assists": float(stats.get('expected_assists') or 0),
+                "expected_goals_conceded": float(stats.get('expected_goals_conceded') or 0)
             }
-            
+
         return actual_events
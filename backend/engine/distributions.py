@@ -0,0 +1,193 @@
+import numpy as np
+from typing import Optional, Sequence, Union
+
+# FPL Points constants by element type (1=GKP, 2=DEF, 3=MID, 4=FWD)
+GOAL_VALS = {1: 6, 2: 6, 3: 5, 4: 4}
+CS_VALS = {1: 4, 2: 4, 3: 1, 4: 0}
+ASSIST_VALS = 3
+SAVE_VALS = 0.33 # 1 point per 3 saves
+APPEARANCE_POINTS = 2.0 # Baseline for starting
+
+# A haul is defined as 11+ points (User definition)
+HAUL_THRESHOLD = 11
+
+# Poisson tails beyond this mass are dropped in exact mode
+EXACT_TAIL_MASS = 1e-12
+
+
+class PointsDistribution:
+    """
+    Per-player distribution of FPL points, backed either by a Monte Carlo sample matrix
+    (n_players x n_sims) or by an exact PMF over a shared, sorted support.
+    """
+
+    def __init__(self, samples: Optional[np.ndarray] = None,
+                 support: Optional[np.ndarray] = None, pmf: Optional[np.ndarray] = None):
+        if (samples is None) == (pmf is None):
+            raise ValueError("Provide either samples or (support, pmf)")
+        self.samples = samples
+        self.support = support
+        self.pmf = pmf
+
+    @property
+    def is_exact(self) -> bool:
+        return self.pmf is not None
+
+    @property
+    def n_players(self) -> int:
+        return (self.pmf if self.is_exact else self.samples).shape[0]
+
+    def mean(self) -> np.ndarray:
+        if self.is_exact:
+            return self.pmf @ self.support
+        return self.samples.mean(axis=1)
+
+    def prob_at_least(self, k: Union[float, Sequence[float]]) -> np.ndarray:
+        """P(points >= k) per player; shape (n_players,) for scalar k, else (n_players, len(k))."""
+        thresholds = np.atleast_1d(np.asarray(k, dtype=float))
+        if self.is_exact:
+            # Survival function on the sorted support: mass at or above each threshold
+            tail = np.cumsum(self.pmf[:, ::-1], axis=1)[:, ::-1]
+            tail = np.concatenate([tail, np.zeros((self.n_players, 1))], axis=1)
+            idx = np.searchsorted(self.support, thresholds - 1e-9, side='left')
+            probs = np.clip(tail[:, idx], 0.0, 1.0)
+        else:
+            probs = (self.samples[:, :, None] >= thresholds).mean(axis=1)
+        return probs[:, 0] if np.ndim(k) == 0 else probs
+
+    def percentiles(self, q: Union[float, Sequence[float]]) -> np.ndarray:
+        """Inverted-CDF percentiles (0-100) per player, consistent between MC and exact modes."""
+        qs = np.atleast_1d(np.asarray(q, dtype=float))
+        if self.is_exact:
+            cdf = np.cumsum(self.pmf, axis=1)
+            idx = np.stack([(cdf >= (p / 100.0) - 1e-12).argmax(axis=1) for p in qs], axis=1)
+            values = self.support[idx]
+        else:
+            values = np.percentile(self.samples, qs, axis=1, method='inverted_cdf').T
+        return values[:, 0] if np.ndim(q) == 0 else values
+
+    def haul_probability(self) -> np.ndarray:
+        return self.prob_at_least(HAUL_THRESHOLD)
+
+    def combine(self, owners: Sequence[int], n_players: int) -> "PointsDistribution":
+        """Sums the rows of each owner (e.g. both fixtures of a double gameweek) into one row per player."""
+        if self.is_exact:
+            raise ValueError("Combining rows needs Monte Carlo samples")
+        samples = np.zeros((n_players, self.samples.shape[1]), dtype=self.samples.dtype)
+        np.add.at(samples, np.asarray(owners, dtype=int), self.samples)
+        return PointsDistribution(samples=samples)
+
+    @classmethod
+    def monte_carlo(cls, rates: dict, element_types: Sequence[int], n_sims: int = 1500,
+                    rng: Optional[np.random.Generator] = None) -> "PointsDistribution":
+        """Samples every player's points in one vectorized pass."""
+        rng = rng if rng is not None else np.random.default_rng()
+        goal_w, cs_w = _position_weights(element_types)
+        n = len(goal_w)
+
+        clean_sheets = rng.random((n, n_sims), dtype=np.float32) < rates['cs'][:, None]
+
+        points = np.full((n, n_sims), APPEARANCE_POINTS)
+        points += _sample_poisson(rng, rates['goals'], n_sims) * goal_w[:, None]
+        points += _sample_poisson(rng, rates['assists'], n_sims) * ASSIST_VALS
+        points += clean_sheets * cs_w[:, None]
+        points += _sample_poisson(rng, rates['saves'], n_sims) * SAVE_VALS
+        points += _sample_poisson(rng, rates['bonus'], n_sims)
+        points += _sample_poisson(rng, rates['defcon'], n_sims)
+        return cls(samples=points)
+
+    @classmethod
+    def exact(cls, rates: dict, element_types: Sequence[int]) -> "PointsDistribution":
+        """
+        Analytic distribution: convolves the Poisson/Bernoulli PMFs of every integer-valued event via FFT,
+        then combines with the (fractional) save points on a shared support.
+        """
+        goal_w, cs_w = _position_weights(element_types)
+        n = len(goal_w)
+        if n == 0:
+            # Empty pool: no rows, one support point so per-player queries return empty arrays
+            return cls(support=np.array([float(APPEARANCE_POINTS)]), pmf=np.zeros((0, 1)))
+
+        goals = _poisson_pmf(rates['goals'])
+        assists = _poisson_pmf(rates['assists'])
+        bonus = _poisson_pmf(rates['bonus'])
+        defcon = _poisson_pmf(rates['defcon'])
+        saves = _poisson_pmf(rates['saves'])
+
+        # Integer-point components placed on a common points grid
+        length = (goals.shape[1] - 1) * int(goal_w.max(initial=0)) + (assists.shape[1] - 1) * ASSIST_VALS \
+            + int(cs_w.max(initial=0)) + (bonus.shape[1] - 1) + (defcon.shape[1] - 1) + 1
+        nfft = 1 << int(np.ceil(np.log2(max(length, 2))))
+        spectrum = np.ones((n, nfft // 2 + 1), dtype=complex)
+        rows = np.arange(n)[:, None]
+
+        for pmf, weights in [(goals, goal_w), (assists, np.full(n, ASSIST_VALS))]:
+            grid = np.zeros((n, nfft))
+            grid[rows, np.arange(pmf.shape[1])[None, :] * weights[:, None].astype(int)] += pmf
+            spectrum *= np.fft.rfft(grid, axis=1)
+
+        p_cs = rates['cs']
+        grid = np.zeros((n, nfft))
+        grid[:, 0] += 1 - p_cs
+        grid[np.arange(n), cs_w.astype(int)] += p_cs
+        spectrum *= np.fft.rfft(grid, axis=1)
+
+        for pmf in (bonus, defcon):
+            grid = np.zeros((n, nfft))
+            grid[:, :pmf.shape[1]] = pmf
+            spectrum *= np.fft.rfft(grid, axis=1)
+
+        integer_pmf = np.clip(np.fft.irfft(spectrum, n=nfft, axis=1)[:, :length], 0.0, None)
+        integer_pmf /= integer_pmf.sum(axis=1, keepdims=True)
+
+        # Joint (integer points, saves) lattice -> flattened support shared by all players
+        values = (APPEARANCE_POINTS + np.arange(length))[:, None] + np.arange(saves.shape[1])[None, :] * SAVE_VALS
+        joint = (integer_pmf[:, :, None] * saves[:, None, :]).reshape(n, -1)
+        order = np.argsort(values.ravel(), kind='stable')
+        support = values.ravel()[order]
+        joint = joint[:, order]
+
+        # Drop support points no player can reach
+        keep = joint.max(axis=0) > 0
+        return cls(support=support[keep], pmf=joint[:, keep])
+
+
+def _position_weights(element_types: Sequence[int]):
+    e_types = np.asarray(element_types)
+    goal_w = np.array([GOAL_VALS.get(t, 4) for t in e_types], dtype=float)
+    cs_w = np.array([CS_VALS.get(t, 0) for t in e_types], dtype=float)
+    return goal_w, cs_w
+
+
+def _sample_poisson(rng: np.random.Generator, lam: np.ndarray, n_sims: int) -> np.ndarray:
+    """
+    Inverse-CDF Poisson sampling for a whole (n_players x n_sims) block from one float32 uniform draw.
+    FPL event rates are small, so a handful of vectorized comparisons beats per-element Poisson sampling.
+    """
+    cdf = np.cumsum(_poisson_pmf(lam), axis=1).astype(np.float32)
+    u = rng.random((len(cdf), n_sims), dtype=np.float32)
+    counts = np.zeros((len(cdf), n_sims), dtype=np.int16)
+    for k in range(cdf.shape[1] - 1):
+        step = cdf[:, k:k + 1]
+        if (step >= 1.0).all():
+            break
+        counts += u >= step
+    return counts
+
+
+def _poisson_pmf(lam: np.ndarray) -> np.ndarray:
+    """Poisson PMF matrix (n_players x k_max+1), truncated where the tail drops below EXACT_TAIL_MASS."""
+    lam = np.maximum(np.asarray(lam, dtype=float), 0)
+    lam_max = float(lam.max(initial=0))
+    k_max = int(np.ceil(lam_max + 12 * np.sqrt(lam_max) + 12))
+    k = np.arange(k_max + 1)
+    log_factorial = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, k_max + 1)))])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_pmf = k[None, :] * np.log(lam)[:, None] - lam[:, None] - log_factorial[None, :]
+    pmf = np.exp(log_pmf)
+    pmf[lam == 0] = 0.0
+    pmf[lam == 0, 0] = 1.0
+    pmf[pmf < EXACT_TAIL_MASS] = 0.0
+    last = int(np.nonzero(pmf.any(axis=0))[0].max(initial=0))
+    pmf = pmf[:, :last + 1]
+    return pmf / pmf.sum(axis=1, keepdims=True)
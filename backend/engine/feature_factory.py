@@ -1,6 +1,107 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, Mapping, NamedTuple, Optional, Union
+from . import tracing
+
+HAUL_POINTS = 10 # Double-digit returns count as a haul
+RECENT_WINDOW = 10 # Matches in the "recent form" haul window
+
+# Column order of prepare_features / prepare_features_batch output
+FEATURE_COLUMNS = [
+    'xG_90', 'xA_90', 'actual_goals_90', 'actual_assists_90', 'actual_cs_90',
+    'xGI_90', 'saves_90', 'bps_90', 'defcon_90',
+    'defcon', 'explosivity', 'form', 'ict_index',
+    'fixture_difficulty', 'selected_by', 'cost', 'hauls', 'opponent_vulnerability'
+]
+
+# Per-match fields kept in the long-format history frame
+HISTORY_COLUMNS = ['minutes', 'goals_scored', 'assists', 'clean_sheets', 'total_points']
+
+
+class HistoryAggregates(NamedTuple):
+    """Sums over a (possibly truncated) match history; everything the history-based features need."""
+    n_games: int = 0
+    minutes: float = 0
+    goals: float = 0
+    assists: float = 0
+    clean_sheets: float = 0
+    cs_games: int = 0
+    hauls: int = 0
+    recent_hauls: int = 0
+
+    @classmethod
+    def from_history(cls, history: Optional[List[Dict]]) -> "HistoryAggregates":
+        if not history:
+            return cls()
+        recent = history[-RECENT_WINDOW:] if len(history) >= RECENT_WINDOW else history
+        return cls(
+            n_games=len(history),
+            minutes=sum(m.get('minutes', 0) for m in history),
+            goals=sum(m.get('goals_scored', 0) for m in history),
+            assists=sum(m.get('assists', 0) for m in history),
+            clean_sheets=sum(m.get('clean_sheets', 0) for m in history),
+            cs_games=sum(1 for m in history if m.get('clean_sheets', 0) > 0),
+            hauls=sum(1 for m in history if m.get('total_points', 0) >= HAUL_POINTS),
+            recent_hauls=sum(1 for m in recent if m.get('total_points', 0) >= HAUL_POINTS),
+        )
+
+
+class PlayerHistoryIndex:
+    """
+    Prefix sums over one player's history, built once.
+    `upto(gw)` returns the aggregates of every match with round < gw in O(log n), identical to
+    re-scanning `[m for m in history if m['round'] < gw]`. Histories whose rounds are not
+    in order fall back to that scan.
+    """
+
+    def __init__(self, history: Optional[List[Dict]]):
+        self.history = history or []
+        self.rounds = [m.get('round', 0) for m in self.history]
+        self.monotonic = all(a <= b for a, b in zip(self.rounds, self.rounds[1:]))
+        self._by_round: Dict[int, Dict] = {}
+        for m in self.history:
+            self._by_round.setdefault(m.get('round', 0), m)
+
+        # Prefix sums accumulate left to right exactly like sum(), so results match bit for bit
+        self._minutes = list(accumulate((m.get('minutes', 0) for m in self.history), initial=0))
+        self._goals = list(accumulate((m.get('goals_scored', 0) for m in self.history), initial=0))
+        self._assists = list(accumulate((m.get('assists', 0) for m in self.history), initial=0))
+        self._clean_sheets = list(accumulate((m.get('clean_sheets', 0) for m in self.history), initial=0))
+        self._cs_games = list(accumulate((1 if m.get('clean_sheets', 0) > 0 else 0 for m in self.history), initial=0))
+        self._hauls = list(accumulate((1 if m.get('total_points', 0) >= HAUL_POINTS else 0 for m in self.history), initial=0))
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+    def entry(self, gw: int) -> Optional[Dict]:
+        """First history entry for a round (what `next(m for m in history if m['round'] == gw)` returns)."""
+        return self._by_round.get(gw)
+
+    def upto(self, gw: int) -> HistoryAggregates:
+        """Aggregates of all matches played before gameweek `gw`."""
+        if not self.monotonic:
+            return HistoryAggregates.from_history([m for m in self.history if m['round'] < gw])
+        return self._prefix(bisect_left(self.rounds, gw))
+
+    def full(self) -> HistoryAggregates:
+        return self._prefix(len(self.history))
+
+    def _prefix(self, k: int) -> HistoryAggregates:
+        if k == 0:
+            return HistoryAggregates()
+        return HistoryAggregates(
+            n_games=k,
+            minutes=self._minutes[k],
+            goals=self._goals[k],
+            assists=self._assists[k],
+            clean_sheets=self._clean_sheets[k],
+            cs_games=self._cs_games[k],
+            hauls=self._hauls[k],
+            recent_hauls=self._hauls[k] - self._hauls[max(0, k - RECENT_WINDOW)],
+        )
+
 
 class FeatureFactory:
     """Derives high-signal metrics for the FPL model."""
@@ -17,6 +118,11 @@ class FeatureFactory:
         Combines Historic Clean Sheet potential with attacking threat (xG/xA/xGI).
         Adjusted by Fixture Difficulty (FDR).
         """
+        return FeatureFactory.defcon_from_aggregates(player_row, HistoryAggregates.from_history(history), fdr)
+
+    @staticmethod
+    def defcon_from_aggregates(player_row: Dict, agg: HistoryAggregates, fdr: int) -> float:
+        """calculate_defcon on precomputed history aggregates."""
         # Element types: 1=GK, 2=DEF
         if player_row['element_type'] not in [1, 2]:
             return 0.0
@@ -28,9 +134,8 @@ class FeatureFactory:
         
         # Calculate Historic Clean Sheet Probability
         # If history exists, sum clean_sheets (usually 0 or 1) and divide by games
-        if history:
-            total_cs = sum(1 for m in history if m.get('clean_sheets', 0) > 0)
-            historic_cs_prob = total_cs / len(history)
+        if agg.n_games:
+            historic_cs_prob = agg.cs_games / agg.n_games
         else:
             historic_cs_prob = 0.0
 
@@ -58,18 +163,22 @@ class FeatureFactory:
         Includes "Super Hot" bonuses based on season phase.
         Adjusted by Fixture Difficulty (FDR).
         """
-        if not history:
+        return FeatureFactory.explosivity_from_aggregates(HistoryAggregates.from_history(history), current_gw, fdr, form, xgi_90)
+
+    @staticmethod
+    def explosivity_from_aggregates(agg: HistoryAggregates, current_gw: int, fdr: int, form: float = 0.0, xgi_90: float = 0.0) -> float:
+        """calculate_explosivity_index on precomputed history aggregates."""
+        if not agg.n_games:
             return 0.0
             
         # Count Double Digit Hauls
-        total_hauls = sum(1 for m in history if m.get('total_points', 0) >= 10)
+        total_hauls = agg.hauls
         
         # Recent Form: Last 10 games
-        recent_10 = history[-10:] if len(history) >= 10 else history
-        recent_10_hauls = sum(1 for m in recent_10 if m.get('total_points', 0) >= 10)
+        recent_10_hauls = agg.recent_hauls
         
         # Base Score (Max 40 pts)
-        frequency = total_hauls / len(history) if history else 0
+        frequency = total_hauls / agg.n_games
         hist_score = (frequency * 30) + (recent_10_hauls * 10) # Weighted to recent
         
         # 2. Performance Bonuses
@@ -104,8 +213,18 @@ class FeatureFactory:
         return min(round(score, 1), 100.0)
 
     @classmethod
+    @tracing.traced("features.prepare_features")
     def prepare_features(cls, player_data: Dict, history: List[Dict], next_fixture_diff: int, current_gw: int, opponent_vulnerability: float = 0.0) -> Dict:
         """Assembles a full feature vector for the XGBoost model."""
+        return cls.prepare_features_from_aggregates(player_data, HistoryAggregates.from_history(history), next_fixture_diff, current_gw, opponent_vulnerability)
+
+    @classmethod
+    def prepare_features_at(cls, player_data: Dict, index: PlayerHistoryIndex, cutoff_gw: int, next_fixture_diff: int, current_gw: int, opponent_vulnerability: float = 0.0) -> Dict:
+        """prepare_features on the history before `cutoff_gw`, without re-scanning it."""
+        return cls.prepare_features_from_aggregates(player_data, index.upto(cutoff_gw), next_fixture_diff, current_gw, opponent_vulnerability)
+
+    @classmethod
+    def prepare_features_from_aggregates(cls, player_data: Dict, agg: HistoryAggregates, next_fixture_diff: int, current_gw: int, opponent_vulnerability: float = 0.0) -> Dict:
         xg_90 = float(player_data.get('expected_goals_per_90', 0))
         xa_90 = float(player_data.get('expected_assists_per_90', 0))
         saves_90 = float(player_data.get('saves_per_90', 0))
@@ -118,13 +237,13 @@ class FeatureFactory:
         defcon_90 = float(player_data.get('defensive_contribution_per_90', 0))
         
         # Calculate actual seasonal delivery per 90 from history (avoids leakage)
-        past_mins = sum(m.get('minutes', 0) for m in history) if history else 0
-        actual_goals_90 = (sum(m.get('goals_scored', 0) for m in history) / (past_mins / 90)) if past_mins > 0 else 0
-        actual_assists_90 = (sum(m.get('assists', 0) for m in history) / (past_mins / 90)) if past_mins > 0 else 0
-        actual_cs_90 = (sum(m.get('clean_sheets', 0) for m in history) / (past_mins / 90)) if past_mins > 0 else 0
+        past_mins = agg.minutes
+        actual_goals_90 = (agg.goals / (past_mins / 90)) if past_mins > 0 else 0
+        actual_assists_90 = (agg.assists / (past_mins / 90)) if past_mins > 0 else 0
+        actual_cs_90 = (agg.clean_sheets / (past_mins / 90)) if past_mins > 0 else 0
         
         # Explicitly count total seasonal hauls
-        hauls = sum(1 for m in history if m.get('total_points', 0) >= 10) if history else 0
+        hauls = agg.hauls
         
         xgi_90 = cls.calculate_xgi(xg_90, xa_90)
         return {
@@ -137,8 +256,8 @@ class FeatureFactory:
             "saves_90": saves_90,
             "bps_90": bps_90,
             "defcon_90": defcon_90,
-            "defcon": cls.calculate_defcon(player_data, history, next_fixture_diff),
-            "explosivity": cls.calculate_explosivity_index(history, current_gw, next_fixture_diff, float(player_data.get('form', 0)), xgi_90),
+            "defcon": cls.defcon_from_aggregates(player_data, agg, next_fixture_diff),
+            "explosivity": cls.explosivity_from_aggregates(agg, current_gw, next_fixture_diff, float(player_data.get('form', 0)), xgi_90),
             "form": float(player_data.get('form', 0)),
             "ict_index": float(player_data.get('ict_index', 0)),
             "fixture_difficulty": next_fixture_diff,
@@ -149,3 +268,140 @@ class FeatureFactory:
             # to maintain compatibility with model weights until fully re-trained.
             "opponent_vulnerability": opponent_vulnerability * 25.0 
         }
+
+    # --- Batch API (DataFrame in, DataFrame out) ---
+
+    @staticmethod
+    @tracing.traced("features.history_frame")
+    def history_frame(summaries: Mapping[int, Dict]) -> pd.DataFrame:
+        """Long-format history (one row per player-match, original order kept) from element-summary payloads."""
+        histories = [(pid, summary.get('history', [])) for pid, summary in summaries.items()]
+        matches = [m for _, history in histories for m in history]
+        columns = {
+            'player_id': np.repeat([pid for pid, _ in histories], [len(h) for _, h in histories]).astype(np.int64),
+            'round': np.array([m.get('round', 0) for m in matches], dtype=np.int64),
+        }
+        for col in HISTORY_COLUMNS:
+            columns[col] = np.array([m.get(col, 0) for m in matches])
+        return pd.DataFrame(columns)
+
+    @staticmethod
+    @tracing.traced("features.history_aggregates")
+    def history_aggregates(history_df: pd.DataFrame, cutoff_gw: Optional[int] = None) -> pd.DataFrame:
+        """Per-player HistoryAggregates as a frame indexed by player_id (matches with round < cutoff_gw only, if given)."""
+        if cutoff_gw is not None:
+            history_df = history_df[history_df['round'] < cutoff_gw]
+
+        codes, player_ids = pd.factorize(history_df['player_id'], sort=False)
+        n_players = len(player_ids)
+        n_games = np.bincount(codes, minlength=n_players)
+
+        # Matches counted from each player's most recent one (0 = latest), for the recent-haul window
+        order = np.argsort(codes, kind='stable')
+        starts = np.concatenate([[0], np.cumsum(n_games)[:-1]])
+        from_end = np.empty(len(codes), dtype=np.int64)
+        from_end[order] = n_games[codes[order]] - 1 - (np.arange(len(codes)) - starts[codes[order]])
+
+        def total(values) -> np.ndarray:
+            return np.bincount(codes, weights=np.asarray(values, dtype=float), minlength=n_players)
+
+        is_haul = history_df['total_points'].to_numpy() >= HAUL_POINTS
+        clean_sheets = history_df['clean_sheets'].to_numpy()
+        return pd.DataFrame({
+            'n_games': n_games,
+            'minutes': total(history_df['minutes']),
+            'goals': total(history_df['goals_scored']),
+            'assists': total(history_df['assists']),
+            'clean_sheets': total(clean_sheets),
+            'cs_games': total(clean_sheets > 0),
+            'hauls': total(is_haul),
+            'recent_hauls': total(is_haul & (from_end < RECENT_WINDOW)),
+        }, index=pd.Index(player_ids, name='player_id'))
+
+    @classmethod
+    @tracing.traced("features.prepare_features_batch")
+    def prepare_features_batch(cls, elements_df: pd.DataFrame, history_df: pd.DataFrame,
+                               fixture_difficulty: Union[int, pd.Series, np.ndarray] = 3, current_gw: int = 1,
+                               opponent_vulnerability: Union[float, pd.Series, np.ndarray] = 0.0,
+                               cutoff_gw: Optional[int] = None) -> pd.DataFrame:
+        """
+        Vectorized prepare_features for a whole bootstrap `elements` table.
+        `fixture_difficulty` and `opponent_vulnerability` are scalars or per-row values aligned with `elements_df`.
+        Returns one row per element (indexed by player id) with FEATURE_COLUMNS, matching prepare_features.
+        """
+        def num(col: str) -> np.ndarray:
+            if col not in elements_df:
+                return np.zeros(len(elements_df))
+            try:
+                values = elements_df[col].to_numpy(dtype=float) # API strings like "0.45" parse directly
+            except (TypeError, ValueError):
+                values = pd.to_numeric(elements_df[col], errors='coerce').to_numpy(dtype=float)
+            return np.nan_to_num(values, nan=0.0)
+
+        def per_row(values, dtype=float) -> np.ndarray:
+            if isinstance(values, pd.Series):
+                values = values.to_numpy()
+            return np.broadcast_to(np.asarray(values, dtype=dtype), (len(elements_df),))
+
+        ids = elements_df['id'].to_numpy()
+        agg = cls.history_aggregates(history_df, cutoff_gw).reindex(ids).fillna(0)
+        n_games = agg['n_games'].to_numpy(dtype=float)
+        fdr = per_row(fixture_difficulty)
+
+        xg_90, xa_90 = num('expected_goals_per_90'), num('expected_assists_per_90')
+        xgi_90 = xg_90 + xa_90
+        form = num('form')
+        mins, total_bps = num('minutes'), num('bps')
+        defensive_action = num('defensive_contribution_per_90')
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bps_90 = np.where(mins > 0, total_bps / (mins / 90), 0.0)
+            past_mins = agg['minutes'].to_numpy(dtype=float)
+            per_90 = {
+                col: np.where(past_mins > 0, agg[col].to_numpy(dtype=float) / (past_mins / 90), 0.0)
+                for col in ('goals', 'assists', 'clean_sheets')
+            }
+            historic_cs_prob = np.where(n_games > 0, agg['cs_games'].to_numpy(dtype=float) / n_games, 0.0)
+            haul_frequency = np.where(n_games > 0, agg['hauls'].to_numpy(dtype=float) / n_games, 0.0)
+
+        # Defcon (GK/DEF only), same FDR multipliers as calculate_defcon
+        defcon_fdr = np.select([fdr <= 2, fdr == 4, fdr >= 5], [1.15, 0.85, 0.7], default=1.0)
+        attacking_threat = (xg_90 * 1.5) + (xa_90 * 1.2)
+        defcon_score = ((historic_cs_prob * 60) * defcon_fdr) + (defensive_action * 4.0) + (attacking_threat * 400)
+        is_defender = np.isin(elements_df['element_type'].to_numpy(), [1, 2])
+        defcon = np.where(is_defender, np.minimum(_round1(defcon_score), 100.0), 0.0)
+
+        # Explosivity, same thresholds as calculate_explosivity_index
+        hauls = agg['hauls'].to_numpy(dtype=float)
+        recent_hauls = agg['recent_hauls'].to_numpy(dtype=float)
+        is_super_hot = (recent_hauls >= 5) | ((hauls >= 5) if current_gw <= 20 else (hauls >= 10))
+        score = (haul_frequency * 30) + (recent_hauls * 10) \
+            + np.where(form >= 7.5, 15.0, 0.0) + np.where(xgi_90 >= 0.70, 15.0, 0.0) + np.where(is_super_hot, 25.0, 0.0)
+        score = score * np.select([fdr <= 2, fdr >= 5], [1.10, 0.90], default=1.0)
+        explosivity = np.where(n_games > 0, np.minimum(_round1(score), 100.0), 0.0)
+
+        return pd.DataFrame({
+            "xG_90": xg_90,
+            "xA_90": xa_90,
+            "actual_goals_90": per_90['goals'],
+            "actual_assists_90": per_90['assists'],
+            "actual_cs_90": per_90['clean_sheets'],
+            "xGI_90": xgi_90,
+            "saves_90": num('saves_per_90'),
+            "bps_90": bps_90,
+            "defcon_90": defensive_action,
+            "defcon": defcon,
+            "explosivity": explosivity,
+            "form": form,
+            "ict_index": num('ict_index'),
+            "fixture_difficulty": per_row(fixture_difficulty, dtype=None),
+            "selected_by": num('selected_by_percent'),
+            "cost": num('now_cost') / 10.0,
+            "hauls": hauls.astype(np.int64),
+            "opponent_vulnerability": per_row(opponent_vulnerability) * 25.0
+        }, index=pd.Index(ids, name='id'))
+
+
+def _round1(values: np.ndarray) -> np.ndarray:
+    """Python's round(x, 1) elementwise; np.round can differ on ties, and these arrays are small."""
+    return np.fromiter((round(v, 1) for v in values.tolist()), dtype=float, count=len(values))
@@ -0,0 +1,51 @@
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+
+class TeamFixture(NamedTuple):
+    """One fixture seen from one team's side."""
+    fixture_id: int
+    gameweek: int
+    opponent: int
+    is_home: bool
+    difficulty: int
+
+    @property
+    def venue(self) -> str:
+        return "(H)" if self.is_home else "(A)"
+
+
+class FixtureIndex:
+    """
+    (team, gameweek) -> that team's fixtures in kickoff order, built once from get_fixtures().
+    A blank gameweek is an empty tuple and a double gameweek has two entries; unscheduled fixtures are skipped.
+    """
+
+    def __init__(self, fixtures: Iterable[Dict]):
+        index: Dict[Tuple[int, int], List[TeamFixture]] = {}
+        ordered = sorted((f for f in fixtures if f.get('event')), key=lambda f: (f.get('kickoff_time') or '', f['id']))
+        for f in ordered:
+            gw = f['event']
+            index.setdefault((f['team_h'], gw), []).append(TeamFixture(f['id'], gw, f['team_a'], True, f['team_h_difficulty']))
+            index.setdefault((f['team_a'], gw), []).append(TeamFixture(f['id'], gw, f['team_h'], False, f['team_a_difficulty']))
+        self._index = {key: tuple(v) for key, v in index.items()}
+
+        self._by_gameweek: Dict[int, Dict[int, Tuple[TeamFixture, ...]]] = {}
+        for (team, gw), team_fixtures in self._index.items():
+            self._by_gameweek.setdefault(gw, {})[team] = team_fixtures
+
+    def get(self, team: int, gameweek: int) -> Tuple[TeamFixture, ...]:
+        return self._index.get((team, gameweek), ())
+
+    def gameweek(self, gameweek: int) -> Mapping[int, Tuple[TeamFixture, ...]]:
+        """Every team playing in the gameweek; teams with a blank are absent."""
+        return self._by_gameweek.get(gameweek, {})
+
+    @property
+    def last_gameweek(self) -> Optional[int]:
+        return max(self._by_gameweek, default=None)
+
+    @staticmethod
+    def label(team_fixtures: Iterable[TeamFixture], short_names: Mapping[int, str]) -> str:
+        """Display string such as "ARS (H)", "ARS (H) + CHE (A)" for a double, or "BLANK"."""
+        parts = [f"{short_names.get(f.opponent, '???')} {f.venue}" for f in team_fixtures]
+        return " + ".join(parts) if parts else "BLANK"
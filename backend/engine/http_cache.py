@@ -0,0 +1,112 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, NamedTuple, Optional
+
+# Default freshness windows (seconds) by API path prefix. Stale entries are revalidated
+# with ETag / Last-Modified, so a longer TTL only trades freshness for round-trips.
+DEFAULT_TTLS = {
+    "bootstrap-static": 30 * 60,
+    "fixtures": 6 * 3600,
+    "element-summary": 12 * 3600,
+    "event": 60 * 60,
+}
+FALLBACK_TTL = 15 * 60
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class HTTPCache:
+    """
+    Persistent SQLite response cache for the FPL API, keyed by full request URL so responses from
+    different hosts (FPL_API_URL mirrors or stubs) never mix; TTLs are chosen by endpoint path.
+    """
+
+    def __init__(self, path: str = "backend/data/http_cache.sqlite", ttls: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # One shared connection guarded by a lock; WAL lets concurrent cron jobs read while one writes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def ttl_for(self, path: str) -> int:
+        """Returns the TTL of the longest matching endpoint prefix."""
+        endpoint = path.lstrip('/')
+        matches = [prefix for prefix in self.ttls if endpoint.startswith(prefix)]
+        return self.ttls[max(matches, key=len)] if matches else FALLBACK_TTL
+
+    def count(self, event: str):
+        with self._stats_lock:
+            self.stats[event] += 1
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at = row
+        return CachedResponse(zlib.decompress(body), etag, last_modified, fetched_at)
+
+    def is_fresh(self, path: str, entry: CachedResponse) -> bool:
+        return (time.time() - entry.fetched_at) < self.ttl_for(path)
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CachedResponse]) -> Dict[str, str]:
+        """Validators for a conditional GET against a stale entry."""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, key: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (key, zlib.compress(body), etag, last_modified, time.time())
+            )
+
+    def touch(self, key: str):
+        """Marks an entry fresh again after a 304 Not Modified."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), key))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def summary(self) -> str:
+        s = self.stats
+        lookups = s['hits'] + s['revalidated'] + s['misses']
+        hit_rate = (s['hits'] + s['revalidated']) / lookups if lookups else 0.0
+        return (f"🗄️  HTTP cache: {s['hits']} fresh hits, {s['revalidated']} revalidated (304), "
+                f"{s['misses']} misses, {s['stale_served']} stale fallbacks ({hit_rate:.0%} served from disk)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
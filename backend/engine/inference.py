@@ -0,0 +1,107 @@
+import time
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+from .commander import EngineCommander
+
+# Dashboards kept in memory; older (gameweek, model version) keys are dropped first
+MAX_CACHED_RESULTS = 4
+
+CacheKey = Tuple[int, str] # (gameweek, model version)
+
+
+class InferenceService:
+    """
+    Long-lived inference for the API: models stay in memory (trainer.load_model only re-reads changed files),
+    dashboards are memoized per (gameweek, model version), and concurrent requests for a key that is still
+    being computed wait for that one computation instead of starting their own.
+    """
+
+    def __init__(self, commander: EngineCommander, max_results: int = MAX_CACHED_RESULTS):
+        self.commander = commander
+        self.max_results = max_results
+        self._results: Dict[CacheKey, Dict] = {}
+        self._inflight: Dict[CacheKey, Future] = {}
+        self._lock = threading.Lock()
+        self._gameweek: Optional[int] = None
+        # Bumped by invalidate(); results computed under an older generation are returned but not memoized
+        self._generation = 0
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def current_key(self) -> CacheKey:
+        """Next gameweek (from the cached bootstrap) and the model version after a hot-reload check."""
+        dm = self.commander.dm
+        gameweek = dm.get_upcoming_gameweek(dm.get_bootstrap_static())
+        return gameweek, self.commander.trainer.load_model()
+
+    def dashboard(self) -> Dict:
+        """Squad, bench and captain picks for the next gameweek."""
+        key = self.current_key()
+        return self._single_flight(key, lambda: self._compute_dashboard(key[0]))
+
+    def invalidate(self):
+        """Drops memoized results (e.g. after feedback changed confidence scores without new model files)."""
+        with self._lock:
+            self._generation += 1
+            self._results.clear()
+            # Later requests start a fresh computation instead of waiting on one that predates the change
+            self._inflight.clear()
+
+    def _compute_dashboard(self, gameweek: int) -> Dict:
+        start = time.perf_counter()
+        if gameweek != self._gameweek:
+            # Player summaries are lru-cached per process; a new gameweek needs fresh histories
+            type(self.commander.dm).get_player_summary.cache_clear()
+            self._gameweek = gameweek
+        snapshot = self.commander.build_snapshot()
+        data = self.commander.get_top_15_players(snapshot)
+        starters, bench = data['starters'], data['bench']
+        return {
+            "gameweek": snapshot.next_gameweek,
+            "model_version": self.commander.trainer.model_version,
+            "squad": starters,
+            "bench": bench,
+            "recommendations": self.commander.get_tier_captains(starters + bench),
+            "compute_time": round(time.perf_counter() - start, 3),
+        }
+
+    def _single_flight(self, key: CacheKey, compute: Callable[[], Dict]) -> Dict:
+        with self._lock:
+            if key in self._results:
+                self.stats["hits"] += 1
+                return self._results[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            generation = self._generation
+            if owner:
+                future = self._inflight[key] = Future()
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = compute()
+        except Exception as e:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if generation == self._generation:
+                self._results[key] = result
+                while len(self._results) > self.max_results:
+                    self._results.pop(next(iter(self._results)))
+        future.set_result(result)
+        return result
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {"model_version": self.commander.trainer.model_version,
+                    "cached": [list(key) for key in self._results], **self.stats}
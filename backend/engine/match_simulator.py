@@ -0,0 +1,145 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from .distributions import (PointsDistribution, ASSIST_VALS, SAVE_VALS, APPEARANCE_POINTS, HAUL_THRESHOLD,
+                            _position_weights, _sample_poisson)
+
+# Goals per match for a side we know nothing about (no opponent defenders in the pool, no vulnerability score)
+DEFAULT_TEAM_GOALS = 1.4
+# Clean-sheet probabilities are clipped before turning them into a conceded-goals rate
+CS_CLIP = (0.02, 0.95)
+
+Side = Tuple[int, int] # (match id, team id)
+
+
+def team_goal_rates(rates: Dict[str, np.ndarray], element_types: Sequence[int], match_ids: Sequence[int],
+                    teams: Sequence[int], opponents: Sequence[int],
+                    base_rates: Optional[Dict[Side, float]] = None) -> Dict[Side, float]:
+    """
+    Expected goals for every (match, team) side in the entries.
+    The base is `base_rates` (e.g. opponent vulnerability) or, failing that, the rate implied by the opponent
+    defenders' mean clean-sheet probability. It is then raised so it covers the side's summed player goal and
+    assist rates, which keeps every player's expected goals/assists equal to the model's.
+    """
+    match_ids, teams, opponents = np.asarray(match_ids), np.asarray(teams), np.asarray(opponents)
+    defenders = np.isin(np.asarray(element_types), (1, 2))
+
+    goals, assists, cs = {}, {}, {}
+    for i, side in enumerate(zip(match_ids.tolist(), teams.tolist())):
+        goals[side] = goals.get(side, 0.0) + float(rates['goals'][i])
+        assists[side] = assists.get(side, 0.0) + float(rates['assists'][i])
+        if defenders[i]:
+            cs.setdefault(side, []).append(float(rates['cs'][i]))
+
+    result = {}
+    for match_id, team, opponent in set(zip(match_ids.tolist(), teams.tolist(), opponents.tolist())):
+        for side, against in (((match_id, team), (match_id, opponent)), ((match_id, opponent), (match_id, team))):
+            if side in result:
+                continue
+            if base_rates and side in base_rates:
+                base = base_rates[side]
+            elif against in cs:
+                base = -np.log(np.clip(np.mean(cs[against]), *CS_CLIP))
+            else:
+                base = DEFAULT_TEAM_GOALS
+            result[side] = max(base, goals.get(side, 0.0), assists.get(side, 0.0))
+    return result
+
+
+class MatchSimulator:
+    """
+    Joint, team-level simulation of FPL points.
+    Each side of each fixture draws its goals once; the goals (and one potential assist per goal) are split
+    among that side's players by their share of the team rate, and a clean sheet is the opponent scoring zero.
+    Teammates are therefore correlated, a team's GK and defenders share one clean-sheet event, and a player in a
+    double gameweek appears once per fixture. Saves, bonus and defcon stay independent per player.
+    """
+
+    def __init__(self, n_sims: int = 1500, rng: Optional[np.random.Generator] = None):
+        self.n_sims = n_sims
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def simulate(self, rates: Dict[str, np.ndarray], element_types: Sequence[int], match_ids: Sequence[int],
+                 teams: Sequence[int], opponents: Sequence[int],
+                 goal_rates: Optional[Dict[Side, float]] = None) -> PointsDistribution:
+        """Points samples (n_entries x n_sims), one entry per (player, fixture); `rates` as in trainer._event_rates."""
+        n = len(element_types)
+        if n == 0:
+            return PointsDistribution(samples=np.zeros((0, self.n_sims)))
+        goal_rates = goal_rates or team_goal_rates(rates, element_types, match_ids, teams, opponents)
+
+        # 1. Index sides: every entry's own side and the side it is playing against
+        own = list(zip(np.asarray(match_ids).tolist(), np.asarray(teams).tolist()))
+        against = list(zip(np.asarray(match_ids).tolist(), np.asarray(opponents).tolist()))
+        sides = list(dict.fromkeys(own + against))
+        side_index = {side: i for i, side in enumerate(sides)}
+        own_idx = np.array([side_index[s] for s in own])
+        against_idx = np.array([side_index[s] for s in against])
+        lam = np.array([goal_rates.get(side, DEFAULT_TEAM_GOALS) for side in sides])
+
+        # 2. Team goals for every side x simulation, then per-player goals/assists by sequential binomial splits
+        team_goals = self.rng.poisson(lam[:, None], size=(len(sides), self.n_sims))
+        goals = self._allocate(team_goals, own_idx, np.asarray(rates['goals'], dtype=float) / lam[own_idx])
+        assists = self._allocate(team_goals, own_idx, np.asarray(rates['assists'], dtype=float) / lam[own_idx])
+        clean_sheet = team_goals[against_idx] == 0
+
+        # 3. Points, with the same scoring as PointsDistribution.monte_carlo
+        goal_w, cs_w = _position_weights(element_types)
+        points = np.full((n, self.n_sims), APPEARANCE_POINTS)
+        points += goals * goal_w[:, None]
+        points += assists * ASSIST_VALS
+        points += clean_sheet * cs_w[:, None]
+        points += _sample_poisson(self.rng, rates['saves'], self.n_sims) * SAVE_VALS
+        points += _sample_poisson(self.rng, rates['bonus'], self.n_sims)
+        points += _sample_poisson(self.rng, rates['defcon'], self.n_sims)
+        return PointsDistribution(samples=points)
+
+    def _allocate(self, team_events: np.ndarray, side: np.ndarray, shares: np.ndarray) -> np.ndarray:
+        """
+        Multinomial split of each side's events among its entries (the leftover share goes to players not simulated).
+        Done as a chain of binomials over the k-th entry of every side at once, so the loop runs once per squad slot.
+        """
+        counts = np.zeros((len(side), team_events.shape[1]), dtype=np.int64)
+        remaining = team_events.copy()
+        remaining_share = np.ones(len(team_events))
+        rank = np.zeros(len(side), dtype=int)
+        seen = {}
+        for i, s in enumerate(side.tolist()):
+            rank[i] = seen.get(s, 0)
+            seen[s] = rank[i] + 1
+
+        for k in range(int(rank.max()) + 1):
+            entries = np.nonzero(rank == k)[0]
+            sides = side[entries]
+            p = np.clip(shares[entries] / np.maximum(remaining_share[sides], 1e-12), 0.0, 1.0)
+            draw = self.rng.binomial(remaining[sides], p[:, None])
+            counts[entries] = draw
+            remaining[sides] -= draw
+            remaining_share[sides] -= shares[entries]
+        return counts
+
+
+def squad_total(samples: np.ndarray, starting: Sequence[int], captain: int) -> np.ndarray:
+    """Joint distribution (n_sims,) of a lineup's points: starters plus the captain counted twice."""
+    return samples[list(starting)].sum(axis=0) + samples[captain]
+
+
+def captaincy_report(samples: np.ndarray, starting: Sequence[int], names: Optional[Sequence[str]] = None) -> List[Dict]:
+    """
+    Squad-total distribution for each possible captain in the XI, best mean first.
+    With joint samples a captain from a team the XI is stacked on raises the variance as well as the mean.
+    """
+    base = samples[list(starting)].sum(axis=0)
+    report = []
+    for row in starting:
+        total = base + samples[row]
+        p10, p90 = np.percentile(total, [10, 90])
+        report.append({
+            "row": row,
+            "name": names[row] if names is not None else str(row),
+            "mean": round(float(total.mean()), 2),
+            "std": round(float(total.std()), 2),
+            "p10": round(float(p10), 2),
+            "p90": round(float(p90), 2),
+            "captain_haul_prob": round(float((samples[row] >= HAUL_THRESHOLD).mean()), 3),
+        })
+    return sorted(report, key=lambda r: -r['mean'])
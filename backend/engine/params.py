@@ -0,0 +1,88 @@
+import hashlib
+import numpy as np
+from dataclasses import dataclass, asdict, field, fields, replace
+from typing import Dict, Optional, Tuple
+
+# What a parameter changes: "model" needs the heads refit; "post" only re-scores the model's cached event predictions
+MODEL_STAGE = "model"
+POST_STAGE = "post"
+
+
+def _param(default, stage: str, low=None, high=None):
+    """A tunable constant with its stage and (for random sweeps) its search range."""
+    return field(default=default, metadata={"stage": stage, "range": (low, high) if low is not None else None})
+
+
+@dataclass(frozen=True)
+class EngineParams:
+    """
+    The engine's hand-tuned constants in one place, so sweeps can vary them.
+    The defaults are the values the engine has always used.
+    """
+    # XGBoost heads
+    n_estimators: int = _param(50, MODEL_STAGE, 25, 200)
+    max_depth: int = _param(4, MODEL_STAGE, 2, 8)
+    learning_rate: float = _param(0.1, MODEL_STAGE, 0.03, 0.3)
+
+    # Brave mode: xP leak against leaky defenses, haul-simulation boost for the same fixtures
+    brave_leak: float = _param(1.05, POST_STAGE, 1.0, 1.15)
+    matchup_boost: float = _param(1.10, POST_STAGE, 1.0, 1.25)
+    # Clinicality: haul-multiplier slope over the haul frequency, capped at clinicality_cap
+    clinicality_slope: float = _param(0.375, POST_STAGE, 0.0, 0.75)
+    clinicality_cap: float = _param(0.4, POST_STAGE, 0.2, 0.6)
+    # A 4th+ defender must beat the best attacker by this many points
+    defender_luxury_margin: float = _param(0.8, POST_STAGE, 0.0, 2.0)
+    # Minimum explosivity for captain candidates
+    explosivity_floor: float = _param(33.0, POST_STAGE, 15.0, 50.0)
+
+    # Stability Sentinel (feedback loop): confidence learning rate and its noise gate
+    base_lr: float = _param(0.05, POST_STAGE, 0.01, 0.15)
+    noise_gate_high: float = _param(3.0, POST_STAGE, 2.5, 4.0)
+    noise_gate_low: float = _param(2.5, POST_STAGE, 1.5, 3.0)
+    noise_damping_high: float = _param(0.2, POST_STAGE, 0.0, 0.5)
+    noise_damping_low: float = _param(0.5, POST_STAGE, 0.2, 1.0)
+
+    @classmethod
+    def names(cls, stage: Optional[str] = None) -> Tuple[str, ...]:
+        return tuple(f.name for f in fields(cls) if stage is None or f.metadata["stage"] == stage)
+
+    @classmethod
+    def search_space(cls) -> Dict[str, Tuple]:
+        return {f.name: f.metadata["range"] for f in fields(cls) if f.metadata["range"]}
+
+    @classmethod
+    def sample(cls, rng: np.random.Generator, names: Optional[Tuple[str, ...]] = None) -> "EngineParams":
+        """Uniform draw over the search space of `names` (default: every parameter); the rest keep their defaults."""
+        types = {f.name: f.type for f in fields(cls)}
+        values = {}
+        for name, (low, high) in cls.search_space().items():
+            if names is not None and name not in names:
+                continue
+            if types[name] is int:
+                values[name] = int(rng.integers(low, high + 1))
+            else:
+                values[name] = round(float(rng.uniform(low, high)), 3)
+        return cls(**values)
+
+    def with_values(self, **values) -> "EngineParams":
+        unknown = set(values) - set(self.names())
+        if unknown:
+            raise ValueError(f"Unknown engine parameter(s): {', '.join(sorted(unknown))}")
+        types = {f.name: f.type for f in fields(self)}
+        return replace(self, **{k: (int(v) if types[k] is int else float(v)) for k, v in values.items()})
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def changed(self) -> Dict:
+        """Only the values that differ from the defaults (for compact labels)."""
+        defaults = EngineParams()
+        return {k: v for k, v in self.to_dict().items() if getattr(defaults, k) != v}
+
+    def model_key(self) -> str:
+        """Id of the model-stage values: variants sharing it can reuse each other's event predictions."""
+        model = {name: getattr(self, name) for name in self.names(MODEL_STAGE)}
+        return hashlib.sha1(repr(sorted(model.items())).encode()).hexdigest()[:12]
+
+
+DEFAULT_PARAMS = EngineParams()
@@ -0,0 +1,110 @@
+import os
+import atexit
+import zipfile
+import argparse
+import threading
+from typing import Dict, Optional
+
+# Environment switches read by every FPLDataManager in the process
+RECORD_ENV = "FPL_RECORD"
+REPLAY_ENV = "FPL_REPLAY"
+
+
+class ReplayMissError(LookupError):
+    """Raised when a replayed run requests an endpoint that was never recorded."""
+
+
+class ReplayArchive:
+    """Compact zip archive of raw FPL API responses keyed by endpoint path."""
+
+    def __init__(self, path: str, mode: str = 'r'):
+        if mode not in ('r', 'w'):
+            raise ValueError(f"Unsupported archive mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+
+        if mode == 'w':
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+        self._zip = zipfile.ZipFile(path, mode, compression=zipfile.ZIP_DEFLATED)
+        self._keys = set(self._zip.namelist())
+        atexit.register(self.close)
+
+    @staticmethod
+    def _member(key: str) -> str:
+        return key.strip('/') + '.json'
+
+    def __contains__(self, key: str) -> bool:
+        return self._member(key) in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, key: str) -> bytes:
+        member = self._member(key)
+        if member not in self._keys:
+            raise ReplayMissError(f"'{key}' is not in replay archive {self.path}")
+        with self._lock:
+            return self._zip.read(member)
+
+    def put(self, key: str, body: bytes):
+        """Records a response body; the first response per endpoint wins."""
+        member = self._member(key)
+        with self._lock:
+            if member in self._keys or self._zip.fp is None:
+                return
+            self._zip.writestr(member, body)
+            self._keys.add(member)
+
+    def close(self):
+        with self._lock:
+            if self._zip.fp is not None:
+                self._zip.close()
+
+
+# One shared archive per path so several data managers in a run write to the same file
+_ARCHIVES: Dict[str, ReplayArchive] = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+
+def open_archive(path: str, mode: str) -> ReplayArchive:
+    key = os.path.abspath(path)
+    with _ARCHIVES_LOCK:
+        archive = _ARCHIVES.get(key)
+        if archive is None or archive.mode != mode or archive._zip.fp is None:
+            archive = ReplayArchive(path, mode)
+            _ARCHIVES[key] = archive
+        return archive
+
+
+def archive_from_env() -> Optional[ReplayArchive]:
+    """Returns the archive requested via FPL_REPLAY / FPL_RECORD, if any."""
+    replay_path = os.environ.get(REPLAY_ENV)
+    record_path = os.environ.get(RECORD_ENV)
+    if replay_path and record_path:
+        raise ValueError(f"{REPLAY_ENV} and {RECORD_ENV} are mutually exclusive")
+    if replay_path:
+        return open_archive(replay_path, 'r')
+    if record_path:
+        return open_archive(record_path, 'w')
+    return None
+
+
+def add_replay_arguments(parser: argparse.ArgumentParser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--record', metavar='ARCHIVE', help='Record every FPL API response of this run into a zip archive')
+    group.add_argument('--replay', metavar='ARCHIVE', help='Serve all FPL API calls from a recorded archive (no network)')
+
+
+def apply_replay_arguments(args: argparse.Namespace):
+    """Exports --record / --replay so every FPLDataManager created afterwards picks them up."""
+    if getattr(args, 'record', None):
+        os.environ[RECORD_ENV] = args.record
+        print(f"⏺️  Recording FPL API responses to {args.record}")
+    if getattr(args, 'replay', None):
+        if not os.path.exists(args.replay):
+            raise FileNotFoundError(f"Replay archive not found: {args.replay}")
+        os.environ[REPLAY_ENV] = args.replay
+        print(f"⏯️  Replaying FPL API responses from {args.replay} (offline)")
@@ -0,0 +1,100 @@
+import heapq
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Formation rules of the Starting XI: minimum and maximum starters per position (GK, DEF, MID, FWD)
+STARTER_MINIMA = {1: 1, 2: 3, 3: 2, 4: 1}
+STARTER_MAXIMA = {1: 1, 2: 5, 3: 5, 4: 3}
+XI_SIZE = 11
+BENCH_SIZE = 4
+MAX_PER_TEAM = 3
+
+Entry = Tuple[float, int] # (-points, pool index): heap order is best first, ties in pool order
+
+
+class StarterSelector:
+    """
+    Starting XI + bench from a candidate pool (max 3 per team, formation minima, attackers favoured for the free slots).
+    Players sit in per-position heaps keyed by points and are dropped lazily once picked or once their team is full,
+    both of which are permanent, so a selection costs O(n) to build the heaps plus O(log n) per pick.
+    The pool does not need to be sorted, and `points` can override predicted_points (e.g. one simulated sample).
+    """
+
+    def __init__(self, defender_luxury_margin: float = 0.8, max_per_team: int = MAX_PER_TEAM):
+        # A 4th+ defender must beat the best attacker by this many points
+        self.defender_luxury_margin = defender_luxury_margin
+        self.max_per_team = max_per_team
+
+    def select(self, players: Sequence[Dict], points: Optional[Sequence[float]] = None) -> Tuple[List[Dict], List[Dict]]:
+        """11 starters (filtered by minutes) + 4 bench, each list in pick order."""
+        if points is None:
+            points = [p['predicted_points'] for p in players]
+        everyone: List[Entry] = [(-float(points[i]), i) for i in range(len(players))]
+        by_position: Dict[int, List[Entry]] = {pos: [] for pos in STARTER_MAXIMA}
+        for entry in everyone:
+            p = players[entry[1]]
+            if p['can_start'] and p['position'] in by_position:
+                by_position[p['position']].append(entry)
+        heapq.heapify(everyone)
+        for heap in by_position.values():
+            heapq.heapify(heap)
+
+        picked = set()
+        team_counts: Dict[str, int] = {}
+        counts = {pos: 0 for pos in STARTER_MAXIMA}
+
+        def top(heap: List[Entry]) -> Optional[Entry]:
+            """Best player of the heap still available, discarding picked players and full teams."""
+            while heap:
+                i = heap[0][1]
+                if i not in picked and team_counts.get(players[i]['team'], 0) < self.max_per_team:
+                    return heap[0]
+                heapq.heappop(heap)
+            return None
+
+        def pick(entry: Entry, squad: List[Dict]):
+            p = players[entry[1]]
+            picked.add(entry[1])
+            squad.append(p)
+            team_counts[p['team']] = team_counts.get(p['team'], 0) + 1
+
+        # 1. Fill mandatory minimum slots, best available player first
+        starters = []
+        while True:
+            tops = [e for pos, heap in by_position.items() if counts[pos] < STARTER_MINIMA[pos] and (e := top(heap))]
+            if not tops:
+                break
+            best = min(tops)
+            pick(best, starters)
+            counts[players[best[1]]['position']] += 1
+
+        # 2. Fill remaining starter slots (Strategic Formation: Favor Attackers)
+        while len(starters) < XI_SIZE:
+            best_def = top(by_position[2]) if counts[2] < STARTER_MAXIMA[2] else None
+            atk_tops = [e for pos in (3, 4) if counts[pos] < STARTER_MAXIMA[pos] and (e := top(by_position[pos]))]
+            best_atk = min(atk_tops) if atk_tops else None
+
+            if not best_def and not best_atk:
+                # Fallback: ANY player who meets the team constraint, even if minutes are low
+                selected = top(everyone)
+                if not selected:
+                    break # Complete exhaustion
+            elif not best_atk:
+                selected = best_def
+            elif not best_def:
+                selected = best_atk
+            else:
+                def_points, atk_points = -best_def[0], -best_atk[0]
+                is_defender_luxury = counts[2] >= 3
+                if is_defender_luxury and def_points < atk_points + self.defender_luxury_margin:
+                    selected = best_atk
+                else:
+                    selected = best_def if def_points > atk_points else best_atk
+
+            pick(selected, starters)
+            counts[players[selected[1]]['position']] += 1
+
+        # 3. Fill bench (remaining top players, applying team constraint)
+        bench = []
+        while len(bench) < BENCH_SIZE and (entry := top(everyone)):
+            pick(entry, bench)
+        return starters, bench
@@ -0,0 +1,89 @@
+import pandas as pd
+from dataclasses import dataclass
+from functools import cached_property
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from .data_manager import FPLDataManager
+from .feature_factory import FeatureFactory
+from .fixture_index import FixtureIndex
+from .storage import EngineStorage
+from .team_stats import TeamStatsIndex
+from . import tracing
+
+
+@dataclass(frozen=True)
+class GameweekSnapshot:
+    """
+    Immutable view of every FPL API payload a single pipeline run needs.
+    Built once per run so the commander, squad builder and feedback loop never re-hit the API.
+    """
+    bootstrap: Mapping
+    fixtures: Tuple[Dict, ...]
+    next_gameweek: int
+    summaries: Mapping[int, Dict]
+    live_events: Mapping[int, Mapping[int, Dict]]
+    team_stats: TeamStatsIndex = TeamStatsIndex({})
+
+    @classmethod
+    @tracing.traced("snapshot.build")
+    def build(cls, dm: FPLDataManager, player_ids: Iterable[int] = (), bootstrap: Optional[Dict] = None,
+              include_previous_results: bool = False, storage: Optional[EngineStorage] = None) -> "GameweekSnapshot":
+        """
+        Fetches bootstrap, fixtures, the requested player summaries and (optionally) last GW's live data.
+        With `storage`, the persisted team stats table is brought up to date (live data only for missing gameweeks).
+        """
+        bootstrap = bootstrap if bootstrap is not None else dm.get_bootstrap_static()
+        next_gw = dm.get_upcoming_gameweek(bootstrap)
+        fixtures = dm.get_fixtures()
+        summaries = dm.get_player_summaries(player_ids)
+
+        live_events = {}
+        if include_previous_results and next_gw > 1:
+            try:
+                live_events[next_gw - 1] = MappingProxyType(dm.get_actual_events(next_gw - 1))
+            except Exception as e:
+                print(f"⚠️ Live data for GW{next_gw - 1} unavailable: {e}")
+
+        team_stats = TeamStatsIndex({})
+        if storage is not None:
+            team_stats = TeamStatsIndex.refresh(dm, storage, bootstrap, fixtures, live_events)
+
+        return cls(
+            bootstrap=MappingProxyType(bootstrap),
+            fixtures=tuple(fixtures),
+            next_gameweek=next_gw,
+            summaries=MappingProxyType(summaries),
+            live_events=MappingProxyType(live_events),
+            team_stats=team_stats,
+        )
+
+    @property
+    def players(self) -> List[Dict]:
+        return self.bootstrap['elements']
+
+    @property
+    def teams(self) -> List[Dict]:
+        return self.bootstrap['teams']
+
+    def gameweek_fixtures(self, gameweek: Optional[int] = None) -> List[Dict]:
+        gameweek = gameweek or self.next_gameweek
+        return [f for f in self.fixtures if f['event'] == gameweek]
+
+    @cached_property
+    def fixture_index(self) -> FixtureIndex:
+        """(team, gameweek) -> fixtures, built once; doubles have two entries and blanks none."""
+        return FixtureIndex(self.fixtures)
+
+    def has_summary(self, player_id: int) -> bool:
+        return player_id in self.summaries
+
+    def history(self, player_id: int) -> List[Dict]:
+        return self.summaries.get(player_id, {}).get('history', [])
+
+    @cached_property
+    def history_frame(self) -> pd.DataFrame:
+        """Long-format history of every fetched player, built once for batch feature computation."""
+        return FeatureFactory.history_frame(self.summaries)
+
+    def actual_events(self, gameweek: int) -> Mapping[int, Dict]:
+        return self.live_events.get(gameweek, MappingProxyType({}))
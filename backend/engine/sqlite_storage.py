@@ -0,0 +1,279 @@
+import os
+import json
+import sqlite3
+import threading
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from .storage import EngineStorage, DEFAULT_CONFIDENCE
+from . import tracing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prediction_runs (
+    gameweek INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS predictions (
+    gameweek INTEGER NOT NULL,
+    player_id INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (gameweek, player_id)
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_player ON predictions (player_id, gameweek);
+CREATE TABLE IF NOT EXISTS feedback (
+    gameweek INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    metrics TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS confidence (
+    target TEXT PRIMARY KEY,
+    score REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deadline_history (
+    gameweek INTEGER PRIMARY KEY,
+    deadline TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS team_stats (
+    season TEXT NOT NULL,
+    gameweek INTEGER NOT NULL,
+    team_id INTEGER NOT NULL,
+    matches INTEGER NOT NULL,
+    xgc REAL NOT NULL,
+    gc REAL NOT NULL,
+    xg REAL NOT NULL,
+    goals REAL NOT NULL,
+    final INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (season, gameweek, team_id)
+);
+"""
+
+
+class _PredictionHistoryView(Mapping):
+    """Lazy {gameweek: {timestamp, predictions}} view so legacy dict-style callers only read the rows they touch."""
+
+    def __init__(self, storage: "SQLiteEngineStorage"):
+        self._storage = storage
+
+    def __getitem__(self, key) -> Dict:
+        record = self._storage.get_predictions(int(key))
+        if record is None:
+            raise KeyError(key)
+        return record
+
+    def __contains__(self, key) -> bool:
+        try:
+            return self._storage._query_one("SELECT 1 FROM prediction_runs WHERE gameweek = ?", (int(key),)) is not None
+        except (TypeError, ValueError):
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._storage._query("SELECT gameweek FROM prediction_runs ORDER BY gameweek")
+        return iter([str(gw) for (gw,) in rows])
+
+    def __len__(self) -> int:
+        return self._storage._query_one("SELECT COUNT(*) FROM prediction_runs")[0]
+
+
+class SQLiteEngineStorage(EngineStorage):
+    """
+    EngineStorage backend on a single SQLite file (stdlib, no service).
+    Predictions, feedback, confidence and deadline history live in indexed tables and every write is one transaction.
+    The training set stays in the columnar training store.
+    """
+
+    def __init__(self, base_path: str = "backend/data", season: Optional[str] = None, db_name: str = "engine.sqlite"):
+        self.db_path = os.path.join(base_path, db_name)
+        self._lock = threading.RLock()
+        self._conn = None
+        super().__init__(base_path, season)
+
+    def _ensure_paths(self):
+        if not os.path.exists(self.base_path):
+            os.makedirs(self.base_path)
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._import_json_history()
+
+    def _migrate(self):
+        """Adds columns introduced after a database was created."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(team_stats)")}
+        if "final" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE team_stats ADD COLUMN final INTEGER NOT NULL DEFAULT 0")
+
+    # --- Low-level helpers ---
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _query_one(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _import_json_history(self):
+        """Seeds an empty database from the JSON files of the default backend."""
+        if self._query_one("SELECT COUNT(*) FROM prediction_runs")[0] or self._query_one("SELECT COUNT(*) FROM feedback")[0]:
+            return
+
+        imported = []
+        predictions = EngineStorage._load(self, self.prediction_history_file)
+        if predictions:
+            self._replace_prediction_history(predictions)
+            imported.append(f"{len(predictions)} prediction runs")
+        feedback = EngineStorage._load(self, self.feedback_file)
+        if feedback:
+            self._replace_feedback(feedback)
+            imported.append(f"{len(feedback)} feedback entries")
+        deadlines = EngineStorage._load(self, self.deadline_history_file)
+        if deadlines:
+            self._replace_deadlines(deadlines)
+        confidence = EngineStorage._load(self, self.confidence_file)
+        if confidence:
+            self._replace_confidence(confidence)
+
+        if imported:
+            print(f"📦 Imported {', '.join(imported)} from JSON into {self.db_path}")
+
+    # --- Public API (same signatures as EngineStorage) ---
+
+    @tracing.traced("storage.save_predictions")
+    def save_predictions(self, gameweek: int, predictions: List[Dict]):
+        """Stores predictions for a specific gameweek to be evaluated later."""
+        with self._lock, self._conn:
+            self._write_prediction_run(gameweek, datetime.now().isoformat(), predictions)
+
+    @tracing.traced("storage.get_predictions")
+    def get_predictions(self, gameweek: int) -> Optional[Dict]:
+        """Returns {timestamp, predictions} for one gameweek via the (gameweek, player_id) index."""
+        run = self._query_one("SELECT timestamp FROM prediction_runs WHERE gameweek = ?", (gameweek,))
+        if run is None:
+            return None
+        rows = self._query("SELECT payload FROM predictions WHERE gameweek = ? ORDER BY rank", (gameweek,))
+        return {"timestamp": run[0], "predictions": [json.loads(payload) for (payload,) in rows]}
+
+    def get_player_predictions(self, player_id: int) -> Dict[int, Dict]:
+        """Every stored prediction for one player, keyed by gameweek."""
+        rows = self._query("SELECT gameweek, payload FROM predictions WHERE player_id = ? ORDER BY gameweek", (player_id,))
+        return {gw: json.loads(payload) for gw, payload in rows}
+
+    def store_feedback(self, gameweek: int, error_metrics: Dict):
+        """Stores the result of the prediction vs actual comparison."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feedback (gameweek, timestamp, metrics) VALUES (?, ?, ?)",
+                (gameweek, datetime.now().isoformat(), json.dumps(error_metrics))
+            )
+
+    def get_latest_feedback(self) -> Optional[Dict]:
+        row = self._query_one("SELECT timestamp, metrics FROM feedback ORDER BY gameweek DESC LIMIT 1")
+        if row is None:
+            return None
+        return {"timestamp": row[0], "metrics": json.loads(row[1])}
+
+    def get_feedback(self) -> Dict:
+        """Returns the full feedback loop history."""
+        rows = self._query("SELECT gameweek, timestamp, metrics FROM feedback ORDER BY gameweek")
+        return {str(gw): {"timestamp": ts, "metrics": json.loads(metrics)} for gw, ts, metrics in rows}
+
+    def get_confidence_scores(self) -> Dict:
+        """Loads and returns current model confidence scores."""
+        rows = self._query("SELECT target, score FROM confidence")
+        return dict(rows) if rows else dict(DEFAULT_CONFIDENCE)
+
+    def get_team_stats(self) -> Dict:
+        """This season's team x gameweek stats table: {gameweek: {team_id: {matches, xgc, gc, xg, goals, final}}}."""
+        table = {}
+        rows = self._query("SELECT gameweek, team_id, matches, xgc, gc, xg, goals, final FROM team_stats WHERE season = ?", (self.season,))
+        for gw, team, matches, xgc, gc, xg, goals, final in rows:
+            table.setdefault(str(gw), {})[str(team)] = {"matches": matches, "xgc": xgc, "gc": gc, "xg": xg, "goals": goals,
+                                                        "final": bool(final)}
+        return table
+
+    def save_team_stats(self, gameweeks: Dict) -> Dict:
+        """Replaces the given gameweeks' rows (one transaction) and returns the updated table."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM team_stats WHERE season = ? AND gameweek = ?",
+                                   [(self.season, int(gw)) for gw in gameweeks])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO team_stats (season, gameweek, team_id, matches, xgc, gc, xg, goals, final) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(self.season, int(gw), int(team), int(row['matches']), row['xgc'], row['gc'], row['xg'], row['goals'], int(bool(row.get('final'))))
+                 for gw, teams in gameweeks.items() for team, row in teams.items()]
+            )
+        return self.get_team_stats()
+
+    # --- Legacy path-based access, routed to tables so existing callers keep working ---
+
+    @tracing.traced("storage.load")
+    def _load(self, path: str) -> Dict:
+        if path == self.prediction_history_file:
+            return _PredictionHistoryView(self)
+        if path == self.feedback_file:
+            return self.get_feedback()
+        if path == self.deadline_history_file:
+            return {str(gw): deadline for gw, deadline in self._query("SELECT gameweek, deadline FROM deadline_history")}
+        if path == self.confidence_file:
+            return dict(self._query("SELECT target, score FROM confidence"))
+        return super()._load(path)
+
+    @tracing.traced("storage.save")
+    def _save(self, path: str, data: Dict):
+        if path == self.prediction_history_file:
+            self._replace_prediction_history(data)
+        elif path == self.feedback_file:
+            self._replace_feedback(data)
+        elif path == self.deadline_history_file:
+            self._replace_deadlines(data)
+        elif path == self.confidence_file:
+            self._replace_confidence(data)
+        else:
+            super()._save(path, data)
+
+    def _write_prediction_run(self, gameweek: int, timestamp: str, predictions: List[Dict]):
+        self._conn.execute("DELETE FROM predictions WHERE gameweek = ?", (gameweek,))
+        self._conn.execute("INSERT OR REPLACE INTO prediction_runs (gameweek, timestamp) VALUES (?, ?)", (gameweek, timestamp))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO predictions (gameweek, player_id, rank, payload) VALUES (?, ?, ?, ?)",
+            [(gameweek, p['id'], rank, json.dumps(p)) for rank, p in enumerate(predictions)]
+        )
+
+    def _replace_prediction_history(self, history: Dict):
+        with self._lock, self._conn:
+            # Same semantics as rewriting the JSON file: gameweeks missing from `history` are dropped
+            kept = {int(gw) for gw in history}
+            dropped = [(gw,) for (gw,) in self._conn.execute("SELECT gameweek FROM prediction_runs") if gw not in kept]
+            self._conn.executemany("DELETE FROM predictions WHERE gameweek = ?", dropped)
+            self._conn.executemany("DELETE FROM prediction_runs WHERE gameweek = ?", dropped)
+            for gw, run in history.items():
+                self._write_prediction_run(int(gw), run.get('timestamp', datetime.now().isoformat()), run.get('predictions', []))
+
+    def _replace_feedback(self, feedback: Dict):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM feedback")
+            self._conn.executemany(
+                "INSERT INTO feedback (gameweek, timestamp, metrics) VALUES (?, ?, ?)",
+                [(int(gw), entry.get('timestamp', ''), json.dumps(entry.get('metrics', {}))) for gw, entry in feedback.items()]
+            )
+
+    def _replace_deadlines(self, deadlines: Dict):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM deadline_history")
+            self._conn.executemany(
+                "INSERT INTO deadline_history (gameweek, deadline) VALUES (?, ?)",
+                [(int(gw), deadline) for gw, deadline in deadlines.items()]
+            )
+
+    def _replace_confidence(self, scores: Dict):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM confidence")
+            self._conn.executemany("INSERT INTO confidence (target, score) VALUES (?, ?)",
+                                   [(target, float(score)) for target, score in scores.items()])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
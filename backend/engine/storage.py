@@ -1,54 +1,162 @@
 import json
 import os
+import tempfile
+import threading
+import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+from .training_store import TrainingStore, current_season
+from . import tracing
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+def _json_default(obj):
+    """numpy values as orjson's OPT_SERIALIZE_NUMPY writes them."""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _nan_to_none(obj):
+    if isinstance(obj, float):
+        return None if obj != obj or obj in (float('inf'), float('-inf')) else obj
+    if isinstance(obj, dict):
+        return {k: _nan_to_none(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_nan_to_none(v) for v in obj]
+    return obj
+
+
+def _stdlib_dumps(data, compact: bool) -> bytes:
+    """json.dumps producing the same bytes as the orjson path: indent 2 (or compact), raw UTF-8, NaN/inf as null."""
+    kwargs = dict(separators=(',', ':')) if compact else dict(indent=2)
+    try:
+        text = json.dumps(data, ensure_ascii=False, allow_nan=False, default=_json_default, **kwargs)
+    except ValueError:
+        # Rare path: replace non-finite floats (numpy values converted first) and retry
+        text = json.dumps(_nan_to_none(json.loads(json.dumps(data, default=_json_default))),
+                          ensure_ascii=False, allow_nan=False, **kwargs)
+    return text.encode()
+
+
+# Selects the storage backend returned by create_storage(): "json" (default) or "sqlite"
+STORAGE_BACKEND_ENV = "FPL_STORAGE"
+
+DEFAULT_CONFIDENCE = {
+    "actual_goals": 1.0,
+    "actual_assists": 1.0,
+    "actual_clean_sheets": 1.0,
+    "actual_saves": 1.0,
+    "actual_bonus": 1.0,
+    "actual_defcon_points": 1.0
+}
+
+
+def create_storage(base_path: str = "backend/data", backend: Optional[str] = None) -> "EngineStorage":
+    """Builds the configured EngineStorage backend (argument, else $FPL_STORAGE, else JSON files)."""
+    backend = (backend or os.environ.get(STORAGE_BACKEND_ENV) or "json").lower()
+    if backend == "sqlite":
+        from .sqlite_storage import SQLiteEngineStorage
+        return SQLiteEngineStorage(base_path)
+    if backend != "json":
+        raise ValueError(f"Unknown storage backend '{backend}' (expected 'json' or 'sqlite')")
+    return EngineStorage(base_path)
+
+
+class CorruptStorageError(ValueError):
+    """Raised when a storage file exists but cannot be parsed; the file is left untouched for inspection."""
+
+
 
 class EngineStorage:
     """Handles persistence for the feedback loop and historical predictions."""
     
-    def __init__(self, base_path: str = "backend/data"):
+    def __init__(self, base_path: str = "backend/data", season: Optional[str] = None):
         self.base_path = base_path
+        self.season = season or current_season()
         self.feedback_file = os.path.join(base_path, "feedback_loop.json")
         self.prediction_history_file = os.path.join(base_path, "prediction_history.json")
-        self.training_data_file = os.path.join(base_path, "training_data.json")
+        self.training_data_file = os.path.join(base_path, "training_data.json") # Legacy, migrated into training_store
+        self.training_store_dir = os.path.join(base_path, "training_store")
         self.deadline_history_file = os.path.join(base_path, "deadline_history.json")
+        self.confidence_file = os.path.join(base_path, "confidence.json")
+        self.team_stats_file = os.path.join(base_path, "team_stats.json")
+        # Large, append-heavy files are written compactly; small ones keep indent=4 for readable diffs
+        self.compact_files = {self.prediction_history_file}
+        self._file_locks: Dict[str, list] = {}
+        self._file_locks_guard = threading.Lock()
         self._ensure_paths()
+        self.training_store = TrainingStore(self.training_store_dir)
+        self._migrate_training_data()
 
     def _ensure_paths(self):
         if not os.path.exists(self.base_path):
             os.makedirs(self.base_path)
         
-        for f in [self.feedback_file, self.prediction_history_file, self.training_data_file, self.deadline_history_file]:
+        for f in [self.feedback_file, self.prediction_history_file, self.deadline_history_file]:
             if not os.path.exists(f):
-                # feedback, prediction_history, and deadline_history are dicts, training_data is a list
-                initial_content = [] if "training_data" in f else {}
-                with open(f, 'w') as fh:
-                    json.dump(initial_content, fh)
+                self._save(f, {})
 
+    def _migrate_training_data(self):
+        """Imports a legacy training_data.json into the columnar store the first time it is seen."""
+        if self.training_store.is_empty() and os.path.exists(self.training_data_file):
+            migrated = self.training_store.migrate_from_json(self.training_data_file)
+            if migrated:
+                print(f"📦 Migrated {migrated} training records from {self.training_data_file} to {self.training_store_dir}")
+
+    @tracing.traced("storage.save_predictions")
     def save_predictions(self, gameweek: int, predictions: List[Dict]):
         """Stores predictions for a specific gameweek to be evaluated later."""
-        history = self._load(self.prediction_history_file)
-        history[str(gameweek)] = {
-            "timestamp": datetime.now().isoformat(),
-            "predictions": predictions
-        }
-        self._save(self.prediction_history_file, history)
+        with self._update(self.prediction_history_file) as history:
+            history[str(gameweek)] = {
+                "timestamp": datetime.now().isoformat(),
+                "predictions": predictions
+            }
+
+    def get_predictions(self, gameweek: int) -> Optional[Dict]:
+        """Returns the stored {timestamp, predictions} entry for one gameweek, if any."""
+        return self._load(self.prediction_history_file).get(str(gameweek))
 
     def store_feedback(self, gameweek: int, error_metrics: Dict):
         """Stores the result of the prediction vs actual comparison."""
-        feedback = self._load(self.feedback_file)
-        feedback[str(gameweek)] = {
-            "timestamp": datetime.now().isoformat(),
-            "metrics": error_metrics
-        }
-        self._save(self.feedback_file, feedback)
-
-    def save_training_data(self, records: List[Dict]):
-        """Appends new feature/actual pairs for future training."""
-        data = self._load(self.training_data_file)
-        if not isinstance(data, list): data = []
-        data.extend(records)
-        self._save(self.training_data_file, data)
+        with self._update(self.feedback_file) as feedback:
+            feedback[str(gameweek)] = {
+                "timestamp": datetime.now().isoformat(),
+                "metrics": error_metrics
+            }
+
+    @tracing.traced("storage.save_training_data")
+    def save_training_data(self, records: List[Dict], gameweek: int = 0, season: Optional[str] = None):
+        """Appends new feature/actual pairs for future training (O(batch), partitioned by season/gameweek)."""
+        self.training_store.append(records, gameweek=gameweek, season=season or self.season)
+
+    @tracing.traced("storage.load_training_frame")
+    def load_training_frame(self, columns: Optional[List[str]] = None,
+                            parts: Optional[List[str]] = None) -> pd.DataFrame:
+        """Loads training records oldest-first, reading only the requested columns (and only `parts`, if given)."""
+        partitions = None
+        if parts is not None:
+            wanted = set(parts)
+            partitions = [p for p in self.training_store.partitions() if self.training_part_id(p[2]) in wanted]
+        return self.training_store.read(columns, partitions)
+
+    def training_parts(self) -> List[str]:
+        """Ids of every training store part, oldest first (what an incremental model update has or hasn't seen)."""
+        return [self.training_part_id(path) for _, _, path in self.training_store.partitions()]
+
+    def training_part_id(self, path: str) -> str:
+        return os.path.relpath(path, self.training_store_dir).replace(os.sep, "/")
 
     def get_latest_feedback(self) -> Optional[Dict]:
         feedback = self._load(self.feedback_file)
@@ -61,28 +169,105 @@ class EngineStorage:
         """Returns the full feedback loop history."""
         return self._load(self.feedback_file)
 
+    def get_team_stats(self) -> Dict:
+        """This season's team x gameweek stats table: {gameweek: {team_id: {matches, xgc, gc, xg, goals, final}}}."""
+        return self._load(self.team_stats_file).get(self.season, {})
+
+    def save_team_stats(self, gameweeks: Dict) -> Dict:
+        """Merges new gameweek rows into this season's table and returns the updated table."""
+        with self._update(self.team_stats_file) as table:
+            season = table.setdefault(self.season, {})
+            for gw, teams in gameweeks.items():
+                season[str(gw)] = {str(team): row for team, row in teams.items()}
+            return dict(season)
+
     def get_confidence_scores(self) -> Dict:
         """Loads and returns current model confidence scores."""
-        conf_path = os.path.join(self.base_path, "confidence.json")
-        if os.path.exists(conf_path):
-            with open(conf_path, 'r') as f:
+        if os.path.exists(self.confidence_file):
+            with open(self.confidence_file, 'r') as f:
                 return json.load(f)
-        return {
-            "actual_goals": 1.0,
-            "actual_assists": 1.0,
-            "actual_clean_sheets": 1.0,
-            "actual_saves": 1.0,
-            "actual_bonus": 1.0,
-            "actual_defcon_points": 1.0
-        }
+        return dict(DEFAULT_CONFIDENCE)
 
+    @tracing.traced("storage.load")
     def _load(self, path: str) -> Dict:
+        """Reads a JSON file; a missing file is empty, an unreadable one raises CorruptStorageError."""
         try:
-            with open(path, 'r') as f:
-                return json.load(f)
-        except Exception:
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
             return {}
+        try:
+            return orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+        except ValueError as e:
+            raise CorruptStorageError(f"Could not parse {path}: {e}") from e
 
+    @tracing.traced("storage.save")
     def _save(self, path: str, data: Dict):
-        with open(path, 'w') as f:
-            json.dump(data, f, indent=4)
+        """Crash-safe write: serialize to a temp file in the same directory, fsync, then atomically rename."""
+        if HAS_ORJSON:
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            if path not in self.compact_files:
+                option |= orjson.OPT_INDENT_2
+            payload = orjson.dumps(data, option=option)
+        else:
+            payload = _stdlib_dumps(data, compact=path in self.compact_files)
+
+        tracing.count("storage.bytes_written", len(payload))
+        with self._locked(path):
+            directory = os.path.dirname(path) or '.'
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            _fsync_directory(directory)
+
+    @contextmanager
+    def _update(self, path: str) -> Iterator[Dict]:
+        """Locked read-modify-write: yields the current contents and saves them on a clean exit."""
+        with self._locked(path):
+            data = self._load(path)
+            yield data
+            self._save(path, data)
+
+    @contextmanager
+    def _locked(self, path: str):
+        """
+        Advisory lock on <path>.lock so concurrent cron jobs serialize their writes.
+        Re-entrant within a process; without fcntl (e.g. Windows) only in-process threads are serialized.
+        """
+        with self._file_locks_guard:
+            entry = self._file_locks.setdefault(path, [threading.RLock(), None, 0])
+        with entry[0]:
+            if entry[2] == 0 and HAS_FCNTL:
+                entry[1] = open(path + ".lock", 'a')
+                fcntl.flock(entry[1].fileno(), fcntl.LOCK_EX)
+            entry[2] += 1
+            try:
+                yield
+            finally:
+                entry[2] -= 1
+                if entry[2] == 0 and entry[1] is not None:
+                    fcntl.flock(entry[1].fileno(), fcntl.LOCK_UN)
+                    entry[1].close()
+                    entry[1] = None
+
+
+def _fsync_directory(directory: str):
+    """Persists the rename itself; not supported on every platform, so failures are ignored."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
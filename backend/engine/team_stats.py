@@ -0,0 +1,120 @@
+import numpy as np
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Mapping, Optional
+from .data_manager import FPLDataManager
+from .fixture_index import FixtureIndex
+from .storage import EngineStorage
+from . import tracing
+
+# Per (team, gameweek) totals; a double gameweek is one row with matches=2
+TEAM_STAT_FIELDS = ("matches", "xgc", "gc", "xg", "goals")
+# Vulnerability for a team with no recorded matches yet
+DEFAULT_VULNERABILITY = 1.5
+
+
+def team_gameweek_stats(live_events: Mapping[int, Dict], players: List[Dict], fixtures: FixtureIndex,
+                        gameweek: int) -> Dict[int, Dict[str, float]]:
+    """
+    One gameweek's team rows from event/{gw}/live data (FPLDataManager.get_actual_events).
+    xGC/GC come from the players with the most minutes (they saw the whole match, a sub only part of it);
+    xG and goals are summed over everyone.
+    """
+    team_of = {p['id']: p['team'] for p in players}
+    matches = {team: len(team_fixtures) for team, team_fixtures in fixtures.gameweek(gameweek).items()}
+
+    rows: Dict[int, Dict[str, float]] = {}
+    longest: Dict[int, tuple] = {}
+    for player_id, stats in live_events.items():
+        team = team_of.get(int(player_id))
+        if team is None or not stats.get('minutes') or not matches.get(team):
+            continue
+        row = rows.setdefault(team, {"matches": matches[team], "xgc": 0.0, "gc": 0.0, "xg": 0.0, "goals": 0.0})
+        exposure = (stats['minutes'], float(stats.get('expected_goals_conceded', 0)), float(stats.get('goals_conceded', 0)))
+        longest[team] = max(longest.get(team, exposure), exposure)
+        row["xg"] += float(stats.get('expected_goals', 0))
+        row["goals"] += float(stats.get('goals_scored', 0))
+    for team, row in rows.items():
+        _, row["xgc"], row["gc"] = longest[team]
+        row["xg"] = round(row["xg"], 2)
+    return rows
+
+
+class TeamStatsIndex:
+    """
+    Team x gameweek stats table with per-team prefix sums, so any rolling window is a constant-time difference.
+    Built from the persisted table in EngineStorage; `refresh` only fetches live data for gameweeks it is missing.
+    """
+
+    def __init__(self, table: Mapping[int, Mapping[int, Mapping[str, float]]]):
+        self.table = {int(gw): {int(t): dict(row) for t, row in teams.items()} for gw, teams in table.items()}
+        by_team: Dict[int, List] = {}
+        for gw in sorted(self.table):
+            for team, row in self.table[gw].items():
+                by_team.setdefault(team, []).append((gw, [float(row.get(f, 0)) for f in TEAM_STAT_FIELDS]))
+
+        self._gameweeks: Dict[int, List[int]] = {}
+        self._prefix: Dict[int, np.ndarray] = {}
+        for team, entries in by_team.items():
+            self._gameweeks[team] = [gw for gw, _ in entries]
+            values = np.array([v for _, v in entries])
+            self._prefix[team] = np.vstack([np.zeros(len(TEAM_STAT_FIELDS)), values.cumsum(axis=0)])
+
+    @classmethod
+    @tracing.traced("team_stats.refresh")
+    def refresh(cls, dm: FPLDataManager, storage: EngineStorage, bootstrap: Mapping, fixtures: Iterable[Dict],
+                live_events: Optional[Mapping[int, Mapping[int, Dict]]] = None) -> "TeamStatsIndex":
+        """
+        Adds every finished gameweek missing from the persisted table (one event/{gw}/live call each), then indexes it.
+        Rows are stored with `final` once FPL has checked the gameweek's data; provisional (or legacy) rows are
+        fetched again on later runs until then. `live_events` are payloads the caller already fetched, reused
+        instead of calling the API again.
+        """
+        fixtures = FixtureIndex(fixtures)
+        checked = {e['id'] for e in bootstrap.get('events', []) if e.get('data_checked', e.get('finished'))}
+        table = storage.get_team_stats()
+        missing = [gw for gw in dm.get_finished_gameweeks(bootstrap)
+                   if not table.get(str(gw)) or not all(row.get('final') for row in table[str(gw)].values())]
+        if missing:
+            print(f"📊 Updating team stats table for {len(missing)} gameweek(s)...")
+        added = {}
+        for gw in missing:
+            try:
+                events = (live_events or {}).get(gw) or dm.get_actual_events(gw)
+            except Exception as e:
+                print(f"⚠️ Live data for GW{gw} unavailable, team stats will retry next run: {e}")
+                continue
+            rows = team_gameweek_stats(events, bootstrap['elements'], fixtures, gw)
+            for row in rows.values():
+                row["final"] = gw in checked
+            added[gw] = rows
+        if added:
+            table = storage.save_team_stats(added)
+        return cls({int(gw): teams for gw, teams in table.items()})
+
+    @property
+    def teams(self) -> List[int]:
+        return sorted(self._gameweeks)
+
+    def window(self, team: int, window: int, before_gw: Optional[int] = None) -> Dict[str, float]:
+        """Totals over the team's last `window` gameweeks with a match (before `before_gw`, if given)."""
+        gameweeks = self._gameweeks.get(team)
+        if not gameweeks:
+            return {f: 0.0 for f in TEAM_STAT_FIELDS}
+        end = len(gameweeks) if before_gw is None else bisect_left(gameweeks, before_gw)
+        totals = self._prefix[team][end] - self._prefix[team][max(0, end - window)]
+        return dict(zip(TEAM_STAT_FIELDS, totals.tolist()))
+
+    def rolling(self, team: int, window: int = 7, before_gw: Optional[int] = None) -> Dict[str, float]:
+        """Per-match averages (xgc, gc, xg, goals) over the window, plus the number of matches it covers."""
+        totals = self.window(team, window, before_gw)
+        matches = totals.pop("matches")
+        averages = {f: (v / matches if matches else 0.0) for f, v in totals.items()}
+        averages["matches"] = matches
+        return averages
+
+    def vulnerability(self, team: int, window: int = 7, before_gw: Optional[int] = None) -> float:
+        """Blended vulnerability score: 0.5 * xGC + 0.5 * GC per match."""
+        stats = self.rolling(team, window, before_gw)
+        if not stats["matches"]:
+            return DEFAULT_VULNERABILITY
+        return round(stats["xgc"] * 0.5 + stats["gc"] * 0.5, 2)
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import argparse
+import threading
+import functools
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Environment switch read at import (FPL_TRACE=1); entry points can also call enable() / pass --trace
+TRACE_ENV = "FPL_TRACE"
+REPORT_NAME = "trace_report"
+
+SpanPath = Tuple[str, ...]
+
+
+class Tracer:
+    """
+    Aggregates nested span timings per call path (count, total and self time) plus named counters.
+    Every thread keeps its own span stack; work handed to a pool through `wrap` nests under the submitting span.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # path -> [count, total seconds, seconds spent in child spans]
+            self.spans: Dict[SpanPath, List[float]] = {}
+            self.counters: Counter = Counter()
+            self.started = time.perf_counter()
+
+    def stack(self) -> List[str]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def record(self, path: SpanPath, elapsed: float):
+        with self._lock:
+            entry = self.spans.setdefault(path, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            if len(path) > 1:
+                self.spans.setdefault(path[:-1], [0, 0.0, 0.0])[2] += elapsed
+
+    def count(self, name: str, n: float = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def report(self) -> Dict:
+        """Per-path and per-name timings, slowest first, and the counters."""
+        with self._lock:
+            spans = {path: list(v) for path, v in self.spans.items()}
+            counters = dict(self.counters)
+            wall = time.perf_counter() - self.started
+
+        rows, by_name = [], {}
+        for path, (count, total, children) in spans.items():
+            self_time = max(total - children, 0.0)
+            rows.append({"path": ";".join(path), "name": path[-1], "count": int(count),
+                         "total_s": round(total, 6), "self_s": round(self_time, 6)})
+            agg = by_name.setdefault(path[-1], {"count": 0, "total_s": 0.0, "self_s": 0.0})
+            agg["count"] += int(count)
+            agg["self_s"] += self_time
+            # Recursive/nested calls of the same name count once towards its total
+            if path[-1] not in path[:-1]:
+                agg["total_s"] += total
+        rows.sort(key=lambda r: r["total_s"], reverse=True)
+        by_name = {name: {k: (round(v, 6) if isinstance(v, float) else v) for k, v in agg.items()}
+                   for name, agg in sorted(by_name.items(), key=lambda x: x[1]["total_s"], reverse=True)}
+        return {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "wall_s": round(wall, 6),
+            "spans": rows,
+            "by_name": by_name,
+            "counters": counters,
+        }
+
+    def collapsed_stacks(self) -> List[str]:
+        """Self time per path in the collapsed-stack format (`a;b;c <microseconds>`) of flamegraph.pl / speedscope."""
+        lines = []
+        for row in self.report()["spans"]:
+            micros = int(round(row["self_s"] * 1e6))
+            if micros > 0:
+                lines.append(f"{row['path'].replace(' ', '_')} {micros}")
+        return sorted(lines)
+
+
+class _Span:
+    __slots__ = ("name", "path", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        stack = _TRACER.stack()
+        stack.append(self.name)
+        self.path = tuple(stack)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _TRACER.stack().pop()
+        _TRACER.record(self.path, elapsed)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_TRACER = Tracer()
+_NOOP = _NoopSpan()
+_enabled = os.environ.get(TRACE_ENV, "").lower() in ("1", "true", "yes", "on")
+
+
+def enable(on: bool = True):
+    """Turns tracing on (clearing anything recorded so far) or off."""
+    global _enabled
+    if on and not _enabled:
+        _TRACER.reset()
+    _enabled = on
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(name: str):
+    """`with span("stage"):` times a block; a shared no-op object when tracing is off."""
+    return _Span(name) if _enabled else _NOOP
+
+
+def count(name: str, n: float = 1):
+    if _enabled:
+        _TRACER.count(name, n)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator form of `span`; disabled, the wrapper costs one global check per call."""
+    def decorator(fn: Callable) -> Callable:
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def wrap(fn: Callable) -> Callable:
+    """Binds `fn` to the caller's span stack, so its spans nest under the caller when it runs on a worker thread."""
+    if not _enabled:
+        return fn
+    parent = list(_TRACER.stack())
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        stack = _TRACER.stack()
+        saved = stack[:]
+        stack[:] = parent
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            stack[:] = saved
+    return wrapper
+
+
+def report() -> Dict:
+    return _TRACER.report()
+
+
+def reset():
+    _TRACER.reset()
+
+
+def write_report(directory: str = "backend/data", name: str = REPORT_NAME) -> Tuple[str, str]:
+    """Writes <name>.json (timings + counters) and <name>.folded (collapsed stacks for a flamegraph) into `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    json_path = os.path.join(directory, f"{name}.json")
+    folded_path = os.path.join(directory, f"{name}.folded")
+    with open(json_path, 'w') as f:
+        json.dump(report(), f, indent=2)
+    with open(folded_path, 'w') as f:
+        f.write("\n".join(_TRACER.collapsed_stacks()) + "\n")
+    return json_path, folded_path
+
+
+def print_summary(limit: int = 15):
+    data = report()
+    # Spans on pool threads add up thread time, so they can exceed the wall time
+    print(f"\n⏱️  Trace: {data['wall_s']:.2f}s wall")
+    print(f"{'span':<40} {'calls':>7} {'total':>9} {'self':>9}")
+    for name, agg in list(data["by_name"].items())[:limit]:
+        print(f"{name[:40]:<40} {agg['count']:>7} {agg['total_s']:>8.3f}s {agg['self_s']:>8.3f}s")
+    for name, value in sorted(data["counters"].items()):
+        print(f"  {name}: {value:g}")
+
+
+def add_trace_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--trace', action='store_true',
+                        help=f'Record per-stage timings and write {REPORT_NAME}.json/.folded into backend/data (or set {TRACE_ENV}=1)')
+
+
+def apply_trace_arguments(args: argparse.Namespace):
+    if getattr(args, 'trace', False):
+        enable()
+        print("⏱️  Tracing enabled")
@@ -1,42 +1,56 @@
 import os
+import time
+import hashlib
+import threading
 import joblib
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional, Tuple
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 try:
+    import xgboost as xgb
     from xgboost import XGBRegressor
     HAS_XGB = True
 except ImportError:
     HAS_XGB = False
 from sklearn.ensemble import RandomForestRegressor
 from .storage import EngineStorage
+from .params import EngineParams, DEFAULT_PARAMS
+from . import tracing
+from .distributions import PointsDistribution
+from .match_simulator import MatchSimulator, team_goal_rates
+
+# Incremental updates: trees added per update, and updates allowed before the next full refit
+INCREMENTAL_ROUNDS = 10
+FULL_REFIT_EVERY = 6
+# Drift check: a full refit is forced when the models' error on the new rows exceeds this multiple of the usual
+DRIFT_TOLERANCE = 1.15
+# Smoothing of the "usual" out-of-sample error (exponential moving average weight of each new batch)
+ERROR_SMOOTHING = 0.3
+TRAINING_MODES = ("auto", "full", "incremental")
 
 class modelTrainer:
     """Manages training of the points predictor with a multi-model probabilistic approach."""
     
-    def __init__(self, storage: EngineStorage):
+    def __init__(self, storage: EngineStorage, params: Optional[EngineParams] = None):
         self.storage = storage
+        self.params = params or DEFAULT_PARAMS
         self.model_type = "xgb" if HAS_XGB else "rf"
         
         # We now train separate models for each event to build a probabilistic xP
         self.targets = ['actual_goals', 'actual_assists', 'actual_clean_sheets', 'actual_saves', 'actual_bonus', 'actual_defcon_points']
         self.models = {}
         self.model_paths = {}
+        # (mtime_ns, size) of each model file as last loaded/saved, so load_model only re-reads changed files
+        self._model_stamps: Dict[str, tuple] = {}
+        self._model_lock = threading.Lock()
         
         for target in self.targets:
-            if HAS_XGB:
-                # Use Poisson for goals/assists/saves/bonus (counts), Logistic for clean sheets (binary)
-                objective = 'count:poisson' if target != 'actual_clean_sheets' else 'binary:logistic'
-                self.models[target] = XGBRegressor(
-                    n_estimators=50,
-                    learning_rate=0.1,
-                    max_depth=4,
-                    objective=objective
-                )
-            else:
-                self.models[target] = RandomForestRegressor(n_estimators=50, max_depth=4)
-            
+            self.models[target] = self._new_model(target, self.params)
             self.model_paths[target] = os.path.join(storage.base_path, f"model_{self.model_type}_{target}.joblib")
+        # Which training parts the saved models have seen, plus refit-policy bookkeeping
+        self.training_state_file = os.path.join(storage.base_path, f"model_{self.model_type}_state.json")
             
         self.features = [
             'xG_90', 'xA_90', 'actual_goals_90', 'actual_assists_90', 'actual_cs_90',
@@ -45,36 +59,182 @@ class modelTrainer:
             'fixture_difficulty', 'selected_by', 'cost', 'hauls', 'opponent_vulnerability'
         ]
         
+        # Cores for training the heads (None = all); heads run concurrently and split the cores between them
+        self.n_jobs: Optional[int] = None
+        
+        # Vesuvius simulation settings (seed=None draws fresh entropy each run)
+        self.n_sims = 1500
+        self.sim_seed: Optional[int] = None
+        
         # RL Reinforcement: Model confidence/trust scores
-        self.confidence_scores = self.storage._load(os.path.join(self.storage.base_path, "confidence.json"))
+        self.confidence_scores = self.storage._load(self.storage.confidence_file)
         if not self.confidence_scores:
             self.confidence_scores = {target: 1.0 for target in self.targets}
             
         self.load_model()
 
-    def load_model(self):
-        import joblib
-        for target, path in self.model_paths.items():
-            if os.path.exists(path):
+    @staticmethod
+    def _new_model(target: str, params: EngineParams = DEFAULT_PARAMS):
+        """Untrained head for one target."""
+        if HAS_XGB:
+            # Use Poisson for goals/assists/saves/bonus (counts), Logistic for clean sheets (binary)
+            objective = 'count:poisson' if target != 'actual_clean_sheets' else 'binary:logistic'
+            return XGBRegressor(
+                n_estimators=params.n_estimators,
+                learning_rate=params.learning_rate,
+                max_depth=params.max_depth,
+                objective=objective
+            )
+        return RandomForestRegressor(n_estimators=params.n_estimators, max_depth=params.max_depth)
+
+    @staticmethod
+    def _file_stamp(path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @tracing.traced("trainer.load_model")
+    def load_model(self) -> str:
+        """
+        Loads the saved models, re-reading only files whose mtime/size changed since the last load.
+        Cheap enough to call on every request; returns the resulting model_version.
+        """
+        with self._model_lock:
+            for target, path in self.model_paths.items():
+                stamp = self._file_stamp(path)
+                if stamp is None or self._model_stamps.get(target) == stamp:
+                    continue
                 self.models[target] = joblib.load(path)
+                self._model_stamps[target] = stamp
+            return self.model_version
 
+    @tracing.traced("trainer.save_model")
     def save_model(self):
-        import joblib
-        for target, path in self.model_paths.items():
-            joblib.dump(self.models[target], path)
-        self.storage._save(os.path.join(self.storage.base_path, "confidence.json"), self.confidence_scores)
+        with self._model_lock:
+            for target, path in self.model_paths.items():
+                # Write-then-rename so a concurrent load_model never reads a half-written file
+                tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+                joblib.dump(self.models[target], tmp_path)
+                os.replace(tmp_path, path)
+                self._model_stamps[target] = self._file_stamp(path)
+        self.storage._save(self.storage.confidence_file, self.confidence_scores)
 
-    def train_on_feedback(self):
+    @property
+    def model_version(self) -> str:
+        """Short id of the model files currently in memory ("untrained" before any are saved)."""
+        if not self._model_stamps:
+            return "untrained"
+        return hashlib.sha1(repr(sorted(self._model_stamps.items())).encode()).hexdigest()[:12]
+
+    @tracing.traced("trainer.train_on_feedback")
+    def train_on_feedback(self, mode: str = "auto") -> Optional[Dict]:
         """
         Trains all event-based models based on collected training data.
-        Uses Temporal Weighting to prioritize recent results (Reinforcement Learning).
+        mode="full" refits from scratch; "incremental" continues boosting the current models on the training parts
+        added since the last fit; "auto" goes incremental unless the refit policy or the drift check asks for a full refit.
+        Returns a summary of the update (mode, reason, rows, seconds, out-of-sample error on the new rows).
         """
-        data = self.storage._load(self.storage.training_data_file)
-        if not data or len(data) < 20: 
-            print("Insufficient training data for RL update.")
-            return
+        if mode not in TRAINING_MODES:
+            raise ValueError(f"Unknown training mode '{mode}' (expected one of {TRAINING_MODES})")
+        start = time.perf_counter()
+        parts = self.storage.training_parts()
+        state = self.storage._load(self.training_state_file)
+        new_parts = [p for p in parts if p not in set(state.get('trained_parts', []))]
+
+        # Error of the current models on rows they have never seen: the drift signal, and a free holdout score
+        new_error, drift = None, None
+        if new_parts and state:
+            new_df = self.storage.load_training_frame(self.features + self.targets, parts=new_parts)
+            new_error = self.holdout_error(new_df)
+            baseline = state.get('baseline_error')
+            if new_error and baseline:
+                drift = float(np.mean([new_error[t] / max(baseline[t], 1e-6) for t in new_error if t in baseline]))
+
+        reason = mode
+        if mode == "auto":
+            mode, reason = self._choose_training_mode(state, parts, new_parts, drift)
+        elif mode == "incremental" and not (HAS_XGB and self._model_stamps):
+            mode, reason = "full", "no saved models to continue"
+        if mode == "incremental" and not new_parts:
+            print("Models already include every training record; nothing to update.")
+            return None
+
+        summary = self._train_full() if mode == "full" else self._train_incremental(new_parts)
+        if summary is None:
+            return None
+
+        # Bookkeeping for the refit policy: the usual error follows new batches, and after drift it restarts at the new level
+        baseline = state.get('baseline_error') or new_error
+        if new_error and drift is not None and drift > DRIFT_TOLERANCE:
+            baseline = new_error
+        elif new_error and baseline:
+            baseline = {t: (1 - ERROR_SMOOTHING) * baseline.get(t, v) + ERROR_SMOOTHING * v for t, v in new_error.items()}
+        summary.update({"reason": reason, "new_parts": len(new_parts), "holdout_error": new_error,
+                        "drift": None if drift is None else round(drift, 3),
+                        "seconds": round(time.perf_counter() - start, 3)})
+        self.storage._save(self.training_state_file, {
+            "features": self.features,
+            "trained_parts": parts,
+            "updates_since_full": 0 if summary['mode'] == "full" else state.get('updates_since_full', 0) + 1,
+            "baseline_error": baseline,
+            "updated_at": datetime.now().isoformat(),
+            "last_update": summary,
+        })
+        print(f"🧠 {summary['mode'].capitalize()} update ({reason}) on {summary['rows']} rows in {summary['seconds']:.2f}s")
+        return summary
+
+    def _choose_training_mode(self, state: Dict, parts: List[str], new_parts: List[str],
+                              drift: Optional[float]) -> Tuple[str, str]:
+        """Refit policy: incremental by default, full when the models can't simply be continued."""
+        if not HAS_XGB:
+            return "full", "random forest has no warm start"
+        if not state or not self._model_stamps:
+            return "full", "no saved models"
+        if state.get('features') != self.features:
+            return "full", "feature set changed"
+        if not set(state.get('trained_parts', [])) <= set(parts):
+            return "full", "training data was rewritten"
+        if state.get('updates_since_full', 0) >= FULL_REFIT_EVERY:
+            return "full", f"{FULL_REFIT_EVERY} incremental updates since the last refit"
+        if drift is not None and drift > DRIFT_TOLERANCE:
+            return "full", f"drift: new-row error {drift:.2f}x the usual"
+        return "incremental", "new gameweek data"
+
+    def holdout_error(self, df: pd.DataFrame) -> Optional[Dict[str, float]]:
+        """Per-target MAE of the current models on `df` (rows they were not trained on)."""
+        if df.empty or not self._model_stamps:
+            return None
+        predictions = self.predict(df)
+        return {t: round(float(np.mean(np.abs(predictions[t] - df[t].fillna(0).to_numpy()))), 4)
+                for t in self.targets if t in df.columns and df[t].notna().any()}
 
-        df = pd.DataFrame(data)
+    def _target_labels(self, df: pd.DataFrame) -> Dict[str, pd.Series]:
+        labels = {}
+        for target_label in self.targets:
+            if target_label in df.columns and df[target_label].notna().any():
+                print(f"  - Reinforcing {target_label} model...")
+                labels[target_label] = df[target_label].fillna(0)
+        return labels
+
+    def _train_incremental(self, new_parts: List[str]) -> Optional[Dict]:
+        """Continues boosting every head on the new parts only (INCREMENTAL_ROUNDS more trees each)."""
+        df = self.storage.load_training_frame(self.features + self.targets, parts=new_parts)
+        if df.empty:
+            return None
+        print(f"Engine continuing multi-head system ({self.model_type}) on {len(df)} new records...")
+        self.fit_heads(df[self.features].fillna(0), self._target_labels(df), warm_start=True)
+        self.save_model()
+        return {"mode": "incremental", "rows": len(df)}
+
+    def _train_full(self) -> Optional[Dict]:
+        """Refits every head from scratch on the whole training set, with Temporal Weighting."""
+        # Column-projected read: only model features + targets leave the disk
+        df = self.storage.load_training_frame(self.features + self.targets)
+        if len(df) < 20: 
+            print("Insufficient training data for RL update.")
+            return None
         
         X = df[self.features].fillna(0)
 
@@ -87,35 +247,75 @@ class modelTrainer:
             weights = np.linspace(0.5, 1.5, n_samples)
 
         print(f"Engine training multi-head system ({self.model_type}) with Temporal Weighting on {len(df)} records...")
+        labels = self._target_labels(df)
         
-        for target_label in self.targets:
-            if target_label in df.columns:
-                print(f"  - Reinforcing {target_label} model...")
-                y = df[target_label].fillna(0)
-                
-                if HAS_XGB:
-                    self.models[target_label].fit(X, y, sample_weight=weights)
-                else:
-                    self.models[target_label].fit(X, y) # RF doesn't support sample_weight easily here
+        if HAS_XGB:
+            self.fit_heads(X, labels, weights)
+        else:
+            for target_label, y in labels.items():
+                self.models[target_label].fit(X, y) # RF doesn't support sample_weight easily here
         
         self.save_model()
+        return {"mode": "full", "rows": len(df)}
+
+    @tracing.traced("trainer.fit_heads")
+    def fit_heads(self, X: pd.DataFrame, labels: Dict[str, pd.Series], weights: Optional[np.ndarray] = None,
+                  n_jobs: Optional[int] = None, warm_start: bool = False):
+        """
+        Fits the XGBoost heads on one shared quantile sketch of X (each head's QuantileDMatrix references it),
+        training heads concurrently with the cores split between them. Same trees as fitting each XGBRegressor.
+        With warm_start, each head's current booster is continued for INCREMENTAL_ROUNDS more trees instead.
+        """
+        n_jobs = n_jobs or self.n_jobs or os.cpu_count() or 1
+        workers = max(1, min(n_jobs, len(labels)))
+        threads = max(1, n_jobs // workers)
+        shared = None if warm_start else xgb.QuantileDMatrix(X, weight=weights)
 
+        def fit(target: str):
+            # A fresh wrapper: a loaded model's params carry its fitted base_score, which would skip re-estimating it
+            model = self._new_model(target, self.params)
+            params = {k: v for k, v in model.get_xgb_params().items() if k != 'n_jobs'}
+            params['nthread'] = threads
+            if warm_start:
+                # Exact values, not a new sketch, so the existing trees score the new rows as they would at predict time.
+                # xgb.train copies the booster it continues, so concurrent predictions keep using the old one.
+                dtrain = xgb.DMatrix(X, label=labels[target], weight=weights)
+                booster = xgb.train(params, dtrain, num_boost_round=INCREMENTAL_ROUNDS,
+                                    xgb_model=self.models[target].get_booster())
+            else:
+                dtrain = xgb.QuantileDMatrix(X, label=labels[target], weight=weights, ref=shared)
+                booster = xgb.train(params, dtrain, num_boost_round=model.n_estimators)
+            # Hand the booster back to the sklearn wrapper, so predict/joblib files work as before
+            model.load_model(bytearray(booster.save_raw("ubj")))
+            return model
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            self.models.update(zip(labels, pool.map(fit, labels)))
+
+    @tracing.traced("trainer.predict")
     def predict(self, feature_df: pd.DataFrame) -> Dict[str, np.ndarray]:
         """Generates probabilistic event predictions for the next Gameweek."""
         results = {}
         # Ensure only training features are passed (prevents column mismatch errors)
         X = feature_df[self.features].fillna(0)
+        # One float32 matrix shared by every XGBoost head (columns are already in training order)
+        values = X.to_numpy(dtype=np.float32) if HAS_XGB else None
         
         for target in self.targets:
             try:
                 # Use the specific model for this event
-                results[target] = self.models[target].predict(X)
+                model = self.models[target]
+                if HAS_XGB and isinstance(model, XGBRegressor):
+                    results[target] = model.get_booster().inplace_predict(values)
+                else:
+                    results[target] = model.predict(X)
             except Exception as e:
                 print(f"⚠️ Prediction error for {target}: {e}")
                 # Fallback: zero out
                 results[target] = np.zeros(len(X))
         return results
 
+    @tracing.traced("trainer.translate_to_xp")
     def translate_to_xp(self, event_predictions: Dict[str, np.ndarray], element_types: List[int]) -> np.ndarray:
         """
         Translates event probabilities into xP (Expected Points).
@@ -149,59 +349,63 @@ class modelTrainer:
         
         return np.maximum(xp, 0)
 
-    def calculate_haul_probability(self, event_predictions: Dict[str, np.ndarray], element_types: List[int], n_sims: int = 1500, haul_multipliers: Optional[np.ndarray] = None) -> np.ndarray:
+    def _event_rates(self, event_predictions: Dict[str, np.ndarray], n_players: int, haul_multipliers: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Confidence-adjusted event rates, with the Vesuvius Multiplier applied to attacking events and clean sheets."""
+        c = self.confidence_scores
+        multiplier = np.asarray(haul_multipliers, dtype=float) if haul_multipliers is not None else np.ones(n_players)
+        zeros = np.zeros(n_players)
+        
+        p_cs = np.asarray(event_predictions['actual_clean_sheets']) * c.get('actual_clean_sheets', 1.0) * multiplier
+        return {
+            'goals': np.asarray(event_predictions['actual_goals']) * c.get('actual_goals', 1.0) * multiplier,
+            'assists': np.asarray(event_predictions['actual_assists']) * c.get('actual_assists', 1.0) * multiplier,
+            'saves': np.asarray(event_predictions['actual_saves']) * c.get('actual_saves', 1.0),
+            'bonus': np.asarray(event_predictions.get('actual_bonus', zeros)) * c.get('actual_bonus', 1.0) * multiplier,
+            'defcon': np.asarray(event_predictions.get('actual_defcon_points', zeros)) * c.get('actual_defcon_points', 1.0),
+            # Clean sheet is a biased coin flip - also boosted by multiplier
+            'cs': np.clip(p_cs, 0, 1),
+        }
+
+    @tracing.traced("trainer.points_distribution")
+    def points_distribution(self, event_predictions: Dict[str, np.ndarray], element_types: List[int], n_sims: Optional[int] = None, haul_multipliers: Optional[np.ndarray] = None, seed: Optional[int] = None, exact: bool = False) -> PointsDistribution:
         """
-        Calculates the probability of a player scoring 11+ points using a Monte Carlo simulation.
-        Assumes independent Poisson events for counts and Logistic for clean sheets.
+        Full per-player points distribution (percentiles, P(>=k) for any k).
+        Monte Carlo samples an (n_players x n_sims) matrix in one pass; exact mode convolves the Poisson PMFs instead.
         """
-        n_players = len(element_types)
-        haul_probs = np.zeros(n_players)
-        
-        # FPL Points constants by element type (1=GKP, 2=DEF, 3=MID, 4=FWD)
-        GOAL_VALS = {1: 6, 2: 6, 3: 5, 4: 4}
-        CS_VALS = {1: 4, 2: 4, 3: 1, 4: 0}
-        ASSIST_VALS = 3
-        SAVE_VALS = 0.33
+        rates = self._event_rates(event_predictions, len(element_types), haul_multipliers)
+        if exact:
+            return PointsDistribution.exact(rates, element_types)
         
-        c = self.confidence_scores
+        rng = np.random.default_rng(seed if seed is not None else self.sim_seed)
+        return PointsDistribution.monte_carlo(rates, element_types, n_sims or self.n_sims, rng)
+
+    @tracing.traced("trainer.joint_points_distribution")
+    def joint_points_distribution(self, event_predictions: Dict[str, np.ndarray], element_types: List[int], match_ids: List[int], teams: List[int], opponents: List[int], n_sims: Optional[int] = None, seed: Optional[int] = None, mask: Optional[np.ndarray] = None, base_rates: Optional[Dict] = None) -> PointsDistribution:
+        """
+        Team-level joint distribution (MatchSimulator): one entry per (player, fixture), teammates correlated.
+        Team goal rates come from every entry; `mask` limits which entries are actually simulated.
+        """
+        rates = self._event_rates(event_predictions, len(element_types))
+        goal_rates = team_goal_rates(rates, element_types, match_ids, teams, opponents, base_rates)
+        columns = [element_types, match_ids, teams, opponents]
+        if mask is not None:
+            rates = {k: v[mask] for k, v in rates.items()}
+            columns = [np.asarray(c)[mask] for c in columns]
         
-        for i in range(n_players):
-            pos = element_types[i]
-            multiplier = haul_multipliers[i] if haul_multipliers is not None else 1.0
-            
-            # Adjusted lambdas based on confidence scores and Vesuvius Multiplier
-            l_goals = event_predictions['actual_goals'][i] * c.get('actual_goals', 1.0) * multiplier
-            l_assists = event_predictions['actual_assists'][i] * c.get('actual_assists', 1.0) * multiplier
-            l_saves = event_predictions['actual_saves'][i] * c.get('actual_saves', 1.0)
-            l_bonus = event_predictions.get('actual_bonus', np.zeros(n_players))[i] * c.get('actual_bonus', 1.0) * multiplier
-            l_defcon = event_predictions.get('actual_defcon_points', np.zeros(n_players))[i] * c.get('actual_defcon_points', 1.0)
-            
-            # Clean sheet is a biased coin flip - also boosted by multiplier
-            p_cs = event_predictions['actual_clean_sheets'][i] * c.get('actual_clean_sheets', 1.0) * multiplier
-            p_cs = min(max(p_cs, 0), 1)
-            
-            # Monte Carlo Simulation
-            sim_goals = np.random.poisson(l_goals, n_sims)
-            sim_assists = np.random.poisson(l_assists, n_sims)
-            sim_saves = np.random.poisson(l_saves, n_sims)
-            sim_bonus = np.random.poisson(l_bonus, n_sims)
-            sim_defcon = np.random.poisson(l_defcon, n_sims)
-            sim_cs = np.random.binomial(1, p_cs, n_sims)
-            
-            # Calculate points per match simulation
-            points = 2.0 # Baseline for starting
-            points += sim_goals * GOAL_VALS.get(pos, 4)
-            points += sim_assists * ASSIST_VALS
-            points += sim_cs * CS_VALS.get(pos, 0)
-            points += sim_saves * SAVE_VALS
-            points += sim_bonus
-            points += sim_defcon
-            
-            # A haul is defined as 11+ points (User definition)
-            haul_probs[i] = np.mean(points >= 11)
-            
-        return haul_probs
+        rng = np.random.default_rng(seed if seed is not None else self.sim_seed)
+        return MatchSimulator(n_sims or self.n_sims, rng).simulate(rates, *columns, goal_rates=goal_rates)
+
+    @tracing.traced("trainer.calculate_haul_probability")
+    def calculate_haul_probability(self, event_predictions: Dict[str, np.ndarray], element_types: List[int], n_sims: Optional[int] = None, haul_multipliers: Optional[np.ndarray] = None, seed: Optional[int] = None, exact: bool = False) -> np.ndarray:
+        """
+        Calculates the probability of a player scoring 11+ points using a Monte Carlo simulation.
+        Assumes independent Poisson events for counts and Logistic for clean sheets.
+        """
+        if len(element_types) == 0:
+            return np.zeros(0)
+        return self.points_distribution(event_predictions, element_types, n_sims, haul_multipliers, seed, exact).haul_probability()
 
+    @tracing.traced("trainer.evaluate_performance")
     def evaluate_performance(self, gameweek: int, actual_events: Dict[int, Dict]):
         """
         Compares predicted vs actual outcomes with the 'Stability Sentinel' logic.
@@ -215,7 +419,64 @@ class modelTrainer:
             return
             
         predictions = gw_data['predictions']
+        metrics = self.update_confidence(gameweek, predictions, actual_events)
         training_records = []
+        
+        for p in predictions:
+            p_id = p['id']
+            actual_data = actual_events.get(str(p_id)) or actual_events.get(p_id)
+            
+            if actual_data is not None:
+                # Fetch features
+                features = p.get('features', {})
+                # Defcon Logic: 10+ for DEFs, 12+ for MIDs/FWDs (New 24/25 Rules)
+                pos = p.get('position', 2) # Default to DEF if unknown
+                dc_value = actual_data.get('defensive_contribution', 0)
+                if pos == 2:
+                    defcon_points = 2 if dc_value >= 10 else 0
+                elif pos in [3, 4]:
+                    defcon_points = 2 if dc_value >= 12 else 0
+                else:
+                    defcon_points = 0 # GKs don't get defcon points
+                
+                # The heads are per fixture: a double gameweek's actuals cover both matches, its features only the first
+                if features and p.get('n_fixtures', 1) == 1:
+                    training_records.append({
+                        "player_id": p_id,
+                        **features,
+                        "actual_points": actual_data.get('total_points', 0),
+                        "actual_goals": actual_data.get('goals_scored', 0),
+                        "actual_assists": actual_data.get('assists', 0),
+                        "actual_clean_sheets": actual_data.get('clean_sheets', 0),
+                        "actual_saves": actual_data.get('saves', 0),
+                        "actual_save_points": actual_data.get('saves', 0) // 3,
+                        "actual_bonus": actual_data.get('bonus', 0),
+                        "actual_defcon_points": defcon_points,
+                        "actual_minutes": actual_data.get('minutes', 0),
+                        "actual_conceded": actual_data.get('goals_conceded', 0)
+                    })
+        
+        if training_records:
+            self.storage.save_training_data(training_records, gameweek=gameweek)
+            
+        if metrics:
+            self.storage.store_feedback(gameweek, metrics)
+            
+            print(f"📊 A/B Performance (GW{gameweek}):")
+            print(f"  - Conservative MAE: {metrics['mae_conservative']:.3f}")
+            print(f"  - Brave MAE: {metrics['mae_brave']:.3f}")
+            print(f"  - Advantage: {'Brave' if metrics['mae_brave'] < metrics['mae_conservative'] else 'Conservative'} "
+                  f"(+{abs(metrics['mae_conservative'] - metrics['mae_brave']):.3f})")
+        
+        # Save updated confidence scores to disk
+        self.save_model()
+
+    def update_confidence(self, gameweek: int, predictions: List[Dict], actual_events: Mapping) -> Optional[Dict]:
+        """
+        Stability Sentinel: moves the per-target confidence scores towards how well each head did, at a learning rate
+        damped by the noise gate and scaled by squad-wide accuracy. Returns the error metrics (None without actuals).
+        """
+        params = self.params
         errors = []
         errors_cons = []
         errors_brave = []
@@ -229,7 +490,8 @@ class modelTrainer:
                 temp_errors.append(abs(p['predicted_points'] - actual_data.get('total_points', 0)))
         
         global_mae = sum(temp_errors) / len(temp_errors) if temp_errors else 0
-        noise_multiplier = 0.2 if global_mae > 3.0 else (0.5 if global_mae > 2.5 else 1.0)
+        noise_multiplier = params.noise_damping_high if global_mae > params.noise_gate_high else \
+            (params.noise_damping_low if global_mae > params.noise_gate_low else 1.0)
         
         # 2. Squad-Wide Accuracy (7/11 Logic)
         sorted_preds = sorted(predictions, key=lambda x: x.get('predicted_points', 0), reverse=True)
@@ -245,8 +507,7 @@ class modelTrainer:
         stability_multiplier = 1.5 if squad_accuracy >= 0.6 else (0.8 if squad_accuracy < 0.4 else 1.0)
         
         # Final adjusted Learning Rate
-        BASE_LR = 0.05
-        EFFECTIVE_LR = BASE_LR * noise_multiplier * stability_multiplier
+        EFFECTIVE_LR = params.base_lr * noise_multiplier * stability_multiplier
         
         print(f"🛡️ Stability Sentinel (GW{gameweek}):")
         print(f"  - Global MAE: {global_mae:.2f} (Noise Gate: {noise_multiplier}x)")
@@ -279,60 +540,17 @@ class modelTrainer:
                     reward = 1.0 - min(diff, 1.0)
                     self.confidence_scores[target] = (1 - EFFECTIVE_LR) * self.confidence_scores[target] + EFFECTIVE_LR * reward
 
-                # Fetch features
-                features = p.get('features', {})
-                # Defcon Logic: 10+ for DEFs, 12+ for MIDs/FWDs (New 24/25 Rules)
-                pos = p.get('position', 2) # Default to DEF if unknown
-                dc_value = actual_data.get('defensive_contribution', 0)
-                if pos == 2:
-                    defcon_points = 2 if dc_value >= 10 else 0
-                elif pos in [3, 4]:
-                    defcon_points = 2 if dc_value >= 12 else 0
-                else:
-                    defcon_points = 0 # GKs don't get defcon points
-                
-                if features:
-                    training_records.append({
-                        "player_id": p_id,
-                        **features,
-                        "actual_points": total_points,
-                        "actual_goals": actual_data.get('goals_scored', 0),
-                        "actual_assists": actual_data.get('assists', 0),
-                        "actual_clean_sheets": actual_data.get('clean_sheets', 0),
-                        "actual_saves": actual_data.get('saves', 0),
-                        "actual_save_points": actual_data.get('saves', 0) // 3,
-                        "actual_bonus": actual_data.get('bonus', 0),
-                        "actual_defcon_points": defcon_points,
-                        "actual_minutes": actual_data.get('minutes', 0),
-                        "actual_conceded": actual_data.get('goals_conceded', 0)
-                    })
-        
-        if training_records:
-            self.storage.save_training_data(training_records)
-            
-        if errors:
-            mae = sum(errors) / len(errors)
-            mae_cons = sum(errors_cons) / len(errors_cons) if errors_cons else mae
-            mae_brave = sum(errors_brave) / len(errors_brave) if errors_brave else mae
-            
-            rmse = (sum(e**2 for e in errors) / len(errors))**0.5
-            
-            self.storage.store_feedback(gameweek, {
-                "mae": mae,
-                "mae_conservative": mae_cons,
-                "mae_brave": mae_brave,
-                "rmse": rmse,
-                "global_mae": global_mae,
-                "squad_accuracy": squad_accuracy,
-                "noise_multiplier": noise_multiplier,
-                "effective_lr": EFFECTIVE_LR,
-                "sample_size": len(errors)
-            })
-            
-            print(f"📊 A/B Performance (GW{gameweek}):")
-            print(f"  - Conservative MAE: {mae_cons:.3f}")
-            print(f"  - Brave MAE: {mae_brave:.3f}")
-            print(f"  - Advantage: {'Brave' if mae_brave < mae_cons else 'Conservative'} (+{abs(mae_cons - mae_brave):.3f})")
-        
-        # Save updated confidence scores to disk
-        self.save_model()
+        if not errors:
+            return None
+        mae = sum(errors) / len(errors)
+        return {
+            "mae": mae,
+            "mae_conservative": sum(errors_cons) / len(errors_cons) if errors_cons else mae,
+            "mae_brave": sum(errors_brave) / len(errors_brave) if errors_brave else mae,
+            "rmse": (sum(e**2 for e in errors) / len(errors))**0.5,
+            "global_mae": global_mae,
+            "squad_accuracy": squad_accuracy,
+            "noise_multiplier": noise_multiplier,
+            "effective_lr": EFFECTIVE_LR,
+            "sample_size": len(errors)
+        }
@@ -0,0 +1,121 @@
+import os
+import re
+import json
+import time
+import shutil
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+LEGACY_SEASON = "legacy"
+_PARTITION_RE = re.compile(r"^season=(?P<season>[^/]+)$")
+
+
+def current_season(today: Optional[date] = None) -> str:
+    """FPL season label (e.g. '2025-26'); seasons roll over in July."""
+    today = today or date.today()
+    start = today.year if today.month >= 7 else today.year - 1
+    return f"{start}-{str(start + 1)[-2:]}"
+
+
+class TrainingStore:
+    """
+    Append-only columnar store for feature/actual training records.
+    Each append writes one uncompressed .npz part (one array per column) under
+    season=<season>/gw=<gw>/, so appends are O(batch) and reads load only the requested columns.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        if not os.path.exists(root):
+            os.makedirs(root)
+
+    def append(self, records: List[Dict], gameweek: int = 0, season: Optional[str] = None) -> Optional[str]:
+        """Writes a batch of records as a new partition part and returns its path."""
+        if not records:
+            return None
+        season = season or current_season()
+        directory = os.path.join(self.root, f"season={season}", f"gw={int(gameweek):03d}")
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        frame = pd.DataFrame.from_records(records)
+        columns = {}
+        for col in frame.columns:
+            series = frame[col]
+            if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+                dtype = np.int64 if col == 'player_id' else np.float64
+                columns[col] = series.to_numpy(dtype=dtype, na_value=0 if dtype is np.int64 else np.nan)
+            else:
+                columns[col] = series.astype(str).to_numpy(dtype=str)
+
+        # Write-then-rename so readers never see a half-written part
+        path = os.path.join(directory, f"part-{time.time_ns()}.npz")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **columns)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return path
+
+    def partitions(self) -> List[Tuple[str, int, str]]:
+        """All parts as (season, gameweek, path), in temporal order with legacy data first."""
+        parts = []
+        if not os.path.exists(self.root):
+            return parts
+        for season_dir in os.listdir(self.root):
+            match = _PARTITION_RE.match(season_dir)
+            if not match:
+                continue
+            season_path = os.path.join(self.root, season_dir)
+            for gw_dir in os.listdir(season_path):
+                if not gw_dir.startswith("gw="):
+                    continue
+                gw_path = os.path.join(season_path, gw_dir)
+                for name in os.listdir(gw_path):
+                    if name.endswith(".npz"):
+                        parts.append((match.group('season'), int(gw_dir[3:]), os.path.join(gw_path, name)))
+        parts.sort(key=lambda p: (p[0] != LEGACY_SEASON, p[0], p[1], os.path.basename(p[2])))
+        return parts
+
+    def read(self, columns: Optional[List[str]] = None,
+             partitions: Optional[List[Tuple[str, int, str]]] = None) -> pd.DataFrame:
+        """Concatenates parts into a DataFrame, loading only the requested columns."""
+        frames = []
+        for season, gameweek, path in (partitions if partitions is not None else self.partitions()):
+            with np.load(path, allow_pickle=False) as part:
+                n_rows = len(part[part.files[0]]) if part.files else 0
+                wanted = columns if columns is not None else part.files
+                data = {col: (part[col] if col in part.files else np.full(n_rows, np.nan)) for col in wanted}
+            frames.append(pd.DataFrame(data))
+        if not frames:
+            return pd.DataFrame(columns=columns or [])
+        return pd.concat(frames, ignore_index=True)
+
+    def row_count(self) -> int:
+        total = 0
+        for _, _, path in self.partitions():
+            with np.load(path, allow_pickle=False) as part:
+                total += len(part[part.files[0]]) if part.files else 0
+        return total
+
+    def is_empty(self) -> bool:
+        return not self.partitions()
+
+    def clear(self):
+        if os.path.exists(self.root):
+            shutil.rmtree(self.root)
+        os.makedirs(self.root)
+
+    def migrate_from_json(self, json_path: str, season: str = LEGACY_SEASON) -> int:
+        """One-off import of the legacy training_data.json list (no gameweek info, so it lands in gw=000)."""
+        if not os.path.exists(json_path):
+            return 0
+        with open(json_path, 'r') as f:
+            records = json.load(f)
+        if not isinstance(records, list) or not records:
+            return 0
+        self.append(records, gameweek=0, season=season)
+        return len(records)
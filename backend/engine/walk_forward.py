@@ -0,0 +1,267 @@
+import io
+import os
+import glob
+import time
+import pickle
+import shutil
+import tempfile
+from types import MappingProxyType
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+from .data_manager import FPLDataManager
+from .storage import create_storage
+from .trainer import modelTrainer
+from .commander import EngineCommander, CandidateScores
+from .params import DEFAULT_PARAMS
+from .snapshot import GameweekSnapshot
+from .fixture_index import FixtureIndex
+from .team_stats import TeamStatsIndex, team_gameweek_stats
+
+# Matches in the recomputed `form` (the API's form is the average over the last 30 days, roughly 4 gameweeks)
+FORM_WINDOW = 4
+
+
+class SeasonData:
+    """
+    Every payload a walk-forward run needs, fetched once (live API or --replay archive) and shipped to the workers:
+    bootstrap, fixtures, player summaries and event/{gw}/live for each finished gameweek.
+    """
+
+    def __init__(self, bootstrap: Dict, fixtures: List[Dict], summaries: Dict[int, Dict], live: Dict[int, Dict[int, Dict]]):
+        self.bootstrap = bootstrap
+        self.fixtures = fixtures
+        self.summaries = summaries
+        self.live = live
+        fixture_index = FixtureIndex(fixtures)
+        self.team_table = {gw: team_gameweek_stats(events, bootstrap['elements'], fixture_index, gw)
+                           for gw, events in live.items()}
+
+    @classmethod
+    def fetch(cls, dm: FPLDataManager, pool: Optional[int] = None) -> "SeasonData":
+        bootstrap = dm.get_bootstrap_static()
+        finished = dm.get_finished_gameweeks(bootstrap)
+        players = sorted(bootstrap['elements'], key=lambda p: p.get('total_points', 0), reverse=True)[:pool]
+        summaries = dm.get_player_summaries(p['id'] for p in players)
+        live = {}
+        for gw in finished:
+            try:
+                live[gw] = dm.get_actual_events(gw)
+            except Exception as e:
+                print(f"⚠️ Live data for GW{gw} unavailable, skipping it: {e}")
+        return cls(bootstrap, dm.get_fixtures(), summaries, live)
+
+    @property
+    def gameweeks(self) -> List[int]:
+        return sorted(self.live)
+
+    def snapshot_before(self, gameweek: int) -> GameweekSnapshot:
+        """
+        The snapshot the engine would have built before `gameweek`: histories cut to rounds < gameweek (the same
+        slicing as backfill_data), bootstrap fields that summarise the season recomputed from those histories,
+        and a team stats table holding earlier gameweeks only.
+        """
+        summaries = {pid: {**s, 'history': [m for m in s.get('history', []) if m.get('round', 0) < gameweek]}
+                     for pid, s in self.summaries.items()}
+        elements = [past_only_element(p, summaries.get(p['id'], {}).get('history', []), gameweek,
+                                      self.bootstrap.get('total_players'))
+                    for p in self.bootstrap['elements']]
+        events = [{**e, 'is_current': e.get('id') == gameweek - 1, 'is_next': e.get('id') == gameweek,
+                   'finished': e.get('id', 0) < gameweek, 'data_checked': e.get('id', 0) < gameweek}
+                  for e in self.bootstrap.get('events', [])]
+        return GameweekSnapshot(
+            bootstrap=MappingProxyType({**self.bootstrap, 'elements': elements, 'events': events}),
+            fixtures=tuple(self.fixtures),
+            next_gameweek=gameweek,
+            summaries=MappingProxyType(summaries),
+            live_events=MappingProxyType({}),
+            team_stats=TeamStatsIndex({gw: t for gw, t in self.team_table.items() if gw < gameweek}),
+        )
+
+
+def past_only_element(player: Dict, history: List[Dict], gameweek: int, total_players: Optional[int] = None) -> Dict:
+    """
+    Bootstrap element as of `gameweek`: form, points per game, ICT index, ownership (the last round's `selected`
+    over `total_players`) and per-90 rates from the truncated history. Ownership keeps its current value only when
+    those fields are missing; availability is left to the engine's minutes checks, since past injury flags are not in the API.
+    """
+    played = [m for m in history if m.get('minutes', 0) > 0]
+    minutes = sum(m['minutes'] for m in played)
+
+    def per_90(field: str) -> float:
+        return round(sum(float(m.get(field) or 0) for m in played) / (minutes / 90), 2) if minutes else 0.0
+
+    recent = [m for m in played if m.get('round', 0) >= gameweek - FORM_WINDOW]
+    element = {
+        **player,
+        'status': 'a',
+        'chance_of_playing_next_round': None,
+        'minutes': minutes,
+        'total_points': sum(m.get('total_points', 0) for m in history),
+        'bps': sum(m.get('bps', 0) for m in history),
+        'ict_index': str(round(sum(float(m.get('ict_index') or 0) for m in history), 1)),
+        'form': str(round(sum(m.get('total_points', 0) for m in recent) / len(recent), 1) if recent else 0.0),
+        'points_per_game': str(round(sum(m.get('total_points', 0) for m in played) / len(played), 1) if played else 0.0),
+        'expected_goals_per_90': per_90('expected_goals'),
+        'expected_assists_per_90': per_90('expected_assists'),
+        'saves_per_90': per_90('saves'),
+        'defensive_contribution_per_90': per_90('defensive_contribution'),
+    }
+    if history and history[-1].get('value'):
+        element['now_cost'] = history[-1]['value']
+    if history and history[-1].get('selected') is not None and total_players:
+        element['selected_by_percent'] = str(round(history[-1]['selected'] / total_players * 100, 1))
+    return element
+
+
+def squad_points(starters: List[Dict], actual_events: Dict[int, Dict]) -> Dict[str, float]:
+    """Actual points of the XI, with the highest-predicted starter as captain (counted twice)."""
+    points = {p['id']: float(actual_events.get(p['id'], {}).get('total_points', 0)) for p in starters}
+    captain = max(starters, key=lambda p: p['predicted_points'])['id'] if starters else None
+    return {"xi_points": sum(points.values()), "captain_points": points.get(captain, 0.0),
+            "squad_points": sum(points.values()) + points.get(captain, 0.0)}
+
+
+def _variant_row(variant: Dict, gameweek: int) -> Dict:
+    return {**{k: v for k, v in variant.items() if k != 'params'}, "gameweek": gameweek}
+
+
+_SEASON: Optional[SeasonData] = None
+
+
+def init_worker(season: SeasonData):
+    global _SEASON
+    _SEASON = season
+
+
+def run_walk_forward(variant: Dict, gameweeks: List[int], retrain: bool = True, models_dir: Optional[str] = None,
+                     n_jobs: Optional[int] = None, scores_path: Optional[str] = None) -> List[Dict]:
+    """
+    One variant over consecutive gameweeks, in a private storage: predict -> select -> evaluate -> retrain per gameweek.
+    With retrain=False the models stay fixed, so each gameweek is independent of the others.
+    With `scores_path`, each gameweek's model-stage output (CandidateScores) is pickled there for post-processing sweeps.
+    """
+    season = _SEASON
+    params = variant.get('params', DEFAULT_PARAMS)
+    rows = []
+    all_scores: Dict[int, CandidateScores] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        if models_dir:
+            for path in glob.glob(os.path.join(models_dir, "model_*.joblib")):
+                shutil.copy(path, workdir)
+        storage = create_storage(workdir)
+        trainer = modelTrainer(storage, params)
+        trainer.n_jobs = n_jobs
+        commander = EngineCommander(FPLDataManager(), trainer, candidate_limit=variant['candidate_limit'])
+
+        for gw in gameweeks:
+            actual = season.live[gw]
+            with redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                snapshot = season.snapshot_before(gw)
+                scores = all_scores[gw] = commander.score_candidates(snapshot)
+                processed = commander.rank_candidates(snapshot, scores) if scores.valid_players else []
+                starters, _ = commander.select_squad(processed)
+                storage.save_predictions(gw, processed)
+                predicted = time.perf_counter()
+                trainer.evaluate_performance(gw, actual)
+                summary = trainer.train_on_feedback(mode=variant['train_mode']) if retrain else None
+                trained = time.perf_counter()
+
+            feedback = storage.get_feedback().get(str(gw), {}).get('metrics', {})
+            rows.append({
+                **_variant_row(variant, gw),
+                "mae": feedback.get('mae'),
+                "sample_size": feedback.get('sample_size', 0),
+                **squad_points(starters, actual),
+                "predict_seconds": predicted - start,
+                "train_seconds": trained - predicted,
+                "train_mode": (summary or {}).get('mode', '-') if retrain else 'frozen',
+            })
+
+    if scores_path:
+        tmp_path = f"{scores_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(all_scores, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, scores_path)
+    return rows
+
+
+def replay_post_processing(variant: Dict, gameweeks: List[int], scores_path: str) -> List[Dict]:
+    """
+    Re-scores cached model-stage output with the variant's post-processing params: xP, boosts, selection and the
+    confidence feedback loop run per gameweek, the heads are never refit. Matches a full walk-forward of the variant,
+    because the training rows (features + actuals of every gated candidate) do not depend on post-processing params.
+    """
+    season = _SEASON
+    with open(scores_path, 'rb') as f:
+        all_scores: Dict[int, CandidateScores] = pickle.load(f)
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        trainer = modelTrainer(create_storage(workdir), variant['params'])
+        commander = EngineCommander(FPLDataManager(), trainer, candidate_limit=variant['candidate_limit'])
+        for gw in gameweeks:
+            actual = season.live[gw]
+            scores = all_scores[gw]
+            with redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                processed = commander.rank_candidates(season.snapshot_before(gw), scores) if scores.valid_players else []
+                starters, _ = commander.select_squad(processed)
+                metrics = trainer.update_confidence(gw, processed, actual) or {}
+            rows.append({
+                **_variant_row(variant, gw),
+                "mae": metrics.get('mae'),
+                "sample_size": metrics.get('sample_size', 0),
+                **squad_points(starters, actual),
+                "predict_seconds": time.perf_counter() - start,
+                "train_seconds": 0.0,
+                "train_mode": "cached",
+            })
+    return rows
+
+
+def summarize(rows: List[Dict]) -> List[Dict]:
+    """Per-variant totals over the replayed gameweeks, in first-seen order."""
+    summary = []
+    for variant in dict.fromkeys(r['variant'] for r in rows):
+        vr = [r for r in rows if r['variant'] == variant]
+        maes = [r['mae'] for r in vr if r['mae'] is not None]
+        total = sum(r['squad_points'] for r in vr)
+        summary.append({
+            "variant": variant,
+            "gameweeks": len(vr),
+            "mean_mae": sum(maes) / len(maes) if maes else float('nan'),
+            "total_points": total,
+            "points_per_gw": total / len(vr),
+            "runtime": sum(r['predict_seconds'] + r['train_seconds'] for r in vr),
+        })
+    return summary
+
+
+def run_pool(season: SeasonData, jobs: List[Tuple[Callable, tuple, str]], workers: Optional[int] = None) -> List[Dict]:
+    """Runs (fn, args, label) jobs on a process pool whose workers hold the season data; returns every row."""
+    rows = []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(season,)) as pool:
+        futures = {pool.submit(fn, *args): label for fn, args, label in jobs}
+        for future in as_completed(futures):
+            result = future.result()
+            rows.extend(result)
+            if result:
+                print(f"  ✅ {futures[future]}: GW{result[0]['gameweek']}-{result[-1]['gameweek']} done")
+    return sorted(rows, key=lambda r: (r['variant'], r['gameweek']))
+
+
+def run_backtest(season: SeasonData, variants: List[Dict], gameweeks: List[int], retrain: bool = True,
+                 models_dir: Optional[str] = None, workers: Optional[int] = None) -> List[Dict]:
+    """
+    Fans the work out over a process pool: one job per variant (the walk-forward is sequential within it),
+    or with frozen models one job per (variant, gameweek).
+    """
+    chunks = [(v, gameweeks) for v in variants] if retrain else [(v, [gw]) for v in variants for gw in gameweeks]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+    # Split the cores between the workers so their XGBoost fits don't oversubscribe the machine
+    n_jobs = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🧪 {len(variants)} variant(s) x {len(gameweeks)} gameweek(s) -> {len(chunks)} job(s) on {workers} worker(s)")
+    jobs = [(run_walk_forward, (v, gws, retrain, models_dir, n_jobs), v['variant']) for v, gws in chunks]
+    return run_pool(season, jobs, workers)
@@ -1,8 +1,10 @@
 import os
 import json
+import argparse
 from datetime import datetime
 from backend.engine.data_manager import FPLDataManager
-from backend.engine.storage import EngineStorage
+from backend.engine.replay import add_replay_arguments, apply_replay_arguments
+from backend.engine.storage import create_storage
 from backend.engine.trainer import modelTrainer
 
 def generate_expert_report(gameweek: int, feedback: dict, predictions: list, actual_events: dict):
@@ -56,7 +58,7 @@ def main():
     print("🚀 Starting Model Feedback Loop...")
     
     dm = FPLDataManager()
-    storage = EngineStorage()
+    storage = create_storage()
     trainer = modelTrainer(storage)
     
     # 1. Determine last completed gameweek
@@ -103,7 +105,14 @@ def main():
     else:
         print("❌ Evaluation failed to produce metrics.")
 
+    if dm.cache is not None:
+        print(dm.cache.summary())
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FPL Model Feedback Loop')
+    add_replay_arguments(parser)
+    apply_replay_arguments(parser.parse_args())
+    
     try:
         main()
     except Exception as e:
@@ -2,11 +2,14 @@ import os
 import json
 import sys
 import argparse
+from typing import Optional
 from datetime import datetime, timedelta, timezone
 from backend.engine.data_manager import FPLDataManager
-from backend.engine.storage import EngineStorage
-from backend.engine.trainer import modelTrainer
-from backend.engine.commander import EngineCommander
+from backend.engine.storage import EngineStorage, create_storage
+from backend.engine.trainer import modelTrainer, TRAINING_MODES
+from backend.engine.commander import EngineCommander, DEFAULT_CANDIDATE_LIMIT
+from backend.engine.replay import add_replay_arguments, apply_replay_arguments
+from backend.engine import tracing
 
 def check_deadline_eligibility(dm: FPLDataManager, storage: EngineStorage):
     """
@@ -65,12 +68,13 @@ def check_deadline_eligibility(dm: FPLDataManager, storage: EngineStorage):
         return True
     
     # Store the current deadline as the "last known" for future runs
-    history[str(gw_id)] = deadline_str
-    storage._save(storage.deadline_history_file, history)
+    with storage._update(storage.deadline_history_file) as history:
+        history[str(gw_id)] = deadline_str
     
     return False
 
-def run_prediction_and_save():
+@tracing.traced("generate_static")
+def run_prediction_and_save(candidate_limit: Optional[int] = DEFAULT_CANDIDATE_LIMIT, train_mode: str = "auto"):
     print("Initializing FPL Engine for static generation...")
     
     # Ensure data directory exists
@@ -78,26 +82,32 @@ def run_prediction_and_save():
         os.makedirs('backend/data')
         
     dm = FPLDataManager()
-    storage = EngineStorage() # Default path is backend/data
+    storage = create_storage() # Default path is backend/data
     trainer = modelTrainer(storage)
-    commander = EngineCommander(dm, trainer)
+    commander = EngineCommander(dm, trainer, candidate_limit=candidate_limit)
+    if candidate_limit is None:
+        print("🌍 Full-universe mode: scoring every available player")
+    
+    # --- RUN SNAPSHOT ---
+    # Every API payload for this run is fetched once; nothing downstream touches the data manager.
+    snapshot = commander.build_snapshot(include_previous_results=True)
+    calls_at_snapshot = sum(dm.calls.values())
     
     # --- SELF-TRAINING LOOP ---
     try:
-        bootstrap = dm.get_bootstrap_static()
-        current_gw = dm.get_upcoming_gameweek(bootstrap)
+        current_gw = snapshot.next_gameweek
         previous_gw = current_gw - 1
         
         if previous_gw > 0:
             print(f"Checking for results from GW{previous_gw} to self-train...")
-            actual_events = dm.get_actual_events(previous_gw)
+            actual_events = snapshot.actual_events(previous_gw)
             
             if actual_events:
                 print(f"Found events data for {len(actual_events)} players. Evaluating performance...")
                 # 1. Evaluate past predictions
                 trainer.evaluate_performance(previous_gw, actual_events)
                 # 2. Retrain model with new data
-                trainer.train_on_feedback()
+                trainer.train_on_feedback(mode=train_mode)
             else:
                 print("No actual points data available yet for previous GW.")
     except Exception as e:
@@ -106,13 +116,13 @@ def run_prediction_and_save():
     # --------------------------
     
     print("Generating top 15 players...")
-    data = commander.get_top_15_players()
+    data = commander.get_top_15_players(snapshot)
     starters = data['starters']
     bench = data['bench']
     
     print("Building budget-optimized squad...")
     from backend import squad_builder
-    optimized_squad_data = squad_builder.build_optimal_squad(dm, commander)
+    optimized_squad_data = squad_builder.build_optimal_squad(dm, commander, snapshot=snapshot)
     
     print("Generating recommendations...")
     recommendations = commander.get_tier_captains(starters + bench)
@@ -128,7 +138,7 @@ def run_prediction_and_save():
     dashboard_data = {
         "status": "online",
         "last_updated": datetime.now(timezone.utc).isoformat(),
-        "gameweek": dm.get_upcoming_gameweek(dm.get_bootstrap_static()),
+        "gameweek": snapshot.next_gameweek,
         "total_projected_points": round(total_xp, 2),
         "squad": starters,
         "bench": bench,
@@ -162,13 +172,11 @@ def run_prediction_and_save():
     # Done during self-training loop if actuals exist for previous_gw
     efficiency_score = None
     try:
-        bootstrap = dm.get_bootstrap_static()
-        upcoming_gw = dm.get_upcoming_gameweek(bootstrap)
-        prev_gw = upcoming_gw - 1
+        prev_gw = snapshot.next_gameweek - 1
         
         if str(prev_gw) in metadata:
             print(f"Calculating accuracy for GW{prev_gw}...")
-            actual_events = dm.get_actual_events(prev_gw)
+            actual_events = snapshot.actual_events(prev_gw)
             if actual_events:
                 # Load the prev_gw snapshot to get the recommended squad
                 prev_path = os.path.join(public_dir, metadata[str(prev_gw)]['file'])
@@ -178,8 +186,7 @@ def run_prediction_and_save():
                 prev_squad = prev_data.get('squad', [])
                 hits = 0
                 for p in prev_squad:
-                    p_id = str(p.get('id'))
-                    actual = actual_events.get(p_id)
+                    actual = actual_events.get(p.get('id'))
                     if actual:
                         has_return = (
                             actual.get('goals_scored', 0) > 0 or 
@@ -198,7 +205,7 @@ def run_prediction_and_save():
 
     # --- HISTORICAL SNAPSHOT ---
     print(f"Archiving historical snapshot to {gw_output_path}...")
-    with open(gw_output_path, 'w') as f:
+    with tracing.span("output.json_dump"), open(gw_output_path, 'w') as f:
         json.dump(dashboard_data, f, indent=4)
         
     # Add/Update current GW in metadata
@@ -211,31 +218,45 @@ def run_prediction_and_save():
     # Sort metadata by gameweek for the UI
     sorted_metadata = dict(sorted(metadata.items(), key=lambda x: int(x[0])))
     
-    with open(metadata_path, 'w') as f:
+    with tracing.span("output.json_dump"), open(metadata_path, 'w') as f:
         json.dump(sorted_metadata, f, indent=4)
     # ---------------------------
 
     print(f"Saving latest live data to {output_path}...")
-    with open(output_path, 'w') as f:
+    with tracing.span("output.json_dump"), open(output_path, 'w') as f:
         json.dump(dashboard_data, f, indent=4)
         
+    if dm.cache is not None:
+        print(dm.cache.summary())
+    # Proof of dedup: should always be zero once the snapshot exists
+    print(f"🧮 Data-manager calls after snapshot: {sum(dm.calls.values()) - calls_at_snapshot} "
+          f"(snapshot build: {dict(dm.calls)})")
     print("Success!")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='FPL Static Data Generator')
     parser.add_argument('--force', action='store_true', help='Force data generation regardless of deadline')
+    parser.add_argument('--full-universe', action='store_true',
+                        help=f'Score every available player instead of the top {DEFAULT_CANDIDATE_LIMIT} pre-filter')
+    parser.add_argument('--train-mode', choices=TRAINING_MODES, default="auto",
+                        help='Model update after evaluation: incremental warm start, full refit, or auto (refit policy + drift check)')
+    add_replay_arguments(parser)
+    tracing.add_trace_arguments(parser)
     args = parser.parse_args()
+    apply_replay_arguments(args)
+    tracing.apply_trace_arguments(args)
+    candidate_limit = None if args.full_universe else DEFAULT_CANDIDATE_LIMIT
     
     dm_check = FPLDataManager()
-    storage_check = EngineStorage()
+    storage_check = create_storage()
     
     try:
         if args.force:
             print("Force flag detected. Proceeding with generation.")
-            run_prediction_and_save()
+            run_prediction_and_save(candidate_limit, args.train_mode)
         elif check_deadline_eligibility(dm_check, storage_check):
             print("Deadline criteria met. Proceeding with generation.")
-            run_prediction_and_save()
+            run_prediction_and_save(candidate_limit, args.train_mode)
         else:
             print("Not a refresh day. Skipping generation.")
             sys.exit(0)
@@ -247,3 +268,8 @@ if __name__ == "__main__":
         print("\nTraceback:")
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if tracing.is_enabled():
+            tracing.print_summary()
+            json_path, folded_path = tracing.write_report('backend/data')
+            print(f"⏱️  Trace report written to {json_path} and {folded_path}")
@@ -3,11 +3,23 @@ Squad Builder Module for FPL Predictor
 Builds optimal 15-man squads with formation optimization
 """
 
+import time
+import heapq
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 from backend.engine.data_manager import FPLDataManager
 from backend.engine.commander import EngineCommander
+from backend.engine.snapshot import GameweekSnapshot
+from backend.engine.fixture_index import FixtureIndex
+from backend.engine import tracing
+
+try:
+    from scipy import sparse
+    from scipy.optimize import milp, LinearConstraint, Bounds
+    HAS_MILP = True
+except ImportError:
+    HAS_MILP = False
 
 # Formation configurations: (GK, DEF, MID, FWD)
 # Constraints: 3-5 DEF, 2-5 MID, 1-3 FWD, always 1 GK
@@ -28,34 +40,41 @@ BENCH_SIZE = 4  # 1 GK + 3 outfield
 MAX_PLAYERS_PER_TEAM = 3
 TOTAL_BUDGET = 100.0
 
-def build_optimal_squad(dm: FPLDataManager, commander: EngineCommander, budget: float = TOTAL_BUDGET) -> Dict:
+# Full squad composition by position (GK, DEF, MID, FWD)
+SQUAD_QUOTAS = {1: 2, 2: 5, 3: 5, 4: 3}
+# Starters allowed per position, derived from FORMATIONS
+STARTER_RANGES = {pos: (min(f[pos - 1] for f in FORMATIONS.values()), max(f[pos - 1] for f in FORMATIONS.values()))
+                  for pos in SQUAD_QUOTAS}
+FORMATION_NAMES = {counts: name for name, counts in FORMATIONS.items()}
+# Bench points count at this weight in the exact optimizer's objective (autosub cover)
+BENCH_WEIGHT = 0.1
+
+@tracing.traced("squad_builder.build_optimal_squad")
+def build_optimal_squad(dm: FPLDataManager, commander: EngineCommander, budget: float = TOTAL_BUDGET,
+                        snapshot: Optional[GameweekSnapshot] = None, method: str = "exact") -> Dict:
     """
     Main entry point for squad building.
     Returns optimal 15-man squad with formation and players using Engine predictions.
+    method: "exact" (MILP or branch-and-bound over the full 15-man problem) or "greedy" (legacy heuristic).
     """
     print("Building optimal squad with Intelligence Engine metrics...")
     
-    # 1. Get predictions from the Intelligence Engine
-    # get_top_15_players actually processes ~120 candidates
-    # We'll use the processed results which already have predicted_points and features
-    engine_results = commander.get_top_15_players()
-    
-    # The EngineCommander returns only 15 players by default in get_top_15_players result
-    # We need a wider pool for budget optimization. 
-    # Let's modify commander slightly or just use its logic to get the full processed list.
-    # For now, let's assume we want to optimize from the best candidates.
-    
-    # Actually, EngineCommander.get_top_15_players() returns only 15 players.
-    # We need to process more players to find the best 15-man squad within budget.
+    # EngineCommander.get_top_15_players() returns only 15 players, so we predict
+    # a wider candidate pool here to find the best 15-man squad within budget.
+    all_players = get_all_predicted_players(dm, commander, snapshot)
     
-    # Let's replicate the prediction logic or expose a method in EngineCommander
-    # that returns all processed candidates.
-    
-    # Since I don't want to change EngineCommander.py too much right now, 
-    # I'll use its internal logic to get a larger pool of predicted players.
-    
-    all_players = get_all_predicted_players(dm, commander)
+    if method == "exact":
+        start = time.perf_counter()
+        squad = optimize_squad(all_players, budget)
+        if squad:
+            print(f"🧩 Exact optimizer ({squad['solver']}) solved {len(all_players)} players in {time.perf_counter() - start:.3f}s")
+            return squad
+        print("⚠️ Exact optimizer found no feasible squad, falling back to greedy selection")
     
+    return build_greedy_squad(all_players, budget)
+
+def build_greedy_squad(all_players: List[Dict], budget: float = TOTAL_BUDGET) -> Dict:
+    """Legacy greedy heuristic: best XI per formation with a flat bench reserve, then a greedy bench."""
     # Separate by position
     gk_pool = [p for p in all_players if p['position'] == 1]
     def_pool = [p for p in all_players if p['position'] == 2]
@@ -121,38 +140,41 @@ def build_optimal_squad(dm: FPLDataManager, commander: EngineCommander, budget:
         "bench_predicted_points": round(sum(p['predicted_points'] for p in bench), 2)
     }
 
-def get_all_predicted_players(dm: FPLDataManager, commander: EngineCommander) -> List[Dict]:
+def fixture_multiplier(fdr: int) -> float:
+    """Scales model xP by fixture difficulty (easy fixtures up, hard ones down)."""
+    if fdr <= 2: return 1.15
+    if fdr >= 5: return 0.7
+    if fdr >= 4: return 0.85
+    return 1.0
+
+def position_bias(position: int) -> float:
+    """Favours attackers over GK/DEF in squad-building scores."""
+    return 1.05 if position in [3, 4] else 0.90
+
+@tracing.traced("squad_builder.get_all_predicted_players")
+def get_all_predicted_players(dm: FPLDataManager, commander: EngineCommander,
+                              snapshot: Optional[GameweekSnapshot] = None) -> List[Dict]:
     """Helper to get predicted points for a larger pool of players."""
-    import pandas as pd
-    from backend.engine.feature_factory import FeatureFactory
-    
-    bootstrap = dm.get_bootstrap_static()
-    players = bootstrap['elements']
-    teams = {t['id']: t['name'] for t in bootstrap['teams']}
-    short_names = {t['id']: t['short_name'] for t in bootstrap['teams']}
-    
-    fixtures = dm.get_fixtures()
-    next_gw = dm.get_upcoming_gameweek(bootstrap)
-    gw_fixtures = [f for f in fixtures if f['event'] == next_gw]
+    snapshot = snapshot or commander.build_snapshot()
+    players = snapshot.players
+    teams = {t['id']: t['name'] for t in snapshot.teams}
+    short_names = {t['id']: t['short_name'] for t in snapshot.teams}
     
-    team_diff = {}
-    for f in gw_fixtures:
-        team_diff[f['team_h']] = f['team_h_difficulty']
-        team_diff[f['team_a']] = f['team_a_difficulty']
+    next_gw = snapshot.next_gameweek
+    gw_fixtures = snapshot.fixture_index.gameweek(next_gw)
+    team_vulnerability = {t['id']: snapshot.team_stats.vulnerability(t['id']) for t in snapshot.teams}
 
-    # Process fewer candidates for stability (120 is plenty for a 15-man squad)
-    candidates = sorted(players, key=lambda x: (float(x.get('form') or 0) * 1.5) + float(x.get('points_per_game') or 0), reverse=True)[:120]
+    # Same candidate pool as the commander (top 120 by default, or the full universe)
+    candidates = commander.prefilter_candidates(players, commander.candidate_limit)
     
     valid_players = []
-    player_features = []
 
     for p in candidates:
         if p['status'] != 'a' and p['status'] != 'd': continue
+        if not snapshot.has_summary(p['id']): continue
+        if not gw_fixtures.get(p['team']): continue # Blank gameweek
         
-        import time
-        time.sleep(0.05) # Rate limit protection
-        summary = dm.get_player_summary(p['id'])
-        history = summary.get('history', [])
+        history = snapshot.history(p['id'])
         last_5 = history[-5:] if history else []
         avg_minutes = sum(m['minutes'] for m in last_5) / len(last_5) if last_5 else 0
         
@@ -160,63 +182,39 @@ def get_all_predicted_players(dm: FPLDataManager, commander: EngineCommander) ->
         chance = p.get('chance_of_playing_next_round')
         chance_mult = (float(chance) / 100.0) if chance is not None else 1.0
         
-        diff = team_diff.get(p['team'], 3)
-        features = FeatureFactory.prepare_features(p, history, diff, next_gw)
-        
-        player_features.append(features)
         valid_players.append({
             "p": p,
-            "features": features,
-            "diff": diff,
+            "fixtures": gw_fixtures[p['team']],
             "avg_minutes": avg_minutes,
             "chance_mult": chance_mult
         })
 
     if not valid_players: return []
 
-    feature_df = pd.DataFrame(player_features)
+    # One row per (player, fixture): double gameweek players score both matches
+    feature_df, owners = commander.batch_features(snapshot, valid_players, next_gw, team_vulnerability)
     commander.trainer.load_model()
     event_predictions = commander.trainer.predict(feature_df)
     
-    # Translate to Expected Points (xP) using player positions
-    positions = [item['p']['element_type'] for item in valid_players]
-    xp_points = commander.trainer.translate_to_xp(event_predictions, positions)
+    # Translate to Expected Points (xP) using player positions, scaled by each fixture's difficulty
+    positions = [valid_players[i]['p']['element_type'] for i in owners]
+    xp_points = np.asarray(commander.trainer.translate_to_xp(event_predictions, positions), dtype=float)
+    fixture_scale = [fixture_multiplier(f.difficulty) for item in valid_players for f in item['fixtures']]
+    fixture_points = commander.sum_by_player(xp_points * fixture_scale, owners, len(valid_players))
 
     processed = []
     for i, item in enumerate(valid_players):
         p = item['p']
-        fdr = item['diff']
+        fdr = item['fixtures'][0].difficulty
         
         # Probabilistic xP Prediction
-        prediction = float(xp_points[i])
         # performance_boost removed to match commander.py and prevent inflation
-        
-        fixture_multiplier = 1.0
-        if fdr <= 2: fixture_multiplier = 1.15
-        elif fdr >= 5: fixture_multiplier = 0.7
-        elif fdr >= 4: fixture_multiplier = 0.85
-        
-        pos_bias = 1.05 if p['element_type'] in [3, 4] else 0.90
-        
-        final_score = round(prediction * fixture_multiplier * pos_bias * item['chance_mult'], 2)
+        final_score = round(float(fixture_points[i]) * position_bias(p['element_type']) * item['chance_mult'], 2)
         
         # Calculate a value score for bench selection
         price = p['now_cost'] / 10.0
         value_score = final_score / price if price > 0 else 0
 
-        # Opponent name
-        opponent_name = "???"
-        venue = ""
-        for f in gw_fixtures:
-            if f['team_h'] == p['team']:
-                opponent_name = short_names.get(f['team_a'], "???")
-                venue = "(H)"
-                break
-            elif f['team_a'] == p['team']:
-                opponent_name = short_names.get(f['team_h'], "???")
-                venue = "(A)"
-                break
-        
         processed.append({
             "id": p['id'],
             "web_name": p['web_name'],
@@ -231,7 +229,7 @@ def get_all_predicted_players(dm: FPLDataManager, commander: EngineCommander) ->
             "xG": round(float(p.get('expected_goals', 0)), 2),
             "xA": round(float(p.get('expected_assists', 0)), 2),
             "avg_minutes": round(item['avg_minutes'], 1),
-            "next_fixture": f"{opponent_name} {venue}",
+            "next_fixture": FixtureIndex.label(item['fixtures'], short_names),
             "next_fixture_difficulty": fdr,
             "explosivity": float(item['features'].get('explosivity', 0)),
             "ownership": float(item['features'].get('selected_by', 0)),
@@ -316,6 +314,266 @@ def select_bench(
             
     return bench
 
+# --- Exact optimizer ---
+
+def squad_objective(starting_11: List[Dict], bench: List[Dict], bench_weight: float = BENCH_WEIGHT) -> float:
+    """Value the exact optimizer maximizes: starter points plus weighted bench points."""
+    return sum(p['predicted_points'] for p in starting_11) + bench_weight * sum(p['predicted_points'] for p in bench)
+
+def prune_dominated(players: List[Dict]) -> List[Dict]:
+    """
+    Drops players who cannot appear in any optimal squad. A player is dominated when same-position
+    players that are no more expensive and predicted at least as high come from quota + 5 distinct teams:
+    15 players fill at most 5 teams to the 3-per-team cap, so one of those alternatives is always free to swap in.
+    """
+    kept = []
+    for pos, quota in SQUAD_QUOTAS.items():
+        # Cheapest first; ties broken by points then id so dominance is a strict order
+        pool = sorted((p for p in players if p['position'] == pos),
+                      key=lambda p: (p['price'], -p['predicted_points'], p['id']))
+        best_by_team: Dict[int, float] = {}
+        for p in pool:
+            dominating_teams = sum(1 for pts in best_by_team.values() if pts >= p['predicted_points'])
+            if dominating_teams < quota + 5:
+                kept.append(p)
+            best_by_team[p['team_id']] = max(best_by_team.get(p['team_id'], float('-inf')), p['predicted_points'])
+    return kept
+
+@tracing.traced("squad_builder.optimize_squad")
+def optimize_squad(players: List[Dict], budget: float = TOTAL_BUDGET, bench_weight: float = BENCH_WEIGHT,
+                   method: str = "auto") -> Optional[Dict]:
+    """
+    Exact 15-man squad selection: budget, 2/5/5/3 squad, a valid formation, max 3 per team,
+    maximizing starter points + bench_weight * bench points.
+    method: "milp" (scipy HiGHS), "bnb" (pure-Python branch-and-bound) or "auto" (MILP when scipy is available).
+    Returns None when no feasible squad exists.
+    """
+    if method == "auto":
+        method = "milp" if HAS_MILP else "bnb"
+    candidates = prune_dominated(players)
+    if method == "milp":
+        if not HAS_MILP:
+            raise ImportError("scipy>=1.9 is required for the MILP squad optimizer")
+        picked = _solve_milp(candidates, budget, bench_weight)
+    elif method == "bnb":
+        picked = _solve_branch_and_bound(candidates, budget, bench_weight)
+    else:
+        raise ValueError(f"Unknown squad optimizer method: {method}")
+    if picked is None:
+        return None
+
+    starting_11, bench = picked
+    result = _squad_result(starting_11, bench)
+    result["solver"] = method
+    return result
+
+def _squad_result(starting_11: List[Dict], bench: List[Dict]) -> Dict:
+    """Same shape as the greedy builder's output; XI ordered GK->FWD, bench GK first then by points."""
+    starting_11 = sorted(starting_11, key=lambda p: (p['position'], -p['predicted_points']))
+    bench = sorted(bench, key=lambda p: (p['position'] != 1, -p['predicted_points']))
+    counts = tuple(sum(1 for p in starting_11 if p['position'] == pos) for pos in SQUAD_QUOTAS)
+    return {
+        "formation": FORMATION_NAMES.get(counts, "-".join(map(str, counts[1:]))),
+        "starting_11": starting_11,
+        "bench": bench,
+        "total_cost": round(sum(p['price'] for p in starting_11 + bench), 1),
+        "total_predicted_points": round(sum(p['predicted_points'] for p in starting_11), 2),
+        "bench_predicted_points": round(sum(p['predicted_points'] for p in bench), 2)
+    }
+
+def _price_tenths(player: Dict) -> int:
+    # Integer prices keep the budget constraint exact
+    return int(round(player['price'] * 10))
+
+def _solve_milp(players: List[Dict], budget: float, bench_weight: float) -> Optional[Tuple[List[Dict], List[Dict]]]:
+    """Binary program over x (in squad) and s (starter): maximize bench_weight*pts*x + (1-bench_weight)*pts*s."""
+    n = len(players)
+    if n == 0:
+        return None
+    pts = np.array([p['predicted_points'] for p in players], dtype=float)
+    cost = np.array([_price_tenths(p) for p in players], dtype=float)
+    pos = np.array([p['position'] for p in players])
+    team_ids = sorted({p['team_id'] for p in players})
+    team = np.array([team_ids.index(p['team_id']) for p in players])
+
+    rows, lower, upper = [], [], []
+    def add(x_coef, s_coef, lo, hi):
+        rows.append(np.concatenate([x_coef, s_coef]))
+        lower.append(lo)
+        upper.append(hi)
+
+    zeros = np.zeros(n)
+    add(cost, zeros, -np.inf, int(round(budget * 10)))
+    add(zeros, np.ones(n), 11, 11)
+    for p_type, quota in SQUAD_QUOTAS.items():
+        mask = (pos == p_type).astype(float)
+        add(mask, zeros, quota, quota)
+        add(zeros, mask, *STARTER_RANGES[p_type])
+    for t in range(len(team_ids)):
+        add((team == t).astype(float), zeros, 0, MAX_PLAYERS_PER_TEAM)
+    # A starter must be in the squad: s_i - x_i <= 0
+    link = sparse.hstack([-sparse.eye(n), sparse.eye(n)])
+
+    constraints = [LinearConstraint(sparse.csr_matrix(np.array(rows)), lower, upper), LinearConstraint(link, -np.inf, 0)]
+    objective = -np.concatenate([bench_weight * pts, (1 - bench_weight) * pts])
+    res = milp(objective, constraints=constraints, integrality=np.ones(2 * n), bounds=Bounds(0, 1))
+    if res.x is None:
+        return None
+
+    in_squad = res.x[:n] > 0.5
+    starts = res.x[n:] > 0.5
+    starting_11 = [p for i, p in enumerate(players) if starts[i]]
+    bench = [p for i, p in enumerate(players) if in_squad[i] and not starts[i]]
+    return starting_11, bench
+
+def _position_table(pts: List[float], costs: List[int], quota: int, starters: int,
+                    bench_weight: float, budget: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cardinality knapsack for one position: best[c] = max value of `quota` players costing <= c.
+    Players arrive in descending points, so the first `starters` picks are the starters.
+    Returns (best, take) where take[i, k, c] records whether player i was the k-th pick.
+    """
+    n = len(pts)
+    value = np.full((quota + 1, budget + 1), -np.inf)
+    value[0] = 0.0
+    take = np.zeros((n, quota + 1, budget + 1), dtype=bool)
+    for i in range(n):
+        cost = costs[i]
+        if cost > budget:
+            continue
+        for k in range(min(i + 1, quota), 0, -1):
+            gain = pts[i] if k <= starters else bench_weight * pts[i]
+            candidate = value[k - 1, :budget + 1 - cost] + gain
+            better = candidate > value[k, cost:]
+            value[k, cost:][better] = candidate[better]
+            take[i, k, cost:] = better
+    return value[quota], take
+
+def _merge(f: np.ndarray, g: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Max-plus convolution of two budget tables; split[c] is the budget given to f."""
+    budget = len(f) - 1
+    merged = np.full(budget + 1, -np.inf)
+    split = np.zeros(budget + 1, dtype=np.int64)
+    # f is non-decreasing, so only budgets where it steps up can be the best split
+    steps = np.flatnonzero(np.isfinite(f) & (f > np.concatenate([[-np.inf], f[:-1]])))
+    for a in steps.tolist():
+        candidate = f[a] + g[:budget + 1 - a]
+        better = candidate > merged[a:]
+        np.copyto(merged[a:], candidate, where=better)
+        np.copyto(split[a:], a, where=better)
+    return merged, split
+
+class _BranchAndBound:
+    """
+    Best-first branch-and-bound over the 3-per-team cap. Each node solves the budget-constrained
+    squad problem exactly with the team cap relaxed (per-position knapsack tables merged across
+    positions), which is also the node's upper bound. Nodes whose squad breaks a team cap branch
+    on excluding one of that team's selected players.
+    """
+
+    POSITIONS = (1, 2, 3, 4)
+
+    def __init__(self, players: List[Dict], budget: float, bench_weight: float):
+        self.budget = int(round(budget * 10))
+        self.bench_weight = bench_weight
+        self.pools = {pos: sorted((p for p in players if p['position'] == pos), key=lambda p: -p['predicted_points'])
+                      for pos in self.POSITIONS}
+        self.ids = {pos: {p['id'] for p in pool} for pos, pool in self.pools.items()}
+        self._tables: Dict[Tuple, Tuple[np.ndarray, np.ndarray, List[Dict]]] = {}
+        self._merges: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = {}
+        self.nodes = 0
+
+    def _key(self, pos: int, starters: int, excluded: frozenset) -> Tuple:
+        # Keyed on this position's exclusions only, so a child node rebuilds just one position's tables
+        return (pos, starters, frozenset(pid for pid in excluded if pid in self.ids[pos]))
+
+    def _table(self, pos: int, starters: int, excluded: frozenset):
+        key = self._key(pos, starters, excluded)
+        if key not in self._tables:
+            pool = [p for p in self.pools[pos] if p['id'] not in excluded]
+            best, take = _position_table([p['predicted_points'] for p in pool], [_price_tenths(p) for p in pool],
+                                         SQUAD_QUOTAS[pos], starters, self.bench_weight, self.budget)
+            self._tables[key] = (best, take, pool)
+        return self._tables[key]
+
+    def _picks(self, pos: int, starters: int, excluded: frozenset, budget: int) -> List[Tuple[Dict, bool]]:
+        _, take, pool = self._table(pos, starters, excluded)
+        picks, k = [], SQUAD_QUOTAS[pos]
+        for i in range(len(pool) - 1, -1, -1):
+            if k and take[i, k, budget]:
+                picks.append((pool[i], k <= starters))
+                budget -= _price_tenths(pool[i])
+                k -= 1
+        return picks
+
+    def _merged(self, key: Tuple, tables):
+        if key not in self._merges:
+            self._merges[key] = _merge(*tables())
+        return self._merges[key]
+
+    def relaxed(self, excluded: frozenset) -> Tuple[float, Optional[List[Tuple[Dict, bool]]]]:
+        """Best squad under budget and formation rules, ignoring the team cap."""
+        self.nodes += 1
+        best_value, best_plan = -np.inf, None
+        for _, n_def, n_mid, n_fwd in FORMATIONS.values():
+            defence_key = (self._key(1, 1, excluded), self._key(2, n_def, excluded))
+            defence, defence_split = self._merged(defence_key, lambda: (self._table(1, 1, excluded)[0], self._table(2, n_def, excluded)[0]))
+            outfield_key = defence_key + (self._key(3, n_mid, excluded),)
+            outfield, outfield_split = self._merged(outfield_key, lambda: (defence, self._table(3, n_mid, excluded)[0]))
+            fwd_table = self._table(4, n_fwd, excluded)[0]
+            totals = outfield + fwd_table[::-1]
+            a = int(np.argmax(totals))
+            if totals[a] > best_value:
+                best_value = float(totals[a])
+                best_plan = (n_def, n_mid, n_fwd, a, int(outfield_split[a]), int(defence_split[int(outfield_split[a])]))
+        if best_plan is None or best_value == -np.inf:
+            return -np.inf, None
+
+        n_def, n_mid, n_fwd, to_outfield, to_defence, to_gk = best_plan
+        picks = self._picks(1, 1, excluded, to_gk)
+        picks += self._picks(2, n_def, excluded, to_defence - to_gk)
+        picks += self._picks(3, n_mid, excluded, to_outfield - to_defence)
+        picks += self._picks(4, n_fwd, excluded, self.budget - to_outfield)
+        return best_value, picks
+
+    def solve(self) -> Optional[Tuple[List[Dict], List[Dict]]]:
+        best_value, best_picks = -np.inf, None
+        root = frozenset()
+        value, picks = self.relaxed(root)
+        frontier = [(-value, 0, root, picks)]
+        seen = {root}
+        counter = 1
+        while frontier:
+            neg_bound, _, excluded, picks = heapq.heappop(frontier)
+            if picks is None or -neg_bound <= best_value + 1e-9:
+                continue
+            by_team = defaultdict(list)
+            for p, _ in picks:
+                by_team[p['team_id']].append(p)
+            over = max(by_team.values(), key=len)
+            if len(over) <= MAX_PLAYERS_PER_TEAM:
+                best_value, best_picks = -neg_bound, picks
+                continue
+            # Any feasible squad leaves out at least one of these players
+            for p in over:
+                child = excluded | {p['id']}
+                if child in seen:
+                    continue
+                seen.add(child)
+                value, child_picks = self.relaxed(child)
+                if child_picks is not None and value > best_value + 1e-9:
+                    heapq.heappush(frontier, (-value, counter, child, child_picks))
+                    counter += 1
+
+        if best_picks is None:
+            return None
+        return [p for p, starter in best_picks if starter], [p for p, starter in best_picks if not starter]
+
+def _solve_branch_and_bound(players: List[Dict], budget: float, bench_weight: float) -> Optional[Tuple[List[Dict], List[Dict]]]:
+    if any(sum(1 for p in players if p['position'] == pos) < quota for pos, quota in SQUAD_QUOTAS.items()):
+        return None
+    return _BranchAndBound(players, budget, bench_weight).solve()
+
 def get_squad_summary(squad: Dict) -> Dict:
     if 'error' in squad: return squad
     return {
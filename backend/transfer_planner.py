@@ -0,0 +1,461 @@
+"""
+Transfer Planner Module for FPL Predictor
+Plans transfers (including -4 hits) for an existing squad over a multi-gameweek horizon
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from backend.engine.data_manager import FPLDataManager
+from backend.engine.storage import create_storage
+from backend.engine.trainer import modelTrainer
+from backend.engine.commander import EngineCommander, DEFAULT_CANDIDATE_LIMIT
+from backend.engine.feature_factory import FeatureFactory
+from backend.engine.snapshot import GameweekSnapshot
+from backend.engine.replay import add_replay_arguments, apply_replay_arguments
+from backend.squad_builder import (fixture_multiplier, position_bias, optimize_squad, SQUAD_QUOTAS,
+                                   MAX_PLAYERS_PER_TEAM, TOTAL_BUDGET, BENCH_WEIGHT)
+
+DEFAULT_HORIZON = 5
+HIT_COST = 4
+MAX_FREE_TRANSFERS = 5
+
+# Row offsets of each position inside a squad key (rows are ordered by position, so a sorted squad is 2/5/5/3)
+_GK, _DEF, _MID, _FWD = slice(0, 2), slice(2, 7), slice(7, 12), slice(12, 15)
+
+Squad = Tuple[int, ...]
+State = Tuple[Squad, int, int] # (squad rows, bank in tenths, free transfers)
+
+
+@dataclass(frozen=True)
+class HorizonPredictions:
+    """Predicted points per player (rows, ordered by position then id) for each upcoming gameweek (columns)."""
+    gameweeks: List[int]
+    players: List[Dict]
+    points: np.ndarray
+    row: Dict[int, int]
+    # Model output per (player, fixture) behind `points`, kept so point distributions can be sampled later
+    fixture_rows: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=int))
+    fixture_cols: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=int))
+    fixture_scale: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    fixture_ids: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=int))
+    fixture_opponents: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=int))
+    event_predictions: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def positions(self) -> np.ndarray:
+        return np.array([p['position'] for p in self.players])
+
+    def sample(self, trainer: modelTrainer, rows: List[int], n_sims: int, seed: Optional[int] = None,
+               joint: bool = False) -> np.ndarray:
+        """
+        Monte Carlo points for the given player rows as a (len(rows), n_gameweeks, n_sims) array.
+        Each fixture is drawn separately (doubles sum two draws) and scaled like `points`. With `joint`, teammates
+        share team goals and clean sheets (MatchSimulator) instead of being drawn independently.
+        """
+        samples = np.zeros((len(rows), len(self.gameweeks), n_sims))
+        lookup = np.full(len(self.players), -1)
+        lookup[np.asarray(rows, dtype=int)] = np.arange(len(rows))
+        mask = lookup[self.fixture_rows] >= 0
+        if mask.any():
+            if joint:
+                teams = np.array([p['team_id'] for p in self.players])[self.fixture_rows]
+                dist = trainer.joint_points_distribution(self.event_predictions, self.positions[self.fixture_rows].tolist(),
+                                                         self.fixture_ids, teams, self.fixture_opponents, n_sims, seed, mask)
+            else:
+                subset = {target: np.asarray(values)[mask] for target, values in self.event_predictions.items()}
+                dist = trainer.points_distribution(subset, self.positions[self.fixture_rows[mask]].tolist(), n_sims, seed=seed)
+            np.add.at(samples, (lookup[self.fixture_rows[mask]], self.fixture_cols[mask]),
+                      dist.samples * self.fixture_scale[mask][:, None])
+        return samples
+
+
+def upcoming_gameweeks(snapshot: GameweekSnapshot, horizon: int = DEFAULT_HORIZON) -> List[int]:
+    """The next `horizon` gameweeks, stopping at the last scheduled one."""
+    last = snapshot.fixture_index.last_gameweek or snapshot.next_gameweek
+    return [gw for gw in range(snapshot.next_gameweek, snapshot.next_gameweek + horizon) if gw <= last]
+
+
+def predict_horizon(commander: EngineCommander, snapshot: GameweekSnapshot, horizon: int = DEFAULT_HORIZON,
+                    include_ids: Tuple[int, ...] = ()) -> HorizonPredictions:
+    """
+    Predicts points for the candidate pool (plus `include_ids`, e.g. the current squad) over the next `horizon` gameweeks.
+    Uses the squad builder's scoring per fixture; double gameweeks sum both fixtures and blanks score zero.
+    """
+    gameweeks = upcoming_gameweeks(snapshot, horizon)
+    by_id = {p['id']: p for p in snapshot.players}
+
+    # 1. Same candidate pool as the squad builder, plus the players we already own
+    pool = {p['id']: p for p in commander.prefilter_candidates(snapshot.players, commander.candidate_limit)
+            if p['status'] in ('a', 'd') and snapshot.has_summary(p['id'])}
+    pool.update({pid: by_id[pid] for pid in include_ids if pid in by_id})
+    elements = sorted(pool.values(), key=lambda p: (p['element_type'], p['id']))
+    elements_df = pd.DataFrame(elements)
+    positions = elements_df['element_type'].to_numpy()
+    teams = elements_df['team'].to_numpy()
+
+    # Chance of playing only covers the next round; players who have left the club ('u') never score
+    chance = np.array([1.0 if p.get('chance_of_playing_next_round') is None else float(p['chance_of_playing_next_round']) / 100.0
+                       for p in elements])
+    gone = np.array([p.get('status') == 'u' for p in elements])
+
+    # 2. One feature row per (player, fixture): a double gameweek adds a second slot
+    frames, rows, cols, diffs, fixture_ids, opponents = [], [], [], [], [], []
+    for col, gw in enumerate(gameweeks):
+        fixtures = snapshot.fixture_index.gameweek(gw)
+        for slot in range(max((len(v) for v in fixtures.values()), default=0)):
+            idx = np.array([i for i, t in enumerate(teams) if len(fixtures.get(t, ())) > slot], dtype=int)
+            if not len(idx):
+                continue
+            slot_fixtures = (fixtures[teams[i]][slot] for i in idx)
+            fixture_id, opponent, slot_diff = (np.array(v) for v in zip(*((f.fixture_id, f.opponent, f.difficulty) for f in slot_fixtures)))
+            vulnerability = np.array([snapshot.team_stats.vulnerability(int(o)) for o in opponent])
+            frames.append(FeatureFactory.prepare_features_batch(elements_df.iloc[idx], snapshot.history_frame, slot_diff, gw,
+                                                                vulnerability))
+            rows.append(idx)
+            cols.append(np.full(len(idx), col))
+            diffs.append(slot_diff)
+            fixture_ids.append(fixture_id)
+            opponents.append(opponent)
+
+    points = np.zeros((len(elements), len(gameweeks)))
+    rows, cols, fixture_ids, opponents = (np.concatenate(v or [np.zeros(0, dtype=int)]) for v in (rows, cols, fixture_ids, opponents))
+    scale, event_predictions = np.zeros(0), {}
+    if frames:
+        diffs = np.concatenate(diffs)
+
+        # 3. A single model pass over every (player, fixture) row
+        commander.trainer.load_model()
+        feature_df = pd.concat(frames, ignore_index=True)
+        event_predictions = commander.trainer.predict(feature_df)
+        xp_points = commander.trainer.translate_to_xp(event_predictions, positions[rows].tolist())
+
+        scale = np.array([fixture_multiplier(d) for d in diffs]) * np.array([position_bias(p) for p in positions[rows]])
+        scale *= np.where(cols == 0, chance[rows], 1.0) * ~gone[rows]
+        np.add.at(points, (rows, cols), np.asarray(xp_points, dtype=float) * scale)
+
+    players = [{
+        "id": p['id'],
+        "web_name": p['web_name'],
+        "team_id": p['team'],
+        "position": p['element_type'],
+        "price": p['now_cost'] / 10.0,
+    } for p in elements]
+    return HorizonPredictions(gameweeks, players, points.round(2), {p['id']: i for i, p in enumerate(players)},
+                              rows, cols, scale, fixture_ids, opponents, event_predictions)
+
+
+class SquadEvaluator:
+    """
+    Per-gameweek value of a 15-man squad: best legal XI + captain (counted twice) + weighted bench.
+    Vectorized over the horizon and memoized by squad, so repeated states during the search are free.
+    """
+
+    def __init__(self, points: np.ndarray, bench_weight: float = BENCH_WEIGHT):
+        self.points = points
+        self.bench_weight = bench_weight
+        self._cache: Dict[Squad, np.ndarray] = {}
+        self.evaluations = 0
+
+    def __call__(self, squad: Squad) -> np.ndarray:
+        value = self._cache.get(squad)
+        if value is not None:
+            return value
+        self.evaluations += 1
+
+        pts = self.points[list(squad)]
+        gk = np.sort(pts[_GK], axis=0)
+        defs, mids, fwds = np.sort(pts[_DEF], axis=0), np.sort(pts[_MID], axis=0), np.sort(pts[_FWD], axis=0)
+
+        # Formation minimums first, then the best 4 of the 7 remaining outfielders
+        forced = defs[-3:].sum(axis=0) + mids[-2:].sum(axis=0) + fwds[-1]
+        flex = np.sort(np.concatenate([defs[:-3], mids[:-2], fwds[:-1]]), axis=0)[-4:].sum(axis=0)
+        starting = gk[-1] + forced + flex
+        bench = gk[0] + pts[2:].sum(axis=0) - forced - flex
+        # The best outfielder always starts, so the captain is either that player or the starting GK
+        captain = np.maximum(gk[-1], pts[2:].max(axis=0))
+
+        value = starting + captain + self.bench_weight * bench
+        self._cache[squad] = value
+        return value
+
+    def lineup(self, squad: Squad, col: int) -> Dict:
+        """Starting XI, bench and captain rows for one gameweek (same rules as __call__)."""
+        pts = self.points[:, col]
+        gk, defs, mids, fwds = (sorted(squad[block], key=lambda r: -pts[r]) for block in (_GK, _DEF, _MID, _FWD))
+        flex = sorted(defs[3:] + mids[2:] + fwds[1:], key=lambda r: -pts[r])
+        starting = gk[:1] + defs[:3] + mids[:2] + fwds[:1] + flex[:4]
+        captain = max(starting, key=lambda r: pts[r])
+        return {
+            "starting_11": starting,
+            "bench": gk[1:] + flex[4:],
+            "captain": captain,
+            "expected_points": float(pts[starting].sum() + pts[captain]),
+        }
+
+
+class TransferPlanner:
+    """
+    Searches transfer sequences over the horizon with a beam over (squad, bank, free transfers) states.
+    Duplicate states are merged (memoization), dominated ones dropped, and each state only considers the
+    best `candidates_per_position` buys per position and the best `branching` moves per transfer count.
+    """
+
+    def __init__(self, predictions: HorizonPredictions, max_transfers: int = 2, max_hits: int = 1,
+                 beam_width: int = 30, candidates_per_position: int = 6, branching: int = 8,
+                 bench_weight: float = BENCH_WEIGHT):
+        self.predictions = predictions
+        self.max_transfers = max_transfers
+        self.max_hits = max_hits
+        self.beam_width = beam_width
+        self.candidates_per_position = candidates_per_position
+        self.branching = branching
+        self.evaluate = SquadEvaluator(predictions.points, bench_weight)
+
+        players = predictions.players
+        self.positions = predictions.positions
+        self.teams = np.array([p['team_id'] for p in players])
+        self.prices = np.array([int(round(p['price'] * 10)) for p in players])
+        self.sell_prices = self.prices.copy()
+        self._moves_cache: Dict[Tuple[Squad, int, int], List[Tuple]] = {}
+
+        # Buy candidates per position, best remaining-horizon points first, for every starting gameweek
+        remaining = predictions.points[:, ::-1].cumsum(axis=1)[:, ::-1]
+        self._buy_order = {(pos, col): [int(r) for r in np.argsort(-remaining[:, col], kind='stable') if self.positions[r] == pos]
+                           for pos in SQUAD_QUOTAS for col in range(len(predictions.gameweeks))}
+
+    def squad_key(self, player_ids: List[int]) -> Squad:
+        """Squad rows for a list of player ids, validated against the 2/5/5/3 quota and team cap."""
+        missing = [pid for pid in player_ids if pid not in self.predictions.row]
+        if missing:
+            raise ValueError(f"Players not in the prediction pool: {missing}")
+        squad = tuple(sorted(self.predictions.row[pid] for pid in player_ids))
+        counts = Counter(self.positions[r] for r in squad)
+        if len(set(squad)) != sum(SQUAD_QUOTAS.values()) or any(counts[pos] != n for pos, n in SQUAD_QUOTAS.items()):
+            raise ValueError(f"Squad must be 15 distinct players with quotas {SQUAD_QUOTAS}")
+        if max(Counter(self.teams[r] for r in squad).values()) > MAX_PLAYERS_PER_TEAM:
+            raise ValueError(f"Squad has more than {MAX_PLAYERS_PER_TEAM} players from one team")
+        return squad
+
+    def _moves(self, squad: Squad, bank: int, col: int) -> List[Tuple]:
+        """Candidate transfer sets from a state: [(transfers, new squad, new bank)], best per transfer count first."""
+        key = (squad, bank, col)
+        if key in self._moves_cache:
+            return self._moves_cache[key]
+
+        owned = set(squad)
+        team_counts = Counter(self.teams[r] for r in squad)
+        base = self.evaluate(squad)[col:].sum()
+
+        def apply(transfers):
+            out_rows = {o for o, _ in transfers}
+            new_squad = tuple(sorted([r for r in squad if r not in out_rows] + [i for _, i in transfers]))
+            new_bank = bank + sum(self.sell_prices[o] - self.prices[i] for o, i in transfers)
+            return new_squad, new_bank
+
+        def legal(transfers) -> bool:
+            counts = team_counts.copy()
+            for o, i in transfers:
+                counts[self.teams[o]] -= 1
+                counts[self.teams[i]] += 1
+            return max(counts[self.teams[i]] for _, i in transfers) <= MAX_PLAYERS_PER_TEAM
+
+        # 1. Every single swap against the top buys for that position (budget ignored here, so pairs can fund each other)
+        singles = []
+        for pos in SQUAD_QUOTAS:
+            buys = [r for r in self._buy_order[(pos, col)] if r not in owned][:self.candidates_per_position]
+            for out_row in (r for r in squad if self.positions[r] == pos):
+                for in_row in buys:
+                    transfer = ((out_row, in_row),)
+                    if legal(transfer):
+                        new_squad, _ = apply(transfer)
+                        singles.append((self.evaluate(new_squad)[col:].sum() - base, transfer))
+        singles.sort(key=lambda x: -x[0])
+
+        # 2. Extend the best k-transfer sets by one more swap, up to max_transfers
+        moves = [((), squad, bank)]
+        level = singles[:self.branching * 2]
+        pair_pool = singles[:self.branching * 2]
+        for n in range(1, self.max_transfers + 1):
+            affordable = []
+            for gain, transfers in level:
+                new_squad, new_bank = apply(transfers)
+                if new_bank >= 0:
+                    affordable.append((gain, transfers, new_squad, new_bank))
+            moves += [(transfers, new_squad, new_bank) for _, transfers, new_squad, new_bank in affordable[:self.branching]]
+            if n == self.max_transfers:
+                break
+
+            extended, seen = [], set()
+            for _, transfers in level[:self.branching * 2]:
+                used = {r for t in transfers for r in t}
+                for _, ((o, i),) in pair_pool:
+                    if o in used or i in used:
+                        continue
+                    combined = tuple(sorted(transfers + ((o, i),)))
+                    if combined in seen or not legal(combined):
+                        continue
+                    seen.add(combined)
+                    new_squad, _ = apply(combined)
+                    extended.append((self.evaluate(new_squad)[col:].sum() - base, combined))
+            level = sorted(extended, key=lambda x: -x[0])
+
+        self._moves_cache[key] = moves
+        return moves
+
+    def plan(self, player_ids: List[int], bank: float = 0.0, free_transfers: int = 1,
+             selling_prices: Optional[Dict[int, float]] = None) -> Dict:
+        """Best transfer plan for the horizon from the given squad, bank (m) and free transfers."""
+        start = time.perf_counter()
+        squad = self.squad_key(player_ids)
+        self.sell_prices = self.prices.copy()
+        for pid, price in (selling_prices or {}).items():
+            if pid in self.predictions.row:
+                self.sell_prices[self.predictions.row[pid]] = int(round(price * 10))
+        self._moves_cache.clear()
+
+        n_cols = len(self.predictions.gameweeks)
+        root: State = (squad, int(round(bank * 10)), min(free_transfers, MAX_FREE_TRANSFERS))
+        frontier = {root: 0.0}
+        parents: List[Dict[State, Tuple[State, Tuple, int]]] = []
+        explored = 0
+
+        for col in range(n_cols):
+            values: Dict[State, float] = {}
+            links: Dict[State, Tuple[State, Tuple, int]] = {}
+            for state, value in frontier.items():
+                squad_rows, bank_tenths, ft = state
+                explored += 1
+                for transfers, new_squad, new_bank in self._moves(squad_rows, bank_tenths, col):
+                    hits = max(0, len(transfers) - ft)
+                    if hits > self.max_hits:
+                        continue
+                    next_ft = min(MAX_FREE_TRANSFERS, max(ft - len(transfers), 0) + 1)
+                    child = (new_squad, new_bank, next_ft)
+                    child_value = value + self.evaluate(new_squad)[col] - HIT_COST * hits
+                    if child_value > values.get(child, -np.inf):
+                        values[child] = child_value
+                        links[child] = (state, transfers, hits)
+
+            # Prune: a state is dominated by the same squad with at least as much bank, free transfers and points
+            best_by_squad = defaultdict(list)
+            for state in sorted(values, key=lambda s: -values[s]):
+                kept = best_by_squad[state[0]]
+                if not any(o[1] >= state[1] and o[2] >= state[2] for o in kept):
+                    kept.append(state)
+
+            # Beam: rank by points so far plus holding the squad for the rest of the horizon
+            survivors = [s for kept in best_by_squad.values() for s in kept]
+            survivors.sort(key=lambda s: -(values[s] + self.evaluate(s[0])[col + 1:].sum()))
+            frontier = {s: values[s] for s in survivors[:self.beam_width]}
+            parents.append(links)
+
+        # Backtrack the best final state into per-gameweek steps
+        state = max(frontier, key=frontier.get)
+        total = frontier[state]
+        path = []
+        for col in range(n_cols - 1, -1, -1):
+            parent, transfers, hits = parents[col][state]
+            path.append((col, parent, state, transfers, hits))
+            state = parent
+        path.reverse()
+
+        steps = []
+        for col, parent, child, transfers, hits in path:
+            lineup = self.evaluate.lineup(child[0], col)
+            steps.append({
+                "gameweek": self.predictions.gameweeks[col],
+                "free_transfers": parent[2],
+                "transfers": [{"out": self._player(o), "in": self._player(i)} for o, i in transfers],
+                "hits": hits,
+                "bank": child[1] / 10.0,
+                "captain": self._player(lineup["captain"])['web_name'],
+                "starting_11": [self._player(r) for r in lineup["starting_11"]],
+                "bench": [self._player(r) for r in lineup["bench"]],
+                "expected_points": round(lineup["expected_points"] - HIT_COST * hits, 2),
+            })
+
+        baseline = sum(self.evaluate.lineup(squad, col)["expected_points"] for col in range(n_cols))
+        planned = sum(step["expected_points"] for step in steps)
+        return {
+            "gameweeks": self.predictions.gameweeks,
+            "steps": steps,
+            "expected_points": round(planned, 2),
+            "baseline_points": round(baseline, 2),
+            "gain": round(planned - baseline, 2),
+            "objective": round(total, 2),
+            "final_squad": [self._player(r) for r in path[-1][2][0]] if path else [],
+            "states_explored": explored,
+            "evaluations": self.evaluate.evaluations,
+            "solve_time": round(time.perf_counter() - start, 3),
+        }
+
+    def _player(self, row: int) -> Dict:
+        player = dict(self.predictions.players[row])
+        player["horizon_points"] = [float(x) for x in self.predictions.points[row]]
+        return player
+
+
+def print_plan(plan: Dict):
+    print(f"\n🗓️  Transfer plan for GW{plan['gameweeks'][0]}-{plan['gameweeks'][-1]}")
+    for step in plan['steps']:
+        moves = ", ".join(f"{t['out']['web_name']} ➜ {t['in']['web_name']}" for t in step['transfers']) or "roll"
+        hits = f" (-{HIT_COST * step['hits']})" if step['hits'] else ""
+        print(f"  GW{step['gameweek']}: {moves}{hits} | FT {step['free_transfers']} | bank {step['bank']:.1f}m | "
+              f"(C) {step['captain']} | xP {step['expected_points']:.2f}")
+    print(f"📈 Planned {plan['expected_points']:.2f} xP vs {plan['baseline_points']:.2f} holding the squad ({plan['gain']:+.2f})")
+    print(f"🔎 {plan['states_explored']} states, {plan['evaluations']} squad evaluations in {plan['solve_time']:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Multi-gameweek transfer planner')
+    parser.add_argument('--squad', help='Comma-separated ids of the current 15 players (default: the optimal squad for the next GW)')
+    parser.add_argument('--bank', type=float, default=None, help='Money in the bank, in millions')
+    parser.add_argument('--free-transfers', type=int, default=1)
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON, help='Gameweeks to plan over')
+    parser.add_argument('--max-transfers', type=int, default=2, help='Transfers considered per gameweek')
+    parser.add_argument('--max-hits', type=int, default=1, help='-4 hits allowed per gameweek')
+    parser.add_argument('--beam-width', type=int, default=30)
+    parser.add_argument('--full-universe', action='store_true',
+                        help=f'Consider every available player instead of the top {DEFAULT_CANDIDATE_LIMIT} pre-filter')
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+    apply_replay_arguments(args)
+
+    dm = FPLDataManager()
+    commander = EngineCommander(dm, modelTrainer(create_storage()),
+                                candidate_limit=None if args.full_universe else DEFAULT_CANDIDATE_LIMIT)
+    squad_ids = [int(x) for x in args.squad.split(',')] if args.squad else []
+
+    # Owned players are fetched and scored even if they miss the candidate pre-filter
+    bootstrap = dm.get_bootstrap_static()
+    snapshot = GameweekSnapshot.build(dm, commander.snapshot_player_ids(bootstrap['elements']) | set(squad_ids), bootstrap=bootstrap,
+                                      storage=commander.trainer.storage)
+    predictions = predict_horizon(commander, snapshot, args.horizon, tuple(squad_ids))
+    if not predictions.gameweeks:
+        print("No upcoming gameweeks to plan.")
+        sys.exit(0)
+
+    bank = args.bank
+    if not squad_ids:
+        pool = [dict(p, predicted_points=float(predictions.points[i, 0])) for i, p in enumerate(predictions.players)]
+        squad = optimize_squad(pool, TOTAL_BUDGET)
+        if not squad:
+            print("❌ Could not build a starting squad within budget")
+            sys.exit(1)
+        squad_ids = [p['id'] for p in squad['starting_11'] + squad['bench']]
+        bank = TOTAL_BUDGET - squad['total_cost'] if bank is None else bank
+        print(f"No --squad given; planning from the optimal GW{predictions.gameweeks[0]} squad ({squad['total_cost']:.1f}m)")
+
+    planner = TransferPlanner(predictions, max_transfers=args.max_transfers, max_hits=args.max_hits, beam_width=args.beam_width)
+    try:
+        plan = planner.plan(squad_ids, bank or 0.0, args.free_transfers)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print_plan(plan)
@@ -1,60 +1,64 @@
 import os
 import sys
-import json
-import random
+import time
+import argparse
+import itertools
+from typing import Dict, List
 
 # Add project root to path
-sys.path.append(os.getcwd())
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from backend.engine.data_manager import FPLDataManager
-from backend.engine.storage import EngineStorage
-from backend.engine.trainer import modelTrainer
-from backend.engine.commander import EngineCommander
-
-def run_backtest():
-    print("🚀 Starting Engine Backtest & RL Loop Verification...")
-    
-    dm = FPLDataManager()
-    storage = EngineStorage()
-    trainer = modelTrainer(storage)
-    commander = EngineCommander(dm, trainer)
-    
-    # 1. Clear existing test data for a clean run (locally)
-    if os.path.exists(storage.training_data_file):
-        os.remove(storage.training_data_file)
-    
-    # 2. Simulate 3 Gameweeks
-    for gw in range(1, 4):
-        print(f"\n--- Simulating Gameweek {gw} ---")
-        
-        # A. Generate Predictions
-        print(f"Generating predictions for GW{gw}...")
-        squad = commander.get_top_15_players()
-        storage.save_predictions(gw, squad)
-        
-        # B. Simulate Actual Results (randomized for testing)
-        print(f"Simulating actual scores for GW{gw}...")
-        actual_points = {}
-        for p in squad:
-            # Predict around 2-10 points with some noise
-            actual_points[p['id']] = max(0, p['predicted_points'] + random.uniform(-3, 5))
-            
-        # C. Evaluate & Feed into RL Loop
-        print(f"Evaluating GW{gw} performance and updating training pool...")
-        trainer.evaluate_performance(gw, actual_points)
-        
-        # D. Train Model (only if we have enough data)
-        print(f"Attempting RL Model Update...")
-        trainer.train_on_feedback()
-        
-    print("\n✅ Backtest Completion Check:")
-    training_data = storage._load(storage.training_data_file)
-    print(f"Total training records collected: {len(training_data)}")
-    
-    if len(training_data) > 0:
-        print("💡 SUCCESS: Engine is successfully learning from feedback.")
-    else:
-        print("❌ FAILURE: No training data collected.")
+from backend.engine.trainer import TRAINING_MODES
+from backend.engine.commander import DEFAULT_CANDIDATE_LIMIT
+from backend.engine.walk_forward import SeasonData, run_backtest, summarize
+from backend.engine.replay import add_replay_arguments, apply_replay_arguments
+
+
+def variants_from_args(args) -> List[Dict]:
+    limits = [None if limit <= 0 else limit for limit in args.candidate_limits]
+    return [{"variant": f"limit={limit or 'all'} train={mode}", "candidate_limit": limit, "train_mode": mode}
+            for limit, mode in itertools.product(limits, args.train_modes)]
+
+
+def print_report(rows: List[Dict]):
+    print(f"\n{'variant':<28} {'GW':>3} {'MAE':>6} {'n':>4} {'XI pts':>7} {'C pts':>6} {'squad':>6} "
+          f"{'predict':>8} {'train':>7}  mode")
+    for r in rows:
+        mae = f"{r['mae']:.3f}" if r['mae'] is not None else "-"
+        print(f"{r['variant']:<28} {r['gameweek']:>3} {mae:>6} {r['sample_size']:>4} {r['xi_points']:>7.0f} "
+              f"{r['captain_points']:>6.0f} {r['squad_points']:>6.0f} {r['predict_seconds']:>7.2f}s "
+              f"{r['train_seconds']:>6.2f}s  {r['train_mode']}")
+
+    print(f"\n{'variant':<28} {'mean MAE':>9} {'total pts':>10} {'pts/GW':>7} {'runtime':>9}")
+    for v in summarize(rows):
+        print(f"{v['variant']:<28} {v['mean_mae']:>9.3f} {v['total_points']:>10.0f} {v['points_per_gw']:>7.1f} {v['runtime']:>8.1f}s")
+
 
 if __name__ == "__main__":
-    run_backtest()
+    parser = argparse.ArgumentParser(description='Walk-forward backtest: replay recorded gameweeks through predict -> select -> evaluate -> retrain')
+    parser.add_argument('--start-gw', type=int, default=2, help='First gameweek to predict (earlier ones only feed history)')
+    parser.add_argument('--end-gw', type=int, default=None, help='Last gameweek to predict (default: last finished)')
+    parser.add_argument('--candidate-limits', type=int, nargs='+', default=[DEFAULT_CANDIDATE_LIMIT],
+                        help='Candidate pool sizes to compare (0 = everyone)')
+    parser.add_argument('--train-modes', nargs='+', choices=TRAINING_MODES, default=["auto"])
+    parser.add_argument('--frozen', action='store_true', help='Never retrain: gameweeks run independently in parallel')
+    parser.add_argument('--models', help='Start from the models saved in this data directory (default: untrained)')
+    parser.add_argument('--pool', type=int, default=None, help='Only fetch histories for the top N players by total points')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+    apply_replay_arguments(args)
+
+    print("🚀 Loading season data for the walk-forward backtest...")
+    season = SeasonData.fetch(FPLDataManager(), args.pool)
+    gameweeks = [gw for gw in season.gameweeks if gw >= args.start_gw and (args.end_gw is None or gw <= args.end_gw)]
+    if not gameweeks:
+        print("❌ No finished gameweeks in range")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    rows = run_backtest(season, variants_from_args(args), gameweeks, retrain=not args.frozen,
+                        models_dir=args.models, workers=args.workers)
+    print_report(rows)
+    print(f"\n⏱️  Backtest finished in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.engine.feature_factory import FeatureFactory, FEATURE_COLUMNS
+
+
+def synthetic_universe(n_players: int, n_gameweeks: int, seed: int = 0):
+    """Bootstrap-like elements (string stats, as the API returns them) plus element-summary histories."""
+    rng = random.Random(seed)
+    elements, summaries = [], {}
+    for pid in range(1, n_players + 1):
+        minutes = rng.choice([0, rng.randint(90, 2000)])
+        elements.append({
+            "id": pid,
+            "team": rng.randint(1, 20),
+            "element_type": rng.choice([1, 2, 2, 3, 3, 3, 4]),
+            "expected_goals_per_90": f"{rng.uniform(0, 0.8):.2f}",
+            "expected_assists_per_90": f"{rng.uniform(0, 0.5):.2f}",
+            "saves_per_90": f"{rng.uniform(0, 3):.2f}",
+            "defensive_contribution_per_90": f"{rng.uniform(0, 12):.2f}",
+            "minutes": minutes,
+            "bps": rng.randint(0, 600),
+            "form": f"{rng.uniform(0, 9):.1f}",
+            "ict_index": f"{rng.uniform(0, 150):.1f}",
+            "selected_by_percent": f"{rng.uniform(0, 60):.1f}",
+            "now_cost": rng.randint(40, 150),
+        })
+        summaries[pid] = {"history": [{
+            "round": gw,
+            "minutes": rng.choice([0, 30, 90]),
+            "goals_scored": rng.choice([0, 0, 0, 1, 2]),
+            "assists": rng.choice([0, 0, 1]),
+            "clean_sheets": rng.choice([0, 1]),
+            "total_points": rng.randint(0, 16),
+        } for gw in range(1, n_gameweeks + 1) if rng.random() < 0.9]}
+    return elements, summaries
+
+
+def per_player(elements, summaries, fdr, gw, vulnerability):
+    rows = [FeatureFactory.prepare_features(p, summaries[p['id']]['history'], fdr[i], gw, vulnerability[i])
+            for i, p in enumerate(elements)]
+    return pd.DataFrame(rows, index=pd.Index([p['id'] for p in elements], name='id'))
+
+
+def batch(elements_df, history_df, fdr, gw, vulnerability):
+    return FeatureFactory.prepare_features_batch(elements_df, history_df, fdr, gw, vulnerability)
+
+
+def timed(fn, repeats: int):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FeatureFactory: per-player dicts vs prepare_features_batch')
+    parser.add_argument('--players', type=int, nargs='+', default=[120, 700])
+    parser.add_argument('--gameweeks', type=int, default=30)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    # The history frame is built once per snapshot (GameweekSnapshot.history_frame), so it is timed separately
+    print(f"{'players':>8} {'per-player':>11} {'history frame':>14} {'batch':>9} {'speedup':>8} {'max|diff|':>10}")
+    for n_players in args.players:
+        elements, summaries = synthetic_universe(n_players, args.gameweeks)
+        rng = np.random.default_rng(0)
+        fdr = rng.integers(2, 6, n_players)
+        vulnerability = rng.uniform(0.5, 2.5, n_players)
+
+        t_loop, expected = timed(lambda: per_player(elements, summaries, fdr, args.gameweeks + 1, vulnerability), args.repeats)
+        elements_df = pd.DataFrame(elements)
+        t_frame, history_df = timed(lambda: FeatureFactory.history_frame(summaries), args.repeats)
+        t_batch, actual = timed(lambda: batch(elements_df, history_df, fdr, args.gameweeks + 1, vulnerability), args.repeats)
+        diff = np.abs(expected[FEATURE_COLUMNS].to_numpy(dtype=float) - actual[FEATURE_COLUMNS].to_numpy(dtype=float)).max()
+        print(f"{n_players:>8} {t_loop*1000:>9.1f}ms {t_frame*1000:>12.1f}ms {t_batch*1000:>7.1f}ms "
+              f"{t_loop/t_batch:>7.1f}x {diff:>10.2e}")
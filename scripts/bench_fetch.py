@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.engine.data_manager import FPLDataManager
+
+
+class StubFPLHandler(BaseHTTPRequestHandler):
+    """Minimal element-summary endpoint with artificial latency and injected transient failures."""
+
+    latency = 0.05
+    failure_rate = 0.05
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        player_id = int(self.path.strip('/').split('/')[-1])
+        body = json.dumps({
+            "history": [{"round": gw, "minutes": 90, "total_points": (player_id + gw) % 12} for gw in range(1, 21)],
+            "fixtures": []
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_benchmark(n_players: int, workers: int, latency: float, failure_rate: float, rate_limit: float):
+    StubFPLHandler.latency = latency
+    StubFPLHandler.failure_rate = failure_rate
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubFPLHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"🧪 Stub FPL server on {base_url} ({latency*1000:.0f}ms latency, {failure_rate:.0%} transient 503s)")
+    ids = list(range(1, n_players + 1))
+
+    try:
+        for label, n_workers in [("sequential", 1), ("concurrent", workers)]:
+            dm = FPLDataManager(base_url=base_url, max_workers=n_workers, requests_per_second=rate_limit,
+                                backoff_seconds=0.01, use_cache=False)
+            start = time.perf_counter()
+            summaries = dm.get_player_summaries(ids)
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<11} {len(summaries)}/{n_players} summaries in {elapsed:.2f}s "
+                  f"({len(summaries)/elapsed:.1f}/s, retries={dm.stats['retries']}, failures={dm.stats['failures']})")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Element-summary fetch throughput against a local stub server')
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub response latency in seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.05)
+    parser.add_argument('--rate-limit', type=float, default=100.0, help='Requests per second per host')
+    args = parser.parse_args()
+
+    run_benchmark(args.players, args.workers, args.latency, args.failure_rate, args.rate_limit)
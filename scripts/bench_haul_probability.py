@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.engine.distributions import GOAL_VALS, CS_VALS, ASSIST_VALS, SAVE_VALS
+
+
+def synthetic_predictions(n_players: int, seed: int = 0):
+    """Event predictions with realistic magnitudes for a mixed-position pool."""
+    rng = np.random.default_rng(seed)
+    positions = rng.choice([1, 2, 3, 4], size=n_players, p=[0.1, 0.35, 0.4, 0.15])
+    attack = np.where(positions >= 3, 1.0, 0.3)
+    return {
+        'actual_goals': rng.gamma(2.0, 0.15, n_players) * attack,
+        'actual_assists': rng.gamma(2.0, 0.1, n_players),
+        'actual_clean_sheets': np.where(positions <= 2, rng.uniform(0.1, 0.5, n_players), rng.uniform(0, 0.3, n_players)),
+        'actual_saves': np.where(positions == 1, rng.uniform(1.5, 4.5, n_players), 0.0),
+        'actual_bonus': rng.gamma(1.5, 0.3, n_players),
+        'actual_defcon_points': rng.uniform(0, 0.8, n_players),
+    }, positions.tolist()
+
+
+def legacy_haul_probability(trainer, event_predictions, element_types, n_sims=1500, haul_multipliers=None):
+    """The original per-player loop, kept here as the benchmark baseline."""
+    n_players = len(element_types)
+    haul_probs = np.zeros(n_players)
+    c = trainer.confidence_scores
+    for i in range(n_players):
+        pos = element_types[i]
+        multiplier = haul_multipliers[i] if haul_multipliers is not None else 1.0
+        l_goals = event_predictions['actual_goals'][i] * c.get('actual_goals', 1.0) * multiplier
+        l_assists = event_predictions['actual_assists'][i] * c.get('actual_assists', 1.0) * multiplier
+        l_saves = event_predictions['actual_saves'][i] * c.get('actual_saves', 1.0)
+        l_bonus = event_predictions.get('actual_bonus', np.zeros(n_players))[i] * c.get('actual_bonus', 1.0) * multiplier
+        l_defcon = event_predictions.get('actual_defcon_points', np.zeros(n_players))[i] * c.get('actual_defcon_points', 1.0)
+        p_cs = event_predictions['actual_clean_sheets'][i] * c.get('actual_clean_sheets', 1.0) * multiplier
+        p_cs = min(max(p_cs, 0), 1)
+
+        points = 2.0
+        points += np.random.poisson(l_goals, n_sims) * GOAL_VALS.get(pos, 4)
+        points += np.random.poisson(l_assists, n_sims) * ASSIST_VALS
+        points += np.random.binomial(1, p_cs, n_sims) * CS_VALS.get(pos, 0)
+        points += np.random.poisson(l_saves, n_sims) * SAVE_VALS
+        points += np.random.poisson(l_bonus, n_sims)
+        points += np.random.poisson(l_defcon, n_sims)
+        haul_probs[i] = np.mean(points >= 11)
+    return haul_probs
+
+
+def timed(fn, repeats: int):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+class _StubTrainer:
+    """Just enough of modelTrainer to run the simulation without loading models from disk."""
+    from backend.engine.trainer import modelTrainer as _mt
+    _event_rates = _mt._event_rates
+    points_distribution = _mt.points_distribution
+    calculate_haul_probability = _mt.calculate_haul_probability
+
+    def __init__(self):
+        self.confidence_scores = {}
+        self.n_sims = 1500
+        self.sim_seed = 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Haul probability: legacy loop vs vectorized MC vs exact')
+    parser.add_argument('--players', type=int, nargs='+', default=[120, 700])
+    parser.add_argument('--sims', type=int, nargs='+', default=[1500, 10000])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    trainer = _StubTrainer()
+    print(f"{'players':>8} {'sims':>7} {'legacy':>10} {'vectorized':>11} {'exact':>9} {'speedup':>8} {'max|MC-exact|':>14}")
+    for n_players in args.players:
+        preds, positions = synthetic_predictions(n_players)
+        t_exact, exact = timed(lambda: trainer.calculate_haul_probability(preds, positions, exact=True), args.repeats)
+        for n_sims in args.sims:
+            t_legacy, _ = timed(lambda: legacy_haul_probability(trainer, preds, positions, n_sims), args.repeats)
+            t_vec, vec = timed(lambda: trainer.calculate_haul_probability(preds, positions, n_sims=n_sims), args.repeats)
+            print(f"{n_players:>8} {n_sims:>7} {t_legacy*1000:>8.1f}ms {t_vec*1000:>9.1f}ms {t_exact*1000:>7.1f}ms "
+                  f"{t_legacy/t_vec:>7.1f}x {np.abs(vec - exact).max():>14.4f}")
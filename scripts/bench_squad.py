@@ -0,0 +1,88 @@
+import os
+import io
+import sys
+import glob
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.engine.data_manager import FPLDataManager
+from backend.engine.storage import create_storage
+from backend.engine.trainer import modelTrainer
+from backend.engine.commander import EngineCommander, DEFAULT_CANDIDATE_LIMIT
+from backend.engine.replay import add_replay_arguments, apply_replay_arguments
+from backend.squad_builder import (get_all_predicted_players, build_greedy_squad, optimize_squad, squad_objective,
+                                   prune_dominated, HAS_MILP, TOTAL_BUDGET, SQUAD_QUOTAS, MAX_PLAYERS_PER_TEAM)
+
+
+def predicted_pool(candidate_limit, model_dir: str):
+    """Runs the real prediction pipeline (live API or --replay archive) against a scratch storage directory."""
+    with tempfile.TemporaryDirectory() as workdir:
+        storage = create_storage(workdir)
+        for path in glob.glob(os.path.join(model_dir, "model_*.joblib")):
+            shutil.copy(path, storage.base_path)
+        dm = FPLDataManager(cache_path=os.path.join(workdir, "http_cache.sqlite"))
+        commander = EngineCommander(dm, modelTrainer(storage), candidate_limit=candidate_limit)
+        with redirect_stdout(io.StringIO()):
+            return get_all_predicted_players(dm, commander)
+
+
+def synthetic_pool(n_players: int, seed: int = 0):
+    """Prices and points correlated through team strength, so team caps actually bind."""
+    rng = random.Random(seed)
+    strength = {t: rng.uniform(0.6, 1.6) for t in range(1, 21)}
+    pool = []
+    for pid in range(n_players):
+        team = rng.randint(1, 20)
+        price = round(rng.uniform(4.0, 13.0) * 2) / 2
+        points = round(max(0.0, price * 0.5 * strength[team] + rng.gauss(0, 1.0)), 2)
+        pool.append({"id": pid, "team_id": team, "position": rng.choice([1, 2, 2, 3, 3, 3, 4, 4]),
+                     "price": price, "predicted_points": points, "value_score": points / price})
+    return pool
+
+
+def is_valid(squad) -> bool:
+    players = squad['starting_11'] + squad['bench']
+    teams = [p['team_id'] for p in players]
+    return (all(sum(1 for p in players if p['position'] == pos) == quota for pos, quota in SQUAD_QUOTAS.items())
+            and max(teams.count(t) for t in set(teams)) <= MAX_PLAYERS_PER_TEAM
+            and sum(p['price'] for p in players) <= TOTAL_BUDGET + 1e-9)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Squad optimizer: greedy vs exact (MILP / branch-and-bound)')
+    parser.add_argument('--synthetic', type=int, metavar='N', help='Use N synthetic players instead of the prediction pipeline')
+    parser.add_argument('--seeds', type=int, default=5, help='Synthetic instances to run')
+    parser.add_argument('--full-universe', action='store_true', help=f'Score every player instead of the top {DEFAULT_CANDIDATE_LIMIT}')
+    parser.add_argument('--model-dir', default='backend/data')
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+    apply_replay_arguments(args)
+
+    if args.synthetic:
+        pools = [(f"synthetic#{seed}", synthetic_pool(args.synthetic, seed)) for seed in range(args.seeds)]
+    else:
+        limit = None if args.full_universe else DEFAULT_CANDIDATE_LIMIT
+        pools = [("full universe" if limit is None else f"top-{limit}", predicted_pool(limit, args.model_dir))]
+
+    methods = ["greedy", "bnb"] + (["milp"] if HAS_MILP else [])
+    print(f"{'pool':<14} {'players':>7} {'pruned':>6} {'method':<7} {'time':>8} {'XI pts':>7} {'bench':>6} {'objective':>9} {'cost':>6} {'valid':>5}")
+    for name, pool in pools:
+        n_pruned = len(prune_dominated(pool))
+        for method in methods:
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                squad = build_greedy_squad(pool) if method == "greedy" else optimize_squad(pool, method=method)
+            elapsed = time.perf_counter() - start
+            if not squad or 'error' in squad:
+                print(f"{name:<14} {len(pool):>7} {n_pruned:>6} {method:<7} {elapsed*1000:>6.0f}ms   {(squad or {}).get('error', 'no squad')}")
+                continue
+            print(f"{name:<14} {len(pool):>7} {n_pruned:>6} {method:<7} {elapsed*1000:>6.0f}ms "
+                  f"{squad['total_predicted_points']:>7.2f} {squad['bench_predicted_points']:>6.2f} "
+                  f"{squad_objective(squad['starting_11'], squad['bench']):>9.2f} {squad['total_cost']:>6.1f} {str(is_valid(squad)):>5}")
@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.engine.storage import EngineStorage, create_storage, HAS_ORJSON
+
+
+class LegacyStorage(EngineStorage):
+    """The original in-place json.dump(indent=4) writer, kept here as the benchmark baseline."""
+
+    def _load(self, path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save(self, path, data):
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=4)
+
+    def save_predictions(self, gameweek, predictions):
+        history = self._load(self.prediction_history_file)
+        history[str(gameweek)] = {"timestamp": datetime.now().isoformat(), "predictions": predictions}
+        self._save(self.prediction_history_file, history)
+
+
+def synthetic_predictions(n_players: int, seed: int):
+    """Prediction rows shaped like get_top_15_players output (18 features plus scores)."""
+    rng = random.Random(seed)
+    return [{
+        "id": pid,
+        "web_name": f"Player {pid}",
+        "element_type": rng.randint(1, 4),
+        "predicted_points": round(rng.uniform(1, 9), 2),
+        "haul_probability": round(rng.random(), 4),
+        "features": [round(rng.uniform(0, 10), 4) for _ in range(18)],
+    } for pid in range(1, n_players + 1)]
+
+
+def run(storage: EngineStorage, gameweeks: int, n_players: int, checkpoints):
+    rows = []
+    for gw in range(1, gameweeks + 1):
+        predictions = synthetic_predictions(n_players, gw)
+        start = time.perf_counter()
+        storage.save_predictions(gw, predictions)
+        t_save = time.perf_counter() - start
+        if gw in checkpoints:
+            start = time.perf_counter()
+            storage.get_predictions(gw)
+            t_load = time.perf_counter() - start
+            path = getattr(storage, 'db_path', storage.prediction_history_file)
+            size = sum(os.path.getsize(p) for p in (path, path + '-wal') if os.path.exists(p))
+            rows.append((gw, size, t_save, t_load))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='EngineStorage save/load latency as prediction history grows')
+    parser.add_argument('--gameweeks', type=int, default=38)
+    parser.add_argument('--players', type=int, default=700)
+    args = parser.parse_args()
+
+    checkpoints = {1, 5, 10, 20, args.gameweeks}
+    backends = [
+        ("legacy json", lambda path: LegacyStorage(path)),
+        (f"atomic json{' (orjson)' if HAS_ORJSON else ''}", lambda path: create_storage(path, 'json')),
+        ("sqlite", lambda path: create_storage(path, 'sqlite')),
+    ]
+
+    print(f"{'backend':<22} {'gw':>4} {'size':>9} {'save':>10} {'load':>10}")
+    for name, factory in backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            for gw, size, t_save, t_load in run(factory(tmp), args.gameweeks, args.players, checkpoints):
+                print(f"{name:<22} {gw:>4} {size / 1e6:>7.1f}MB {t_save*1000:>8.1f}ms {t_load*1000:>8.1f}ms")
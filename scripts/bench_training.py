@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.engine.storage import create_storage
+from backend.engine.trainer import modelTrainer, HAS_XGB
+
+
+def synthetic_training_frame(trainer: modelTrainer, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Feature rows with per-90 style magnitudes and count/binary targets that depend on them."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.gamma(2.0, 0.2, size=(n_rows, len(trainer.features))), columns=trainer.features)
+    df['fixture_difficulty'] = rng.integers(2, 6, n_rows)
+    signal = df['xGI_90'] + 0.3 * df['form'] - 0.1 * df['fixture_difficulty']
+    for target in trainer.targets:
+        if target == 'actual_clean_sheets':
+            df[target] = (rng.random(n_rows) < 1 / (1 + np.exp(signal - 0.5))).astype(float)
+        else:
+            df[target] = rng.poisson(np.clip(0.4 * signal + 0.2, 0.01, None)).astype(float)
+    return df
+
+
+def timed(fn, repeats: int):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def legacy_fit(trainer: modelTrainer, X, labels, weights):
+    """The original loop: one XGBRegressor.fit (own DMatrix + quantile sketch) per head."""
+    for target, y in labels.items():
+        trainer.models[target].fit(X, y, sample_weight=weights)
+
+
+def legacy_predict(trainer: modelTrainer, X):
+    return {target: trainer.models[target].predict(X) for target in trainer.targets}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Six-head training/inference: per-head fit loop vs shared quantile sketch')
+    parser.add_argument('--rows', type=int, nargs='+', default=[2000, 20000, 100000])
+    parser.add_argument('--n-jobs', type=int, default=None, help='Cores for the shared path (default: all)')
+    parser.add_argument('--predict-rows', type=int, default=600)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    if not HAS_XGB:
+        print("❌ xgboost is not installed; the shared-DMatrix path needs it")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        legacy = modelTrainer(create_storage(workdir))
+        shared = modelTrainer(create_storage(workdir))
+        print(f"🧮 {os.cpu_count()} cores, n_jobs={args.n_jobs or 'all'}")
+        print(f"{'rows':>8} {'fit loop':>10} {'shared':>10} {'speedup':>8} {'predict loop':>13} {'predict':>9} {'max|Δpred|':>11}")
+        for n_rows in args.rows:
+            df = synthetic_training_frame(legacy, n_rows)
+            X = df[legacy.features]
+            labels = {t: df[t] for t in legacy.targets}
+            weights = np.linspace(0.5, 1.5, n_rows)
+
+            t_loop, _ = timed(lambda: legacy_fit(legacy, X, labels, weights), args.repeats)
+            t_shared, _ = timed(lambda: shared.fit_heads(X, labels, weights, args.n_jobs), args.repeats)
+
+            X_pred = synthetic_training_frame(legacy, args.predict_rows, seed=1)[legacy.features]
+            t_pred_loop, ref = timed(lambda: legacy_predict(legacy, X_pred), args.repeats * 5)
+            t_pred, new = timed(lambda: shared.predict(X_pred), args.repeats * 5)
+            diff = max(float(np.abs(ref[t] - new[t]).max()) for t in legacy.targets)
+            print(f"{n_rows:>8} {t_loop*1000:>8.0f}ms {t_shared*1000:>8.0f}ms {t_loop/t_shared:>7.2f}x "
+                  f"{t_pred_loop*1000:>11.1f}ms {t_pred*1000:>7.1f}ms {diff:>11.2e}")
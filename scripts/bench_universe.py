@@ -0,0 +1,57 @@
+import os
+import io
+import sys
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.engine.data_manager import FPLDataManager
+from backend.engine.storage import create_storage
+from backend.engine.trainer import modelTrainer
+from backend.engine.commander import EngineCommander, DEFAULT_CANDIDATE_LIMIT
+from backend.engine.replay import add_replay_arguments, apply_replay_arguments
+from backend.squad_builder import get_all_predicted_players
+
+
+def run_mode(candidate_limit, workdir: str, model_dir: str):
+    """Snapshot + scoring for one candidate limit; returns (players fetched, players scored, fetch s, score s)."""
+    storage = create_storage(workdir)
+    for path in glob.glob(os.path.join(model_dir, "model_*.joblib")):
+        shutil.copy(path, storage.base_path)
+
+    dm = FPLDataManager(cache_path=os.path.join(workdir, "http_cache.sqlite"))
+    commander = EngineCommander(dm, modelTrainer(storage), candidate_limit=candidate_limit)
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        snapshot = commander.build_snapshot()
+        fetched = time.perf_counter()
+        commander.get_top_15_players(snapshot)
+        pool = get_all_predicted_players(dm, commander, snapshot)
+        scored = time.perf_counter()
+    return len(snapshot.summaries), len(pool), fetched - start, scored - fetched
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f'Wall time and memory: top-{DEFAULT_CANDIDATE_LIMIT} pre-filter vs full universe')
+    parser.add_argument('--model-dir', default='backend/data', help='Directory holding the trained model_*.joblib files')
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+    apply_replay_arguments(args)
+
+    print(f"{'mode':<14} {'fetched':>8} {'scored':>7} {'fetch (cold)':>13} {'scoring':>9} {'peak mem':>9}")
+    for name, limit in [(f"top-{DEFAULT_CANDIDATE_LIMIT}", DEFAULT_CANDIDATE_LIMIT), ("full universe", None)]:
+        with tempfile.TemporaryDirectory() as workdir:
+            # Cold pass for wall time, then a warm-cache pass under tracemalloc for peak memory
+            n_fetched, n_scored, t_fetch, t_score = run_mode(limit, workdir, args.model_dir)
+            tracemalloc.start()
+            run_mode(limit, workdir, args.model_dir)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        print(f"{name:<14} {n_fetched:>8} {n_scored:>7} {t_fetch:>12.2f}s {t_score:>8.2f}s {peak / 1e6:>7.1f}MB")
@@ -0,0 +1,114 @@
+import os
+import io
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.engine.storage import create_storage
+from backend.engine.trainer import modelTrainer
+from backend.engine.training_store import TrainingStore
+
+POLICIES = ("full", "incremental", "auto")
+
+
+def store_season(store_dir: str, columns):
+    """Gameweek batches from an existing training store, in temporal order."""
+    store = TrainingStore(store_dir)
+    by_gw = {}
+    for season, gameweek, path in store.partitions():
+        by_gw.setdefault((season, gameweek), []).append((season, gameweek, path))
+    return [(f"{season} GW{gw}", store.read(columns, parts)) for (season, gw), parts in by_gw.items()]
+
+
+def synthetic_season(trainer: modelTrainer, n_gameweeks: int, rows_per_gw: int, shift_gw: int, seed: int = 0):
+    """
+    A season of gameweek batches whose feature -> target relationship drifts slowly, with a regime shift at
+    `shift_gw` (e.g. a rule change), so both the incremental path and the drift check get exercised.
+    """
+    rng = np.random.default_rng(seed)
+    batches = []
+    for gw in range(1, n_gameweeks + 1):
+        df = pd.DataFrame(rng.gamma(2.0, 0.2, size=(rows_per_gw, len(trainer.features))), columns=trainer.features)
+        df['fixture_difficulty'] = rng.integers(2, 6, rows_per_gw)
+        attack = 0.4 + 0.005 * gw + (0.8 if gw >= shift_gw else 0.0)
+        signal = df['xGI_90'] + 0.3 * df['form'] - 0.1 * df['fixture_difficulty'] + 0.2 * df['opponent_vulnerability']
+        for target in trainer.targets:
+            if target == 'actual_clean_sheets':
+                df[target] = (rng.random(rows_per_gw) < 1 / (1 + np.exp(signal - 0.5))).astype(float)
+            else:
+                df[target] = rng.poisson(np.clip(attack * signal + 0.2, 0.01, None)).astype(float)
+        df['player_id'] = np.arange(rows_per_gw)
+        batches.append((f"GW{gw}", df))
+    return batches
+
+
+def replay(policy: str, batches):
+    """Walk-forward: score each gameweek with the models trained on everything before it, then update."""
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        storage = create_storage(workdir)
+        trainer = modelTrainer(storage)
+        for i, (label, batch) in enumerate(batches):
+            error = trainer.holdout_error(batch) if trainer._model_stamps else None
+            storage.save_training_data(batch.to_dict('records'), gameweek=i + 1)
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                summary = trainer.train_on_feedback(mode=policy)
+            rows.append({
+                "gameweek": label,
+                "mae": float(np.mean(list(error.values()))) if error else None,
+                "seconds": time.perf_counter() - start,
+                "mode": (summary or {}).get('mode', '-'),
+                "reason": (summary or {}).get('reason', ''),
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Walk-forward comparison of full refits vs incremental (warm-start) updates')
+    parser.add_argument('--store', help='Replay the gameweek partitions of this training store (default: synthetic season)')
+    parser.add_argument('--gameweeks', type=int, default=38, help='Synthetic season length')
+    parser.add_argument('--rows', type=int, default=600, help='Synthetic rows per gameweek')
+    parser.add_argument('--shift-gw', type=int, default=20, help='Synthetic regime shift gameweek')
+    parser.add_argument('--policies', nargs='+', choices=POLICIES, default=list(POLICIES))
+    parser.add_argument('--verbose', action='store_true', help='Print every gameweek')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        reference = modelTrainer(create_storage(workdir))
+    columns = reference.features + reference.targets + ['player_id']
+    if args.store:
+        batches = store_season(args.store, columns)
+        source = args.store
+    else:
+        batches = synthetic_season(reference, args.gameweeks, args.rows, args.shift_gw)
+        source = f"synthetic ({args.gameweeks} GWs x {args.rows} rows, shift at GW{args.shift_gw})"
+    print(f"🔁 Replaying {len(batches)} gameweek batches from {source}")
+
+    results = {policy: replay(policy, batches) for policy in args.policies}
+
+    if args.verbose:
+        print(f"{'gameweek':<14}" + "".join(f" {p + ' MAE':>16} {p + ' s':>10} {'mode':>12}" for p in args.policies))
+        for i, (label, _) in enumerate(batches):
+            line = f"{label:<14}"
+            for policy in args.policies:
+                row = results[policy][i]
+                mae = f"{row['mae']:.4f}" if row['mae'] is not None else "-"
+                line += f" {mae:>16} {row['seconds']:>10.2f} {row['mode']:>12}"
+            print(line)
+
+    print(f"\n{'policy':<12} {'train time':>11} {'mean MAE':>9} {'MAE after shift':>16} {'full refits':>12}  refit reasons")
+    for policy in args.policies:
+        rows = results[policy]
+        scored = [r['mae'] for r in rows if r['mae'] is not None]
+        after = [r['mae'] for i, r in enumerate(rows) if r['mae'] is not None and not args.store and i + 1 >= args.shift_gw]
+        reasons = sorted({r['reason'].split(':')[0] for r in rows if r['mode'] == 'full' and r['reason'] != 'full'})
+        print(f"{policy:<12} {sum(r['seconds'] for r in rows):>10.2f}s {np.mean(scored):>9.4f} "
+              f"{(np.mean(after) if after else float('nan')):>16.4f} {sum(r['mode'] == 'full' for r in rows):>12}  {'; '.join(reasons)}")
@@ -0,0 +1,310 @@
+import io
+import os
+import sys
+import glob
+import json
+import time
+import random
+import shutil
+import fnmatch
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.engine.storage import create_storage
+from backend.engine.trainer import modelTrainer
+from backend.engine.commander import EngineCommander
+from backend.engine.selector import StarterSelector
+from backend.engine.feature_factory import FeatureFactory
+from backend.squad_builder import optimize_squad
+from backend.engine.replay import add_replay_arguments, apply_replay_arguments
+from bench_features import synthetic_universe
+from bench_training import synthetic_training_frame
+from bench_storage import synthetic_predictions
+from bench_squad import synthetic_pool
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# One JSON line per run (commit, machine, timings), so runs on different commits can be compared
+HISTORY_FILE = os.path.join(ROOT, ".benchmarks", "history.jsonl")
+# Slowdown of the best round beyond which a case is reported as a regression (the minimum is the least noisy statistic)
+REGRESSION_THRESHOLD = 0.15
+
+# name -> (setup returning the timed callable, rounds, quick)
+Case = Tuple[Callable[[], Callable[[], object]], int, bool]
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str, rounds: int = 5, quick: bool = True):
+    """Registers a benchmark: the decorated setup builds its fixtures once and returns the callable to time."""
+    def register(setup):
+        CASES[name] = (setup, rounds, quick)
+        return setup
+    return register
+
+
+def event_predictions(n: int, seed: int = 0) -> Tuple[Dict[str, np.ndarray], List[int]]:
+    rng = np.random.default_rng(seed)
+    preds = {
+        'actual_goals': rng.gamma(1.0, 0.15, n), 'actual_assists': rng.gamma(1.0, 0.1, n),
+        'actual_clean_sheets': rng.uniform(0.1, 0.5, n), 'actual_saves': rng.gamma(1.0, 0.8, n),
+        'actual_bonus': rng.gamma(1.0, 0.3, n), 'actual_defcon_points': rng.uniform(0, 0.8, n),
+    }
+    return preds, rng.choice([1, 2, 2, 3, 3, 3, 4], n).tolist()
+
+
+def ranked_pool(n: int, seed: int = 0) -> List[Dict]:
+    """get_top_15_players-style rows, best first, for the starter/bench selection."""
+    rng = random.Random(seed)
+    pool = [{"id": pid, "team": f"Team {rng.randint(1, 20)}", "position": rng.choice([1, 2, 2, 3, 3, 3, 4]),
+             "predicted_points": round(rng.uniform(1, 9), 2), "can_start": rng.random() < 0.8}
+            for pid in range(n)]
+    return sorted(pool, key=lambda p: p['predicted_points'], reverse=True)
+
+
+_SCRATCH: List[str] = []
+
+
+def scratch_dir() -> str:
+    """Temporary data directory, removed when the run ends."""
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    _SCRATCH.append(workdir)
+    return workdir
+
+
+def scratch_trainer() -> modelTrainer:
+    return modelTrainer(create_storage(scratch_dir()))
+
+
+# --- Features ---
+for n_players in (120, 700):
+    @case(f"features.prepare_features[{n_players}x38]", rounds=3)
+    def _(n_players=n_players):
+        elements, summaries = synthetic_universe(n_players, 38)
+        return lambda: [FeatureFactory.prepare_features(p, summaries[p['id']]['history'], 3, 38, 1.5) for p in elements]
+
+    @case(f"features.prepare_features_batch[{n_players}x38]")
+    def _(n_players=n_players):
+        elements, summaries = synthetic_universe(n_players, 38)
+        elements_df, history_df = pd.DataFrame(elements), FeatureFactory.history_frame(summaries)
+        return lambda: FeatureFactory.prepare_features_batch(elements_df, history_df, 3, 38, 1.5)
+
+
+# --- xP and haul simulation ---
+@case("trainer.translate_to_xp[700]", rounds=50)
+def _():
+    trainer = scratch_trainer()
+    preds, types = event_predictions(700)
+    return lambda: trainer.translate_to_xp(preds, types)
+
+
+for n_sims in (500, 1500, 5000):
+    @case(f"trainer.calculate_haul_probability[700,{n_sims}]", rounds=5)
+    def _(n_sims=n_sims):
+        trainer = scratch_trainer()
+        preds, types = event_predictions(700)
+        return lambda: trainer.calculate_haul_probability(preds, types, n_sims=n_sims, seed=0)
+
+
+# --- Training ---
+for n_rows, rounds, quick in ((5_000, 3, True), (50_000, 1, True), (500_000, 1, False)):
+    @case(f"trainer.train_on_feedback[{n_rows // 1000}k]", rounds=rounds, quick=quick)
+    def _(n_rows=n_rows):
+        trainer = scratch_trainer()
+        trainer.storage.save_training_data(synthetic_training_frame(trainer, n_rows).to_dict('records'), gameweek=1)
+
+        def train():
+            with redirect_stdout(io.StringIO()):
+                return trainer.train_on_feedback(mode="full")
+        return train
+
+
+# --- Selection ---
+for n_players in (120, 700, 3000, 10000):
+    @case(f"commander.select_squad[{n_players}]", rounds=30, quick=n_players <= 700)
+    def _(n_players=n_players):
+        commander = EngineCommander(None, scratch_trainer())
+        pool = ranked_pool(n_players)
+        return lambda: commander.select_squad(pool)
+
+
+@case("selector.select_per_sample[700x200]", rounds=3)
+def _():
+    """Re-selection on every simulated sample: unsorted pool, one points vector per sample."""
+    pool = ranked_pool(700)
+    samples = np.random.default_rng(0).gamma(2.0, 2.0, (200, len(pool)))
+    selector = StarterSelector()
+    return lambda: [selector.select(pool, sample) for sample in samples]
+
+
+for n_players in (120, 700):
+    @case(f"squad_builder.optimize_squad[{n_players}]", rounds=3)
+    def _(n_players=n_players):
+        pool = synthetic_pool(n_players)
+        return lambda: optimize_squad(pool)
+
+
+# --- Storage ---
+for backend in ("json", "sqlite"):
+    @case(f"storage.save_predictions[{backend},700]", rounds=10)
+    def _(backend=backend):
+        storage = create_storage(scratch_dir(), backend)
+        predictions = synthetic_predictions(700, 0)
+        gameweeks = iter(range(1, 10_000))
+        return lambda: storage.save_predictions(next(gameweeks), predictions)
+
+    @case(f"storage.get_predictions[{backend},38x700]", rounds=10)
+    def _(backend=backend):
+        storage = create_storage(scratch_dir(), backend)
+        for gw in range(1, 39):
+            storage.save_predictions(gw, synthetic_predictions(700, gw))
+        return lambda: storage.get_predictions(20)
+
+
+@case("storage.load_training_frame[50k]", rounds=5)
+def _():
+    trainer = scratch_trainer()
+    frame = synthetic_training_frame(trainer, 50_000)
+    chunk = -(-len(frame) // 38)
+    for gw in range(1, 39):
+        part = frame.iloc[(gw - 1) * chunk:gw * chunk]
+        trainer.storage.save_training_data(part.to_dict('records'), gameweek=gw)
+    return lambda: trainer.storage.load_training_frame(trainer.features + trainer.targets)
+
+
+def recorded_cases(models_dir: Optional[str]):
+    """Cases on recorded data (--replay): the snapshot is built once, get_top_15_players is timed on it."""
+    from backend.engine.data_manager import FPLDataManager
+
+    @case("pipeline.get_top_15_players[replay]", rounds=3)
+    def _():
+        trainer = scratch_trainer()
+        for path in glob.glob(os.path.join(models_dir or "", "model_*.joblib")):
+            shutil.copy(path, trainer.storage.base_path)
+        trainer.load_model()
+        commander = EngineCommander(FPLDataManager(use_cache=False), trainer)
+        with redirect_stdout(io.StringIO()):
+            snapshot = commander.build_snapshot()
+
+        def top_15():
+            with redirect_stdout(io.StringIO()):
+                return commander.get_top_15_players(snapshot)
+        return top_15
+
+
+def run_case(name: str, rounds_override: Optional[int] = None) -> Dict:
+    setup, rounds, _ = CASES[name]
+    fn = setup()
+    fn() # warm-up (imports, caches, first-call allocation)
+    times = []
+    for _ in range(rounds_override or rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times), "mean": statistics.fmean(times), "rounds": len(times)}
+
+
+def git_revision() -> Tuple[str, bool]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def load_history() -> List[Dict]:
+    if not os.path.exists(HISTORY_FILE):
+        return []
+    with open(HISTORY_FILE) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline_for(history: List[Dict], commit: str, dirty: bool, machine: str,
+                 compare: Optional[str]) -> Tuple[Optional[str], Dict[str, Dict]]:
+    """
+    Baseline commit and per-case results on this machine: `compare`, or by default the latest other commit
+    (HEAD itself when there are uncommitted changes). Each case takes its most recent result from that commit's runs.
+    """
+    runs = [r for r in history if r["machine"] == machine]
+    if compare:
+        runs = [r for r in runs if r["commit"].startswith(compare)]
+    else:
+        runs = [r for r in runs if r["commit"] != commit or (dirty and not r["dirty"])]
+    if not runs:
+        return None, {}
+    base_commit = runs[-1]["commit"]
+    results = {}
+    for run in runs:
+        if run["commit"] == base_commit and not (dirty and run["commit"] == commit and run["dirty"]):
+            results.update(run["results"])
+    return base_commit, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark suite for the engine hot paths; results are kept per commit')
+    parser.add_argument('-k', '--filter', nargs='+', default=None, metavar='GLOB', help='Only cases matching these globs')
+    parser.add_argument('--quick', action='store_true', help='Skip the slowest sizes (500k-row training, 3000-player selection)')
+    parser.add_argument('--rounds', type=int, default=None, help='Override every case\'s round count')
+    parser.add_argument('--models', help='Model directory for the recorded-data cases (default: untrained)')
+    parser.add_argument('--compare', metavar='COMMIT', help='Compare against this commit\'s latest run (default: previous commit run)')
+    parser.add_argument('--no-save', action='store_true', help='Do not append this run to the history')
+    parser.add_argument('--fail-on-regression', action='store_true', help=f'Exit 1 if any case is >{REGRESSION_THRESHOLD:.0%} slower')
+    parser.add_argument('--list', action='store_true', help='List the cases and exit')
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+    apply_replay_arguments(args)
+    if args.replay:
+        recorded_cases(args.models)
+
+    names = [n for n in CASES if (not args.quick or CASES[n][2])
+             and (not args.filter or any(fnmatch.fnmatch(n, pattern) for pattern in args.filter))]
+    if args.list:
+        print("\n".join(names))
+        sys.exit(0)
+
+    commit, dirty = git_revision()
+    machine = f"{platform.node()}/{platform.machine()}/{os.cpu_count()}cpu"
+    base_commit, baseline = baseline_for(load_history(), commit, dirty, machine, args.compare)
+    print(f"🏁 {len(names)} benchmark(s) at {commit}{' (dirty)' if dirty else ''} on {machine}"
+          + (f", comparing with {base_commit}" if base_commit else ""))
+    print(f"{'case':<48} {'median':>10} {'min':>10} {'rounds':>6} {'vs base':>9}")
+
+    results, regressions = {}, []
+    try:
+        for name in names:
+            result = results[name] = run_case(name, args.rounds)
+            delta = ""
+            base = baseline.get(name)
+            if base:
+                change = result["min"] / base["min"] - 1
+                delta = f"{change:+.1%}"
+                if change > REGRESSION_THRESHOLD:
+                    regressions.append(name)
+                    delta += " ⚠️"
+            print(f"{name:<48} {result['median']*1000:>8.2f}ms {result['min']*1000:>8.2f}ms {result['rounds']:>6} {delta:>9}")
+    finally:
+        for workdir in _SCRATCH:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+        with open(HISTORY_FILE, 'a') as f:
+            f.write(json.dumps({"commit": commit, "dirty": dirty, "timestamp": datetime.now(timezone.utc).isoformat(),
+                                "machine": machine, "python": platform.python_version(), "results": results}) + "\n")
+        print(f"💾 Results appended to {os.path.relpath(HISTORY_FILE, ROOT)}")
+
+    if regressions:
+        print(f"⚠️ {len(regressions)} regression(s) over {REGRESSION_THRESHOLD:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
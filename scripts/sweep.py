@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import itertools
+import numpy as np
+from typing import Dict, List, Optional
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.engine.data_manager import FPLDataManager
+from backend.engine.trainer import TRAINING_MODES
+from backend.engine.commander import DEFAULT_CANDIDATE_LIMIT
+from backend.engine.params import EngineParams, DEFAULT_PARAMS, MODEL_STAGE, POST_STAGE
+from backend.engine.walk_forward import SeasonData, run_walk_forward, replay_post_processing, run_pool, summarize
+from backend.engine.replay import add_replay_arguments, apply_replay_arguments
+
+DEFAULT_CACHE_DIR = "backend/data/sweep_cache"
+
+
+def parse_grid(specs: List[str]) -> Dict[str, List[float]]:
+    """`name=v1,v2,...` specs -> {name: [values]}."""
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        if name not in EngineParams.names() or not values:
+            raise SystemExit(f"❌ Bad --grid '{spec}' (expected name=v1,v2 with name in {', '.join(EngineParams.names())})")
+        grid[name] = [float(v) for v in values.split(',')]
+    return grid
+
+
+def build_variants(grid: Dict[str, List[float]], n_random: int, sample_names: Optional[List[str]], seed: int,
+                   candidate_limit: Optional[int], train_mode: str) -> List[Dict]:
+    """The defaults, every grid combination and `n_random` uniform samples, without duplicates."""
+    params = [DEFAULT_PARAMS]
+    for combo in itertools.product(*grid.values()):
+        params.append(DEFAULT_PARAMS.with_values(**dict(zip(grid, combo))))
+    rng = np.random.default_rng(seed)
+    params += [EngineParams.sample(rng, tuple(sample_names) if sample_names else None) for _ in range(n_random)]
+
+    variants = []
+    for p in dict.fromkeys(params):
+        label = ", ".join(f"{k}={v:g}" for k, v in p.changed().items()) or "defaults"
+        variants.append({"variant": label, "candidate_limit": candidate_limit, "train_mode": train_mode, "params": p})
+    return variants
+
+
+def season_fingerprint(season: SeasonData) -> str:
+    payload = json.dumps([season.bootstrap, season.fixtures, season.summaries, season.live], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def scores_path(cache_dir: str, fingerprint: str, variant: Dict, gameweeks: List[int], models_dir: Optional[str]) -> str:
+    """Cache file of one model-stage walk-forward: same data, model params, pool, training mode and gameweeks."""
+    key = repr((fingerprint, variant['params'].model_key(), variant['candidate_limit'], variant['train_mode'],
+                tuple(gameweeks), os.path.abspath(models_dir) if models_dir else None))
+    return os.path.join(cache_dir, f"scores_{hashlib.sha1(key.encode()).hexdigest()[:16]}.pkl")
+
+
+def run_sweep(season: SeasonData, variants: List[Dict], gameweeks: List[int], cache_dir: str,
+              models_dir: Optional[str] = None, workers: Optional[int] = None) -> List[Dict]:
+    """
+    1. One full walk-forward (predict -> evaluate -> retrain) per distinct set of model-stage params, in parallel;
+       each caches its per-gameweek candidate scores unless a previous sweep already did.
+    2. Every variant re-scores the cached event predictions with its own post-processing params, in parallel.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    fingerprint = season_fingerprint(season)
+    paths = {v['variant']: scores_path(cache_dir, fingerprint, v, gameweeks, models_dir) for v in variants}
+
+    # Stage 1: model walk-forwards still missing from the cache
+    pending = {}
+    for v in variants:
+        path = paths[v['variant']]
+        if not os.path.exists(path) and path not in pending:
+            pending[path] = v
+    n_models = len(set(paths.values()))
+    print(f"🧠 {n_models} model configuration(s), {n_models - len(pending)} cached, {len(pending)} to train")
+    if pending:
+        n_workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+        n_jobs = max(1, (os.cpu_count() or 1) // n_workers)
+        run_pool(season, [(run_walk_forward, ({**v, "variant": f"model {v['params'].model_key()}"}, gameweeks,
+                                              True, models_dir, n_jobs, path), f"model {v['params'].model_key()}")
+                          for path, v in pending.items()], n_workers)
+
+    # Stage 2: post-processing replays over the cached predictions
+    print(f"🎛️  Re-scoring {len(variants)} variant(s) on cached predictions")
+    jobs = [(replay_post_processing, (v, gameweeks, paths[v['variant']]), v['variant']) for v in variants]
+    return run_pool(season, jobs, workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the engine's tuned constants on replayed gameweeks")
+    parser.add_argument('--grid', nargs='*', default=[], metavar='NAME=V1,V2',
+                        help=f"Grid values per parameter: {', '.join(EngineParams.names())}")
+    parser.add_argument('--random', type=int, default=0, help='Uniform random samples from the search space')
+    parser.add_argument('--sample', nargs='+', choices=EngineParams.names(), default=None,
+                        help='Parameters the random samples vary (default: all)')
+    parser.add_argument('--post-only', action='store_true', help='Random samples only vary post-processing params')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--objective', choices=('points', 'mae'), default='points', help='Ranking: squad points or mean MAE')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--start-gw', type=int, default=2)
+    parser.add_argument('--end-gw', type=int, default=None)
+    parser.add_argument('--candidate-limit', type=int, default=DEFAULT_CANDIDATE_LIMIT, help='0 = everyone')
+    parser.add_argument('--train-mode', choices=TRAINING_MODES, default="auto")
+    parser.add_argument('--models', help='Start every walk-forward from the models saved in this data directory')
+    parser.add_argument('--pool', type=int, default=None, help='Only fetch histories for the top N players by total points')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Where model-stage predictions are cached')
+    parser.add_argument('--output', help='Write every per-gameweek row and the ranking to this JSON file')
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+    apply_replay_arguments(args)
+
+    sample_names = args.sample or (list(EngineParams.names(POST_STAGE)) if args.post_only else None)
+    variants = build_variants(parse_grid(args.grid), args.random, sample_names, args.seed,
+                              args.candidate_limit or None, args.train_mode)
+
+    print("🚀 Loading season data for the sweep...")
+    season = SeasonData.fetch(FPLDataManager(), args.pool)
+    gameweeks = [gw for gw in season.gameweeks if gw >= args.start_gw and (args.end_gw is None or gw <= args.end_gw)]
+    if not gameweeks:
+        print("❌ No finished gameweeks in range")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    rows = run_sweep(season, variants, gameweeks, args.cache_dir, args.models, args.workers)
+    ranking = summarize(rows)
+    if args.objective == 'points':
+        ranking.sort(key=lambda v: v['total_points'], reverse=True)
+    else:
+        ranking.sort(key=lambda v: v['mean_mae'])
+
+    print(f"\n{'#':>3} {'total pts':>10} {'pts/GW':>7} {'mean MAE':>9}  variant")
+    for i, v in enumerate(ranking[:args.top], 1):
+        print(f"{i:>3} {v['total_points']:>10.0f} {v['points_per_gw']:>7.1f} {v['mean_mae']:>9.3f}  {v['variant']}")
+    model_names = set(EngineParams.names(MODEL_STAGE))
+    print(f"\n⏱️  {len(variants)} variant(s) over GW{gameweeks[0]}-{gameweeks[-1]} in {time.perf_counter() - start:.1f}s "
+          f"({len({v['params'].model_key() for v in variants})} model fit sequence(s); "
+          f"model params: {', '.join(sorted(model_names))})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"ranking": ranking, "rows": rows}, f, indent=2, default=str)
+        print(f"💾 Results written to {args.output}")